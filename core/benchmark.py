@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+""" 性能测试脚本;
+在项目根目录下运行:
+    python -m core.benchmark extract --workers 8
+    python -m core.benchmark scene
+    python -m core.benchmark paginate --rows 10000,100000,1000000
+    python -m core.benchmark rows --rows 100000
+    python -m core.benchmark upsert --rows 50000
+    python -m core.benchmark stress --writers 8 --submits 200
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from core.frame_extract import extract_frames, extract_frames_parallel
+from core.scene_detect import compute_scores
+from core.models import Base, BaseDBOperateModel, VideoInfo
+from core.db import create_sqlite_engine, write_with_retry
+
+
+def make_synthetic_video(video_path: str, frame_count: int = 600, size: tuple = (1280, 720), fps: int = 25) -> str:
+    """使用 cv2.VideoWriter 生成测试视频, 画面为移动的渐变加噪声
+
+    Args:
+        video_path: str;视频保存路径
+        frame_count: int;帧数
+        size: tuple;(宽, 高)
+        fps: int;帧率
+
+    Returns:
+        str;视频路径
+    """
+    width, height = size
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    rng = np.random.default_rng(0)
+    x = np.arange(width, dtype=np.uint16)[None, :]
+    y = np.arange(height, dtype=np.uint16)[:, None]
+    for i in range(frame_count):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[..., 0] = (x + i * 4) % 256
+        frame[..., 1] = (y + i * 2) % 256
+        frame[..., 2] = rng.integers(0, 64, size=(height, width), dtype=np.uint8)
+        cv2.putText(frame, str(i), (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 5)
+        writer.write(frame)
+    writer.release()
+    return video_path
+
+
+def bench_extract(max_workers: int, frame_count: int, size: tuple) -> list:
+    """对比 1..N 个进程展开视频帧的吞吐量
+
+    Args:
+        max_workers: int;最大进程数
+        frame_count: int;测试视频的帧数
+        size: tuple;测试视频的 (宽, 高)
+
+    Returns:
+        list;[(进程数, 耗时秒, 帧/秒), ...]
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_extract_")
+    results = []
+    try:
+        video_path = make_synthetic_video(os.path.join(work_dir, "synthetic.mp4"), frame_count, size)
+        for workers in range(1, max_workers + 1):
+            result_folder = os.path.join(work_dir, f"frames_{workers}")
+            start = time.perf_counter()
+            if workers == 1:
+                done = extract_frames(video_path, result_folder)
+            else:
+                done = extract_frames_parallel(video_path, result_folder, workers=workers)
+            cost = time.perf_counter() - start
+            results.append((workers, cost, done / cost if cost else 0.0))
+            print(f"workers={workers:<3} frames={done:<6} time={cost:8.2f}s  {done / cost:8.1f} frames/s")
+            shutil.rmtree(result_folder, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def bench_scene(frame_count: int, size: tuple, fps: int = 25) -> float:
+    """镜头切换分数的计算速度, 与视频实时播放速度的比值
+
+    Args:
+        frame_count: int;测试视频的帧数
+        size: tuple;测试视频的 (宽, 高)
+        fps: int;测试视频的帧率
+
+    Returns:
+        float;计算速度 / 实时速度, 大于 1 表示快于实时
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_scene_")
+    try:
+        video_path = make_synthetic_video(os.path.join(work_dir, "synthetic.mp4"), frame_count, size, fps)
+        start = time.perf_counter()
+        scores = compute_scores(video_path)
+        cost = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    speed = len(scores) / cost / fps if cost else 0.0
+    print(f"frames={len(scores):<6} time={cost:8.2f}s  {len(scores) / cost:8.1f} frames/s  {speed:.1f}x realtime")
+    return speed
+
+
+def fill_video_info(db_path: str, rows: int, batch: int = 50000) -> None:
+    """写入测试用的 videoinfo 数据"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(insert(VideoInfo), [
+                {"video_name": f"video_{i:08d}.mp4", "category": "三体" if i % 2 else "地球",
+                 "quality_category": "优", "section_frames": f"{i % 100}-{i % 100 + 50}", "status": i % 3}
+                for i in range(start, min(rows, start + batch))])
+    engine.dispose()
+
+
+def bench_paginate(rows_list: list, limit: int = 15, repeat: int = 5) -> list:
+    """OFFSET 分页与游标分页在最后一页的耗时, 以及几种总数计算方式的耗时
+
+    Args:
+        rows_list: list;测试的数据行数
+        limit: int;分页大小
+        repeat: int;每项重复次数, 取平均
+
+    Returns:
+        list;每个数据量的 dict 结果, 单位毫秒
+    """
+    results = list()
+    for rows in rows_list:
+        work_dir = tempfile.mkdtemp(prefix="bench_paginate_")
+        try:
+            db_path = os.path.join(work_dir, "bench.db")
+            fill_video_info(db_path, rows)
+            engine = create_engine(f"sqlite:///{db_path}")
+            session = sessionmaker(engine)()
+            db_query = session.query(VideoInfo)
+            last_page = BaseDBOperateModel.get_page_number(rows, limit)
+            # 最后一页的游标: 上一页最后一条的排序字段
+            cursor = [session.query(VideoInfo.id).order_by(VideoInfo.id.desc())
+                      .offset(max(0, (last_page - 1) * limit - 1)).limit(1).scalar()]
+
+            def timed(func):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    func()
+                return (time.perf_counter() - start) / repeat * 1000
+
+            result = {
+                "rows": rows,
+                "offset_last_page": timed(lambda: BaseDBOperateModel.get_list(db_query, set(), offset=last_page,
+                                                                              limit=limit)),
+                "keyset_last_page": timed(lambda: BaseDBOperateModel.get_page_after(db_query, set(), cursor=cursor,
+                                                                                    limit=limit, count_mode="none")),
+                "count_exact": timed(lambda: BaseDBOperateModel.count(db_query, set(), "exact")),
+                "count_cached": timed(lambda: BaseDBOperateModel.count(db_query, set(), "cached")),
+                "count_approximate": timed(lambda: BaseDBOperateModel.count(db_query, set(), "approximate")),
+            }
+            session.close()
+            engine.dispose()
+            BaseDBOperateModel.invalidate_count(VideoInfo.__tablename__)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        print("  ".join(f"{k}={v:.2f}ms" if isinstance(v, float) else f"{k}={v:<8}" for k, v in result.items()))
+        results.append(result)
+    return results
+
+
+def bench_rows(rows: int, columns: tuple = ("video_name", "section_frames")) -> dict:
+    """读取全部数据的速度: ORM 对象 + to_dict 与 Core 直接读取字段的对比
+
+    Args:
+        rows: int;测试的数据行数
+        columns: tuple;按字段读取时的字段
+
+    Returns:
+        dict;每种方式的 rows/s
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_rows_")
+    try:
+        db_path = os.path.join(work_dir, "bench.db")
+        fill_video_info(db_path, rows)
+        engine = create_engine(f"sqlite:///{db_path}")
+        session = sessionmaker(engine)()
+        db_query = session.query(VideoInfo)
+        cases = {
+            "orm_to_dict": lambda: BaseDBOperateModel.get_all(db_query, set()),
+            "core_all_columns": lambda: BaseDBOperateModel.select_rows(db_query, set()),
+            "core_columns": lambda: BaseDBOperateModel.select_rows(db_query, set(), list(columns)),
+            "core_tuples": lambda: BaseDBOperateModel.select_rows(db_query, set(), list(columns), as_dict=False),
+        }
+        result = dict()
+        for name, func in cases.items():
+            # 每种方式使用干净的会话, 不复用上一次加载的 ORM 对象
+            session.expunge_all()
+            start = time.perf_counter()
+            count = len(func())
+            cost = time.perf_counter() - start
+            result[name] = count / cost if cost else 0.0
+            print(f"{name:<18} rows={count:<8} time={cost:8.3f}s  {result[name]:12.0f} rows/s")
+        session.close()
+        engine.dispose()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def bench_upsert(rows: int, batch_size: int = 500) -> dict:
+    """逐条查询后插入/更新与批量 upsert 的速度对比, 一半数据已经存在
+
+    Args:
+        rows: int;写入的条数
+        batch_size: int;upsert 每条语句的最大条数
+
+    Returns:
+        dict;每种方式的 rows/s
+    """
+    data = [{"video_name": f"video_{i:08d}.mp4", "category": "地球", "section_frames": f"{i % 100}-{i % 100 + 50}",
+             "quality_category": "良", "status": 1} for i in range(rows)]
+    result = dict()
+    for name in ("per_row", "upsert"):
+        work_dir = tempfile.mkdtemp(prefix="bench_upsert_")
+        try:
+            db_path = os.path.join(work_dir, "bench.db")
+            fill_video_info(db_path, rows // 2)
+            engine = create_engine(f"sqlite:///{db_path}")
+            session = sessionmaker(engine)()
+            start = time.perf_counter()
+            if name == "upsert":
+                BaseDBOperateModel.upsert_all(session, VideoInfo, data, batch_size=batch_size)
+            else:
+                # 与原来提交标注的方式一致: 先查询, 再更新或者插入
+                for item in data:
+                    filters = {VideoInfo.video_name == item["video_name"]}
+                    if BaseDBOperateModel.get_one(session.query(VideoInfo), filters=filters):
+                        BaseDBOperateModel.update(session.query(VideoInfo), item, filters=filters)
+                    else:
+                        BaseDBOperateModel.insert(session, VideoInfo, item)
+            session.commit()
+            cost = time.perf_counter() - start
+            session.close()
+            engine.dispose()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        result[name] = rows / cost if cost else 0.0
+        print(f"{name:<8} rows={rows:<8} time={cost:8.3f}s  {result[name]:12.0f} rows/s")
+    return result
+
+
+def stress_writer(task: tuple) -> tuple:
+    """压力测试的写入进程, 模拟一个标注人员逐条提交
+
+    Args:
+        task: tuple;(数据库路径, 写入进程编号, 提交次数, wal, busy_timeout_ms, retries)
+
+    Returns:
+        tuple;(成功次数, 失败次数, 重试次数)
+    """
+    db_path, writer_idx, submits, wal, busy_timeout_ms, retries = task
+    engine = create_sqlite_engine(db_path, wal=wal, busy_timeout_ms=busy_timeout_ms)
+    session_factory = sessionmaker(engine)
+    done = failed = 0
+    retried = [0]
+
+    def on_retry(attempt, error):
+        retried[0] += 1
+
+    for i in range(submits):
+        data = {"video_name": f"writer{writer_idx:03d}_{i:06d}.mp4", "section_frames": f"{i}-{i + 10}",
+                "quality_category": "优", "status": 1}
+        try:
+            write_with_retry(session_factory,
+                             lambda session: BaseDBOperateModel.upsert_all(session, VideoInfo, [data]),
+                             retries=retries, on_retry=on_retry)
+            done += 1
+        except Exception as e:
+            print(f"writer {writer_idx} 提交失败: {e}")
+            failed += 1
+    engine.dispose()
+    return done, failed, retried[0]
+
+
+def bench_stress(writers: int, submits: int, wal: bool = True, busy_timeout_ms: int = 5000, retries: int = 5) -> dict:
+    """多个进程同时提交标注, 检查是否有提交丢失
+
+    Args:
+        writers: int;写入进程数
+        submits: int;每个进程的提交次数
+        wal: bool;是否使用 WAL 模式
+        busy_timeout_ms: int;数据库被锁定时的等待时间(毫秒)
+        retries: int;等待超时后的重试次数
+
+    Returns:
+        dict;expected / written / failed / retried / lost / 每秒提交数, lost 为报告成功但是数据库中没有的提交数
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_stress_")
+    try:
+        db_path = os.path.join(work_dir, "bench.db")
+        engine = create_sqlite_engine(db_path, wal=wal, busy_timeout_ms=busy_timeout_ms)
+        Base.metadata.create_all(engine)
+        tasks = [(db_path, i, submits, wal, busy_timeout_ms, retries) for i in range(writers)]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=writers) as executor:
+            results = list(executor.map(stress_writer, tasks))
+        cost = time.perf_counter() - start
+        session = sessionmaker(engine)()
+        names = set(session.execute(select(VideoInfo.video_name)).scalars())
+        session.close()
+        engine.dispose()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    expected = {f"writer{w:03d}_{i:06d}.mp4" for w in range(writers) for i in range(submits)}
+    result = {
+        "expected": len(expected),
+        "written": len(names & expected),
+        "failed": sum(r[1] for r in results),
+        "retried": sum(r[2] for r in results),
+        "lost": sum(r[0] for r in results) - len(names & expected),
+        "submits_per_second": len(expected) / cost if cost else 0.0,
+    }
+    print(f"writers={writers} wal={wal} expected={result['expected']} written={result['written']} "
+          f"failed={result['failed']} retried={result['retried']} lost={result['lost']} "
+          f"{result['submits_per_second']:.0f} submits/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="性能测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+    extract_parser = sub.add_parser("extract", help="单进程与多进程展开视频帧的吞吐量对比")
+    extract_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="最大进程数")
+    extract_parser.add_argument("--frames", type=int, default=600, help="测试视频的帧数")
+    extract_parser.add_argument("--width", type=int, default=1280)
+    extract_parser.add_argument("--height", type=int, default=720)
+    scene_parser = sub.add_parser("scene", help="镜头切换检测相对实时播放的速度")
+    scene_parser.add_argument("--frames", type=int, default=600, help="测试视频的帧数")
+    scene_parser.add_argument("--width", type=int, default=1280)
+    scene_parser.add_argument("--height", type=int, default=720)
+    paginate_parser = sub.add_parser("paginate", help="OFFSET 分页与游标分页以及总数缓存的耗时对比")
+    paginate_parser.add_argument("--rows", default="10000,100000,1000000", help="测试的数据行数, 逗号分隔")
+    paginate_parser.add_argument("--limit", type=int, default=15, help="分页大小")
+    rows_parser = sub.add_parser("rows", help="ORM 对象 + to_dict 与按字段读取的速度对比")
+    rows_parser.add_argument("--rows", type=int, default=100000, help="测试的数据行数")
+    upsert_parser = sub.add_parser("upsert", help="逐条插入/更新与批量 upsert 的速度对比")
+    upsert_parser.add_argument("--rows", type=int, default=50000, help="写入的条数")
+    upsert_parser.add_argument("--batch", type=int, default=500, help="每条语句的最大条数")
+    stress_parser = sub.add_parser("stress", help="多个进程同时提交标注, 检查是否有提交丢失")
+    stress_parser.add_argument("--writers", type=int, default=8, help="写入进程数")
+    stress_parser.add_argument("--submits", type=int, default=200, help="每个进程的提交次数")
+    stress_parser.add_argument("--no-wal", action="store_true", help="不使用 WAL 模式(网络共享盘)")
+    stress_parser.add_argument("--busy-timeout", type=int, default=5000, help="被锁定时的等待时间(毫秒)")
+    stress_parser.add_argument("--retries", type=int, default=5, help="等待超时后的重试次数")
+    args = parser.parse_args()
+    if args.command == "extract":
+        bench_extract(args.workers, args.frames, (args.width, args.height))
+    elif args.command == "scene":
+        bench_scene(args.frames, (args.width, args.height))
+    elif args.command == "paginate":
+        bench_paginate([int(i) for i in args.rows.split(",")], args.limit)
+    elif args.command == "rows":
+        bench_rows(args.rows)
+    elif args.command == "upsert":
+        bench_upsert(args.rows, args.batch)
+    elif args.command == "stress":
+        result = bench_stress(args.writers, args.submits, not args.no_wal, args.busy_timeout, args.retries)
+        if result["lost"] or result["failed"]:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
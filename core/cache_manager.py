@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+""" 视频帧缓存目录管理;
+缓存按照视频内容的指纹(文件大小 + 首尾部分数据的哈希)建立目录, 同名的不同视频不会冲突;
+每个缓存目录中的 manifest.json 记录帧数、格式以及最近访问时间, 超出磁盘配额时按最近最少使用淘汰;
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import List, Optional
+
+MANIFEST_NAME = "manifest.json"
+# 计算指纹时读取的首尾数据大小
+FINGERPRINT_BYTES = 1024 * 1024
+# 未完成的缓存目录在这段时间(秒)内有写入时视为正在展开, 淘汰时跳过
+BUSY_SECONDS = 10 * 60
+
+
+def video_fingerprint(video_path: str) -> str:
+    """计算视频文件的指纹
+
+    Args:
+        video_path: str;视频路径
+
+    Returns:
+        str;16 位十六进制字符串
+    """
+    size = os.path.getsize(video_path)
+    sha = hashlib.sha1(str(size).encode("utf-8"))
+    with open(video_path, "rb") as f:
+        sha.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            sha.update(f.read(FINGERPRINT_BYTES))
+    return sha.hexdigest()[0:16]
+
+
+def folder_size(folder: str) -> int:
+    """统计目录下所有文件的字节数"""
+    total = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def folder_mtime(folder: str) -> float:
+    """目录以及其中文件的最近修改时间, 只检查第一层"""
+    latest = 0.0
+    try:
+        latest = os.path.getmtime(folder)
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    latest = max(latest, entry.stat().st_mtime)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return latest
+
+
+class FrameCacheManager(object):
+    """ 帧缓存目录(Config.TEMP_DIR)的管理类;
+    """
+
+    def __init__(self, root: str, quota_mb: int = 0):
+        """
+        Args:
+            root: str;缓存根目录
+            quota_mb: int;磁盘配额(MB), 0 表示不限制
+        """
+        self.root = root
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        # (路径, 大小, 修改时间) -> 指纹, 避免同一个文件重复计算哈希
+        self._fingerprints = {}
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+    def fingerprint(self, video_path: str) -> str:
+        """获取视频指纹, 文件未变化时使用进程内的缓存"""
+        stat = os.stat(video_path)
+        key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime)
+        fp = self._fingerprints.get(key)
+        if fp is None:
+            fp = video_fingerprint(video_path)
+            self._fingerprints[key] = fp
+        return fp
+
+    def entry_folder(self, video_path: str) -> str:
+        """获取视频对应的缓存目录, 不存在时创建目录以及 manifest
+
+        Args:
+            video_path: str;视频路径
+
+        Returns:
+            str;缓存目录
+        """
+        fp = self.fingerprint(video_path)
+        stem = os.path.splitext(os.path.basename(video_path))[0]
+        folder = os.path.join(self.root, f"{stem}_{fp}")
+        with self._lock:
+            if not os.path.exists(os.path.join(folder, MANIFEST_NAME)):
+                if not os.path.exists(folder):
+                    os.makedirs(folder)
+                self._write_manifest(folder, {
+                    "video_name": os.path.basename(video_path),
+                    "video_path": os.path.abspath(video_path),
+                    "fingerprint": fp,
+                    "format": "jpg",
+                    "frame_count": 0,
+                    "complete": False,
+                    "proxy": False,
+                    "size_bytes": 0,
+                    "created": time.time(),
+                    "last_access": time.time(),
+                })
+        return folder
+
+    @staticmethod
+    def read_manifest(folder: str) -> dict:
+        """读取缓存目录的 manifest, 不存在时返回空字典"""
+        try:
+            with open(os.path.join(folder, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_manifest(folder: str, manifest: dict) -> None:
+        """写入 manifest, 先写临时文件再替换"""
+        path = os.path.join(folder, MANIFEST_NAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+
+    def update_manifest(self, folder: str, **fields) -> dict:
+        """更新 manifest 中的字段
+
+        Returns:
+            dict;更新后的 manifest
+        """
+        with self._lock:
+            manifest = self.read_manifest(folder)
+            manifest.update(fields)
+            self._write_manifest(folder, manifest)
+        return manifest
+
+    def touch(self, folder: str) -> None:
+        """记录一次访问, 用于最近最少使用淘汰"""
+        self.update_manifest(folder, last_access=time.time())
+
+    def is_complete(self, folder: str) -> bool:
+        """缓存目录中的帧是否已经全部展开"""
+        return bool(self.read_manifest(folder).get("complete"))
+
+    def mark_complete(self, folder: str, frame_count: int, proxy: bool = False, proxy_skipped: bool = False) -> None:
+        """展开完成后记录帧数以及目录大小
+
+        Args:
+            folder: str;缓存目录
+            frame_count: int;展开的帧数
+            proxy: bool;是否生成了 proxy
+            proxy_skipped: bool;proxy 超出大小上限或者磁盘空间不足而没有生成, 之后不再为了 proxy 重新展开
+        """
+        self.update_manifest(folder, complete=True, frame_count=frame_count, proxy=proxy, proxy_skipped=proxy_skipped,
+                             size_bytes=folder_size(folder), last_access=time.time())
+
+    def entries(self) -> List[dict]:
+        """列出所有缓存目录, 没有 manifest 的目录(例如 gt_json)不属于缓存
+
+        Returns:
+            list;manifest 列表, 额外带有 folder 字段
+        """
+        result = []
+        for name in os.listdir(self.root):
+            folder = os.path.join(self.root, name)
+            manifest = self.read_manifest(folder) if os.path.isdir(folder) else {}
+            if not manifest:
+                continue
+            if not manifest.get("complete"):
+                # 未完成的目录大小随时在变化, 实时统计
+                manifest["size_bytes"] = folder_size(folder)
+            manifest["folder"] = folder
+            result.append(manifest)
+        return result
+
+    def evict(self, keep: Optional[set] = None) -> List[str]:
+        """超出配额时按最近访问时间从旧到新删除缓存目录;
+        未完成并且最近仍有写入的目录可能正在被其他线程或进程展开, 不会被删除;
+
+        Args:
+            keep: set;不允许删除的缓存目录(例如当前正在显示以及正在预取的视频)
+
+        Returns:
+            list;被删除的缓存目录
+        """
+        if self.quota_bytes <= 0:
+            return []
+        keep = {os.path.abspath(i) for i in (keep or set())}
+        entries = sorted(self.entries(), key=lambda e: e.get("last_access", 0))
+        total = sum(e["size_bytes"] for e in entries)
+        removed = []
+        for entry in entries:
+            if total <= self.quota_bytes:
+                break
+            if os.path.abspath(entry["folder"]) in keep:
+                continue
+            if not entry.get("complete") and time.time() - folder_mtime(entry["folder"]) < BUSY_SECONDS:
+                continue
+            shutil.rmtree(entry["folder"], ignore_errors=True)
+            total -= entry["size_bytes"]
+            removed.append(entry["folder"])
+        return removed
+
+    def stats(self) -> dict:
+        """缓存的统计信息
+
+        Returns:
+            dict;条目数、完成数、占用字节数、配额以及每个条目的信息
+        """
+        entries = sorted(self.entries(), key=lambda e: e.get("last_access", 0), reverse=True)
+        return {
+            "root": self.root,
+            "entries": len(entries),
+            "complete": sum(1 for e in entries if e.get("complete")),
+            "total_bytes": sum(e["size_bytes"] for e in entries),
+            "quota_bytes": self.quota_bytes,
+            "items": entries,
+        }
+
+    def format_stats(self) -> str:
+        """格式化缓存统计信息, 用于界面以及命令行输出"""
+        stats = self.stats()
+        quota = f"{stats['quota_bytes'] / 1024 ** 2:.0f} MB" if stats["quota_bytes"] else "不限制"
+        lines = [
+            f"缓存目录: {stats['root']}",
+            f"视频数: {stats['entries']} (已完成 {stats['complete']})",
+            f"占用空间: {stats['total_bytes'] / 1024 ** 2:.1f} MB / {quota}",
+        ]
+        for item in stats["items"]:
+            last_access = time.strftime("%Y-%m-%d %H:%M", time.localtime(item.get("last_access", 0)))
+            lines.append(f"{item.get('video_name')}  帧数:{item.get('frame_count')}  "
+                         f"{item['size_bytes'] / 1024 ** 2:.1f} MB  最近访问:{last_access}")
+        return "\n".join(lines)
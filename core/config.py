@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+""" 项目配置, 不依赖界面库, 界面以及命令行工具共用;
+"""
+import os
+
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from core.db import create_sqlite_engine
+
+
+class Config:
+    """设置配置文件;
+    """
+    QUALITY_CLASSIFY = ["优", "良", "中", "差"]
+    SCENE_CONFIG = ['三体', "地球"]
+
+    DB_NAME = "video"
+    TABLE_NAME = "video_info"
+    # 数据库固定在 qt_core 目录, 从其他目录启动的工具(video_tools 等)共用同一个数据库
+    DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "qt_core", f"{DB_NAME}.db")
+    # 多人同时写入: WAL 模式(数据库位于网络共享盘时设为 False)、同步级别、被锁定时的等待时间(毫秒)
+    DB_WAL = True
+    DB_SYNCHRONOUS = "NORMAL"
+    DB_BUSY_TIMEOUT_MS = 5000
+    # 等待超时后整个事务重试的次数以及第一次重试前的等待秒数(之后每次翻倍)
+    DB_WRITE_RETRIES = 5
+    DB_RETRY_DELAY = 0.05
+    DB_CONFIG = {
+        "sql_lite": create_sqlite_engine(DB_PATH, wal=DB_WAL, synchronous=DB_SYNCHRONOUS,
+                                         busy_timeout_ms=DB_BUSY_TIMEOUT_MS),
+        "mysql": "",  # 配置 MySql 的加载连接;
+    }
+
+    SESSION = scoped_session(sessionmaker(DB_CONFIG.get("sql_lite")))
+    # 分页总数的缓存有效期(秒), 通过 BaseDBOperateModel 写入时立即失效, 其他进程的写入在有效期后可见
+    COUNT_CACHE_SECONDS = 60
+    # 分页总数最多缓存的查询条件数, 超出时淘汰最久没有使用的
+    COUNT_CACHE_SIZE = 256
+    # 标注数据导出的格式(csv / parquet, parquet 需要安装 pyarrow)以及每批读取的条数
+    EXPORT_FORMAT = "csv"
+    EXPORT_BATCH = 1000
+
+    # 设置视频帧展开成为的图片的缓存目录;
+    TEMP_DIR = "temp_frames"
+    # 帧缓存目录的磁盘配额(MB), 超出后按最近最少使用淘汰, 0 表示不限制
+    TEMP_CACHE_QUOTA_MB = 20 * 1024
+    # 解码帧的内存缓存上限(MB)
+    FRAME_CACHE_MB = 512
+    # 视频帧显示区域的大小 (宽, 高)
+    DISPLAY_SIZE = (520, 725)
+    # 展开视频帧时是否同时生成拖动预览使用的 proxy(未压缩的 RGB, 按总帧数预先分配磁盘空间)
+    PROXY_ENABLED = False
+    # proxy 帧预先缩放到显示区域的大小, 拖动时直接显示不再缩放; 单个 proxy 文件的大小上限(MB), 超出时不生成
+    PROXY_SIZE = DISPLAY_SIZE
+    PROXY_MAX_MB = 2 * 1024
+    # 每显示多少帧输出一次各阶段(decode/convert/scale/paint)的耗时, 0 表示只在切换视频时输出
+    DISPLAY_TIMING_EVERY = 0
+    # 拖动滑块时的最大刷新率, 0 表示不限制
+    RENDER_MAX_FPS = 60
+    # 展开视频帧使用的进程数, 1 为单进程顺序展开
+    EXTRACT_WORKERS = 1
+    # 展开模式: all 全部帧 / stride 每隔 EXTRACT_STRIDE 帧 / window 只展开 EXTRACT_WINDOW 范围 / keyframe 只展开关键帧
+    EXTRACT_MODE = "all"
+    EXTRACT_STRIDE = 10
+    # window 模式的 (起始, 结束(不包含)), 结束为 None 表示到视频末尾, 单位为 EXTRACT_WINDOW_UNIT(frame / second)
+    EXTRACT_WINDOW = (0, 60)
+    EXTRACT_WINDOW_UNIT = "second"
+    # 预取当前视频前后多少个视频, 0 表示关闭预取
+    PREFETCH_DEPTH = 1
+    # 每个预取视频提前解码的帧数
+    PREFETCH_FRAMES = 5
+    # 每个预取视频的帧缓存内存上限(MB)
+    PREFETCH_CACHE_MB = 64
+    # 播放时解码线程预先解码的帧数(环形缓冲区大小)
+    PLAYBACK_BUFFER = 8
+    # 镜头切换检测: 缩小后的 (宽, 高)、分数阈值、切换点之间的最小间隔(秒)以及候选帧段的最短时长(秒)
+    SCENE_SIZE = (64, 36)
+    SCENE_THRESHOLD = 0.35
+    SCENE_MIN_GAP_SECONDS = 0.5
+    SCENE_MIN_SECTION_SECONDS = 1.0
+    # 标注工具支持的视频格式
+    VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov")
+    # 标注提交时 GT 保存为二进制区间格式(.gtb), 否则保存为区间 json
+    GT_BINARY = False
+    # 批量评估的进程数(0 表示使用 CPU 核数)、算法分数阈值以及帧段命中的 IoU 阈值
+    EVAL_WORKERS = 0
+    EVAL_THRESHOLD = 0.5
+    EVAL_IOU = 0.5
+    # 设置项目的基本路径(qt_core 目录, 帧缓存目录位于其中)
+    BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "qt_core")
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+""" 数据库连接;
+多人共用一个 SQLite 数据库(或者标注界面与批量导入同时运行)时:
+    - WAL 模式下读写互不阻塞, 写入之间仍然串行
+    - busy_timeout 让写入在数据库被锁定时等待, 而不是立即报 database is locked
+    - 等待超时后整个事务回滚并按指数退避重试, 超过次数才向调用方报错
+注意: WAL 依赖同一台机器上的共享内存, 数据库位于网络共享盘时需要关闭 WAL, 只使用 busy_timeout 与重试;
+"""
+import time
+import random
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def create_sqlite_engine(db_path: str, wal: bool = True, synchronous: str = "NORMAL",
+                         busy_timeout_ms: int = 5000) -> Engine:
+    """创建 SQLite 连接, 每个新连接都设置 journal_mode / synchronous / busy_timeout
+
+    Args:
+        db_path: str;数据库文件路径
+        wal: bool;是否使用 WAL 模式
+        synchronous: str;OFF / NORMAL / FULL / EXTRA, WAL 模式下 NORMAL 在断电时最多丢失最后提交的事务, 不会损坏数据库
+        busy_timeout_ms: int;数据库被锁定时的等待时间(毫秒)
+
+    Returns:
+        Engine;
+
+    Raises:
+        ValueError;不支持的 synchronous 级别
+    """
+    synchronous = synchronous.upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"不支持的 synchronous 级别: {synchronous}")
+    # timeout 为 sqlite3 模块自身的等待时间(秒), 与 busy_timeout 保持一致
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": busy_timeout_ms / 1000})
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def is_locked_error(error: Exception) -> bool:
+    """是否为数据库被锁定或者忙导致的错误, 这类错误可以重试"""
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error.orig if error.orig is not None else error).lower()
+    return "locked" in message or "busy" in message
+
+
+def write_with_retry(session_factory: Callable, func: Callable, retries: int = 5, delay: float = 0.05,
+                     max_delay: float = 2.0, on_retry: Optional[Callable[[int, Exception], None]] = None):
+    """在一个事务中执行写入并提交, 数据库被锁定时回滚整个事务后重试
+
+    Args:
+        session_factory: callable;返回数据库会话, 例如 Config.SESSION
+        func: callable;参数为会话, 执行写入(不需要提交), 返回值作为本函数的返回值, 重试时会再次调用
+        retries: int;最多重试次数
+        delay: float;第一次重试前的等待秒数, 之后每次翻倍
+        max_delay: float;单次等待的上限
+        on_retry: callable;每次重试前调用, 参数为 (第几次重试, 异常)
+
+    Returns:
+        func 的返回值
+
+    Raises:
+        OperationalError;重试次数用完后仍然被锁定, 或者其他数据库错误
+    """
+    attempt = 0
+    while True:
+        session = session_factory()
+        try:
+            result = func(session)
+            session.commit()
+            return result
+        except OperationalError as e:
+            session.rollback()
+            if not is_locked_error(e) or attempt >= retries:
+                raise
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, e)
+            # 加入随机抖动, 避免多个写入方同时醒来再次冲突
+            time.sleep(min(max_delay, delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
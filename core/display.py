@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+""" 视频帧显示前的处理;
+在预先分配好的缓冲区中完成缩放和颜色转换(均由 OpenCV 的原生代码执行), 每次显示不再分配新的数组;
+"""
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.proxy import proxy_shape
+from utils.timer import StageTimer
+
+STAGES = ("decode", "convert", "scale", "paint")
+
+
+class DisplayPipeline(object):
+    """ BGR 帧 -> 缩放到显示区域大小的 RGB 帧;
+    """
+
+    def __init__(self, display_size: Tuple[int, int]):
+        """
+        Args:
+            display_size: tuple;显示区域的 (宽, 高)
+        """
+        self.display_size = display_size
+        self.timer = StageTimer(STAGES)
+        self._scaled = None
+        self._rgb = None
+
+    def _buffers(self, width: int, height: int) -> None:
+        """按帧尺寸准备缓冲区, 尺寸不变时重复使用"""
+        if self._rgb is None or self._rgb.shape[0:2] != (height, width):
+            self._scaled = np.empty((height, width, 3), dtype=np.uint8)
+            self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+    def prepare(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """缩放并转换颜色, 先缩放再转换可以减少需要转换的像素
+
+        Args:
+            frame: np.ndarray;BGR 格式的原始帧
+
+        Returns:
+            np.ndarray;RGB 帧, 是内部缓冲区, 下一次调用时会被覆盖
+        """
+        if frame is None:
+            return None
+        width, height = proxy_shape(frame.shape[1], frame.shape[0], self.display_size)
+        self._buffers(width, height)
+        with self.timer.stage("scale"):
+            cv2.resize(frame, (width, height), dst=self._scaled, interpolation=cv2.INTER_AREA)
+        with self.timer.stage("convert"):
+            cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        return self._rgb
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+""" 算法结果与 GT 的批量评估;
+按视频名配对算法目录与 GT 目录中的文件, 在进程池中逐个视频计算:
+    - 帧级别的 precision / recall / F1 以及 IoU
+    - GT 帧段与算法帧段的 IoU(每个 GT 帧段取最佳匹配)
+    - 检测延迟: GT 帧段开始到帧段内第一帧被算法检出之间的帧数
+结果写入一个 csv 表格(每个视频一行)以及一个汇总 json;
+使用方法: python -m core.evaluate --gt D:/gt_json --alg D:/alg_json --out D:/eval.csv --workers 8
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.gt_format import BINARY_EXT, JSON_EXT
+from core.intervals import from_mask, frame_iou, segment_iou
+from core.result_index import ResultIndex, is_result_file
+from core.timeline import read_curve
+
+# 每个视频一行的结果列
+RESULT_COLUMNS = ("video_name", "total_frames", "tp", "fp", "fn", "precision", "recall", "f1", "frame_iou",
+                  "gt_segments", "pred_segments", "segment_iou", "segments_hit", "segments_missed", "mean_delay",
+                  "error")
+# 子进程中已经打开的 JSONL 结果索引, 同一个进程评估多个视频时复用
+_RESULT_INDEXES = {}
+
+
+def pair_files(gt_folder: str, alg_folder: str) -> Tuple[List[str], List[str]]:
+    """按视频名配对 GT 与算法文件
+
+    Args:
+        gt_folder: str;GT 目录
+        alg_folder: str;算法结果目录, 或者合并后的 JSONL 结果文件
+
+    Returns:
+        tuple;(两个目录中都存在的视频名(不含后缀), 只有 GT 没有算法结果的视频名)
+    """
+    def stems(folder, exts):
+        return {os.path.splitext(name)[0] for name in os.listdir(folder) if name.endswith(exts)}
+
+    gt_stems = stems(gt_folder, (JSON_EXT, BINARY_EXT))
+    if is_result_file(alg_folder):
+        alg_stems = set(ResultIndex.load_or_build(alg_folder).names())
+    else:
+        alg_stems = stems(alg_folder, (JSON_EXT, BINARY_EXT))
+    return sorted(gt_stems & alg_stems), sorted(gt_stems - alg_stems)
+
+
+def score_masks(gt_mask: np.ndarray, pred_mask: np.ndarray, iou_threshold: float = 0.5) -> dict:
+    """计算一个视频的评估指标
+
+    Args:
+        gt_mask: np.ndarray;GT 逐帧掩码
+        pred_mask: np.ndarray;算法逐帧掩码
+        iou_threshold: float;GT 帧段与算法帧段 IoU 达到该值时算作命中
+
+    Returns:
+        dict;RESULT_COLUMNS 中除 video_name / error 以外的指标
+    """
+    total = max(len(gt_mask), len(pred_mask))
+    gt = np.zeros(total, dtype=bool)
+    pred = np.zeros(total, dtype=bool)
+    gt[:len(gt_mask)] = gt_mask
+    pred[:len(pred_mask)] = pred_mask
+    tp = int(np.count_nonzero(gt & pred))
+    fp = int(np.count_nonzero(pred & ~gt))
+    fn = int(np.count_nonzero(gt & ~pred))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    gt_runs, pred_runs = from_mask(gt), from_mask(pred)
+    if len(gt_runs) and len(pred_runs):
+        best_iou = segment_iou(gt_runs, pred_runs).max(axis=1)
+    else:
+        best_iou = np.zeros(len(gt_runs))
+    # 每个 GT 帧段内第一帧被检出的位置
+    positives = np.flatnonzero(pred)
+    first = np.searchsorted(positives, gt_runs[:, 0])
+    detected = first < len(positives)
+    detected[detected] = positives[first[detected]] <= gt_runs[detected, 1]
+    delays = positives[first[detected]] - gt_runs[detected, 0]
+    return {
+        "total_frames": total,
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "frame_iou": frame_iou(gt_runs, pred_runs),
+        "gt_segments": len(gt_runs),
+        "pred_segments": len(pred_runs),
+        "segment_iou": float(best_iou.mean()) if len(best_iou) else float("nan"),
+        "segments_hit": int(np.count_nonzero(best_iou >= iou_threshold)),
+        "segments_missed": int(np.count_nonzero(~detected)),
+        "mean_delay": float(delays.mean()) if len(delays) else float("nan"),
+    }
+
+
+def evaluate_video(task: tuple) -> dict:
+    """在子进程中评估一个视频
+
+    Args:
+        task: tuple;(视频名, GT 目录, 算法目录, 算法分数阈值, 帧段命中的 IoU 阈值)
+
+    Returns:
+        dict;一行结果, 读取失败时只有 video_name 和 error
+    """
+    stem, gt_folder, alg_folder, threshold, iou_threshold = task
+    # read_curve 按视频文件名查找, 补一个后缀避免视频名中的 "." 被当作后缀去掉
+    gt_curve = read_curve(gt_folder, stem + JSON_EXT)
+    if is_result_file(alg_folder):
+        if alg_folder not in _RESULT_INDEXES:
+            _RESULT_INDEXES[alg_folder] = ResultIndex.load_or_build(alg_folder)
+        alg_curve = _RESULT_INDEXES[alg_folder].curve(stem + JSON_EXT)
+    else:
+        alg_curve = read_curve(alg_folder, stem + JSON_EXT)
+    if gt_curve is None or alg_curve is None:
+        return {"video_name": stem, "error": "GT 文件读取失败" if gt_curve is None else "算法文件读取失败"}
+    result = score_masks(gt_curve > 0.5, alg_curve >= threshold, iou_threshold)
+    result["video_name"] = stem
+    result["error"] = ""
+    return result
+
+
+def summarize(results: pd.DataFrame) -> dict:
+    """汇总所有视频的结果, micro 为累加所有帧后计算, macro 为各视频指标的平均值
+
+    Args:
+        results: pd.DataFrame;每个视频一行的结果
+
+    Returns:
+        dict;汇总指标
+    """
+    valid = results[results["error"] == ""]
+    tp, fp, fn = int(valid["tp"].sum()), int(valid["fp"].sum()), int(valid["fn"].sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    gt_segments = int(valid["gt_segments"].sum())
+    # 各列的平均值自动跳过 nan(没有 GT 帧段的视频)
+    return {
+        "videos": len(results),
+        "failed": int(len(results) - len(valid)),
+        "micro_precision": precision,
+        "micro_recall": recall,
+        "micro_f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "macro_precision": float(valid["precision"].mean()) if len(valid) else 0.0,
+        "macro_recall": float(valid["recall"].mean()) if len(valid) else 0.0,
+        "macro_f1": float(valid["f1"].mean()) if len(valid) else 0.0,
+        "mean_frame_iou": float(valid["frame_iou"].mean()) if len(valid) else 0.0,
+        "mean_segment_iou": float(valid["segment_iou"].mean()) if len(valid) else 0.0,
+        "gt_segments": gt_segments,
+        "segment_hit_rate": int(valid["segments_hit"].sum()) / gt_segments if gt_segments else 0.0,
+        "segment_miss_rate": int(valid["segments_missed"].sum()) / gt_segments if gt_segments else 0.0,
+        "mean_delay": float(valid["mean_delay"].mean()) if valid["mean_delay"].notna().any() else None,
+    }
+
+
+def evaluate_folder(gt_folder: str, alg_folder: str, out_path: Optional[str] = None, workers: int = 0,
+                    threshold: float = 0.5, iou_threshold: float = 0.5,
+                    progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+    """批量评估两个目录
+
+    Args:
+        gt_folder: str;GT 目录
+        alg_folder: str;算法结果目录, 或者合并后的 JSONL 结果文件
+        out_path: str;结果 csv 路径, 汇总写入同名的 .summary.json, 为空时不写文件
+        workers: int;进程数, 0 表示使用 CPU 核数
+        threshold: float;算法分数大于等于该值的帧视为检出
+        iou_threshold: float;帧段命中的 IoU 阈值
+        progress_callback: callable;进度回调, 参数为 (已完成视频数, 总视频数)
+
+    Returns:
+        dict;汇总指标, 包含 missing_alg(没有算法结果的视频数)以及 elapsed(耗时秒)
+    """
+    start = time.perf_counter()
+    stems, missing = pair_files(gt_folder, alg_folder)
+    tasks = [(stem, gt_folder, alg_folder, threshold, iou_threshold) for stem in stems]
+    workers = workers or os.cpu_count() or 1
+    rows = []
+    if tasks:
+        # 单个视频的计算量很小, 按块分发减少进程间通信
+        chunksize = max(1, min(64, len(tasks) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for row in executor.map(evaluate_video, tasks, chunksize=chunksize):
+                rows.append(row)
+                if progress_callback is not None:
+                    progress_callback(len(rows), len(tasks))
+    results = pd.DataFrame(rows, columns=list(RESULT_COLUMNS))
+    results["error"] = results["error"].fillna("")
+    summary = summarize(results)
+    summary["missing_alg"] = len(missing)
+    summary["elapsed"] = round(time.perf_counter() - start, 2)
+    if out_path:
+        folder = os.path.dirname(os.path.abspath(out_path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        results.to_csv(out_path, index=False)
+        with open(os.path.splitext(out_path)[0] + ".summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    """汇总指标的文字描述"""
+    delay = summary["mean_delay"]
+    return (f"视频数: {summary['videos']}  失败: {summary['failed']}  缺少算法结果: {summary['missing_alg']}\n"
+            f"帧级别 micro P/R/F1: {summary['micro_precision']:.4f} / {summary['micro_recall']:.4f} / "
+            f"{summary['micro_f1']:.4f}\n"
+            f"帧级别 macro P/R/F1: {summary['macro_precision']:.4f} / {summary['macro_recall']:.4f} / "
+            f"{summary['macro_f1']:.4f}\n"
+            f"帧 IoU: {summary['mean_frame_iou']:.4f}  帧段 IoU: {summary['mean_segment_iou']:.4f}\n"
+            f"GT 帧段: {summary['gt_segments']}  命中率: {summary['segment_hit_rate']:.4f}  "
+            f"漏检率: {summary['segment_miss_rate']:.4f}\n"
+            f"平均检测延迟: {'-' if delay is None else f'{delay:.2f} 帧'}  耗时: {summary['elapsed']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="算法结果与 GT 的批量评估")
+    parser.add_argument("--gt", required=True, help="GT 目录")
+    parser.add_argument("--alg", required=True, help="算法结果目录或者 JSONL 结果文件")
+    parser.add_argument("--out", default="evaluate_results.csv", help="结果 csv 路径")
+    parser.add_argument("--workers", type=int, default=0, help="进程数, 0 表示使用 CPU 核数")
+    parser.add_argument("--threshold", type=float, default=0.5, help="算法分数阈值")
+    parser.add_argument("--iou", type=float, default=0.5, help="帧段命中的 IoU 阈值")
+    args = parser.parse_args()
+    summary = evaluate_folder(args.gt, args.alg, args.out, workers=args.workers, threshold=args.threshold,
+                              iou_threshold=args.iou)
+    print(format_summary(summary))
+    print(f"结果已保存: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+""" 标注数据导出;
+从数据库分批读取(数据库游标按批取数), 每批追加写入 CSV 或者 Parquet 文件, 内存中最多只有一批数据,
+导出过程中写入临时文件, 完成后再替换为目标文件;
+在项目根目录下运行:
+    python -m core.export --format csv --out result.csv
+"""
+import os
+import csv
+import argparse
+import threading
+from datetime import date
+from typing import Callable, Optional
+
+from core.config import Config
+from core.models import BaseDBOperateModel, VideoInfo
+
+try:
+    # Parquet 导出为可选功能, 需要 pip install pyarrow
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+
+def arrow_type(column):
+    """数据库字段类型 -> Parquet 字段类型, 整批都为空时也能确定类型"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = str
+    if python_type is bool:
+        return pyarrow.bool_()
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is float:
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def default_export_path(folder: str, fmt: str = "csv") -> str:
+    """按日期命名的导出文件, 例: result_20250101.csv"""
+    return os.path.join(folder, f"result_{date.today().strftime('%Y%m%d')}.{fmt}")
+
+
+def export_table(db_query, out_path: str, fmt: str = "csv", filters: set = None, columns: list = None,
+                 order: str = "+id", batch_size: int = 1000,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event: Optional[threading.Event] = None) -> int:
+    """分批导出一个表
+
+    Args:
+        db_query: Query;数据库session绑定了查询数据库模型的查询类
+        out_path: str;导出文件路径
+        fmt: str;csv 或者 parquet
+        filters: set;过滤条件
+        columns: list;导出的字段名, 为空时导出全部字段
+        order: str;排序规则，例："+id,-create_time"
+        batch_size: int;每批的条数
+        progress_callback: callable;进度回调, 参数为 (已导出条数, 总条数)
+        cancel_event: threading.Event;置位后停止导出, 不生成目标文件
+
+    Returns:
+        int;导出的条数, 取消时返回 -1
+
+    Raises:
+        ValueError;不支持的导出格式
+        RuntimeError;导出 Parquet 但是没有安装 pyarrow
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if fmt == "parquet" and pyarrow is None:
+        raise RuntimeError("导出 Parquet 需要安装 pyarrow: pip install pyarrow")
+    filters = filters or set()
+    total = BaseDBOperateModel.count(db_query, filters)
+    folder = os.path.dirname(os.path.abspath(out_path))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    tmp_path = f"{out_path}.{os.getpid()}_{threading.get_ident()}.tmp"
+    statement, names = BaseDBOperateModel.select_statement(db_query, filters, columns, order)
+    done = 0
+    cancelled = False
+    # 表头与表结构在读取数据之前确定, 没有数据时也生成只有表头的文件
+    if fmt == "csv":
+        f = open(tmp_path, "w", encoding="utf-8", newline="")
+        writer = csv.writer(f)
+        writer.writerow(names)
+    else:
+        schema = pyarrow.schema([(column.name, arrow_type(column)) for column in statement.selected_columns])
+        writer = pyarrow.parquet.ParquetWriter(tmp_path, schema)
+    completed = False
+    try:
+        for names, rows in BaseDBOperateModel.iter_rows(db_query, filters, columns, order, batch_size):
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                writer.write_table(pyarrow.Table.from_pylist([dict(zip(names, row)) for row in rows], schema=schema))
+            done += len(rows)
+            if progress_callback is not None:
+                progress_callback(done, max(done, total))
+        completed = True
+    finally:
+        if fmt == "csv":
+            f.close()
+        else:
+            writer.close()
+        # 取消或者出错时不保留写了一半的临时文件
+        if not completed or cancelled:
+            os.remove(tmp_path)
+    if cancelled:
+        return -1
+    os.replace(tmp_path, out_path)
+    if progress_callback is not None:
+        progress_callback(done, done)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出标注数据")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="导出格式")
+    parser.add_argument("--out", default=None, help="导出文件路径, 默认为当前目录下按日期命名的文件")
+    parser.add_argument("--batch", type=int, default=1000, help="每批读取的条数")
+    args = parser.parse_args()
+    out_path = args.out or default_export_path(".", args.format)
+    session = Config.SESSION()
+    try:
+        count = export_table(session.query(VideoInfo), out_path, args.format, batch_size=args.batch,
+                             progress_callback=lambda done, total: print(f"\r{done}/{total}", end=""))
+    finally:
+        session.close()
+    print(f"\n导出 {count} 条: {out_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+""" 视频帧展开成为图片缓存;
+"""
+import os
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+
+from core.proxy import ProxyWriter, proxy_shape
+from core.seek_index import SeekIndex
+
+
+def frame_file_name(frame_idx: int) -> str:
+    """缓存目录中帧图片的文件名
+
+    Args:
+        frame_idx: int;帧号
+
+    Returns:
+        str;例: frame_0001.jpg
+    """
+    return f"frame_{frame_idx:04d}.jpg"
+
+
+def extract_frames(video_path: str, result_folder: str,
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event: Optional[threading.Event] = None,
+                   progress_step: int = 10,
+                   proxy_size: Optional[Tuple[int, int]] = None,
+                   frame_count: Optional[int] = None,
+                   proxy_max_mb: int = 0) -> int:
+    """顺序解码视频并将每一帧保存为 jpg
+
+    Args:
+        video_path: str;视频路径
+        result_folder: str;帧图片的保存目录
+        progress_callback: callable;进度回调, 参数为 (已完成帧数, 总帧数)
+        cancel_event: threading.Event;置位后停止展开
+        progress_step: int;每展开多少帧回调一次进度
+        proxy_size: tuple;显示区域的 (宽, 高), 设置后同时生成拖动预览的 proxy 文件
+        frame_count: int;探测得到的精确帧数, 为空时使用容器声明的 CAP_PROP_FRAME_COUNT
+        proxy_max_mb: int;proxy 文件的大小上限(MB), 超出时不生成 proxy, 0 表示不限制
+
+    Returns:
+        int;成功写入的帧数, 帧号 0 ~ 返回值-1 的图片都已完整写入
+    """
+    if not os.path.exists(result_folder):
+        os.makedirs(result_folder)
+    cap = cv2.VideoCapture(video_path)
+    if not frame_count:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    proxy_writer = None
+    if proxy_size is not None and frame_count > 0:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        proxy_writer = ProxyWriter.create(result_folder, frame_count, proxy_shape(width, height, proxy_size),
+                                          proxy_max_mb)
+    done = 0
+    try:
+        for i in range(frame_count):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_path = os.path.join(result_folder, frame_file_name(i))
+            # 只缺 proxy 时重新展开, 已经存在的图片不再重复编码
+            if not os.path.exists(frame_path):
+                cv2.imwrite(frame_path, frame)
+            if proxy_writer is not None:
+                proxy_writer.write(i, frame)
+            done = i + 1
+            if progress_callback is not None and (done % progress_step == 0 or done == frame_count):
+                progress_callback(done, frame_count)
+    finally:
+        cap.release()
+        if proxy_writer is not None:
+            # 取消时丢弃 proxy; 视频实际帧数少于声明帧数时, 末尾缺失的帧保持黑色
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            proxy_writer.close(complete=done > 0 and not cancelled)
+    if progress_callback is not None and done != frame_count:
+        progress_callback(done, frame_count)
+    return done
+
+
+def split_ranges(seek_index: SeekIndex, chunks: int) -> List[Tuple[int, int]]:
+    """将帧范围切分成若干段, 每段都从关键帧开始, 可以独立解码
+
+    Args:
+        seek_index: SeekIndex;帧定位索引
+        chunks: int;期望的段数
+
+    Returns:
+        list;[(起始帧, 结束帧(不包含)), ...]
+    """
+    frame_count = seek_index.frame_count
+    step = max(1, math.ceil(frame_count / max(1, chunks)))
+    starts = sorted({seek_index.keyframe_before(i) for i in range(0, frame_count, step)} | {0})
+    return [(start, stop) for start, stop in zip(starts, starts[1:] + [frame_count]) if start < stop]
+
+
+def extract_range(video_path: str, result_folder: str, start: int, stop: int, with_proxy: bool = False,
+                  cancel_path: Optional[str] = None) -> int:
+    """解码并保存一段帧, 在子进程中运行, 每个进程使用自己的 VideoCapture
+
+    Args:
+        video_path: str;视频路径
+        result_folder: str;帧图片的保存目录
+        start: int;起始帧(关键帧)
+        stop: int;结束帧(不包含)
+        with_proxy: bool;是否写入主进程创建好的临时 proxy 文件
+        cancel_path: str;取消标记文件, 主进程取消时创建, 每一帧之前检查, 存在时立即停止
+
+    Returns:
+        int;成功写入的帧数
+    """
+    cap = cv2.VideoCapture(video_path)
+    proxy_writer = ProxyWriter.attach(result_folder) if with_proxy else None
+    done = 0
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for i in range(start, stop):
+            if cancel_path is not None and os.path.exists(cancel_path):
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_path = os.path.join(result_folder, frame_file_name(i))
+            if not os.path.exists(frame_path):
+                cv2.imwrite(frame_path, frame)
+            if proxy_writer is not None:
+                proxy_writer.write(i, frame)
+            done += 1
+    finally:
+        cap.release()
+        if proxy_writer is not None:
+            proxy_writer.flush()
+    return done
+
+
+def extract_frames_parallel(video_path: str, result_folder: str, workers: int = 0,
+                            progress_callback: Optional[Callable[[int, int], None]] = None,
+                            cancel_event: Optional[threading.Event] = None,
+                            proxy_size: Optional[Tuple[int, int]] = None,
+                            executor: Optional[ProcessPoolExecutor] = None,
+                            proxy_max_mb: int = 0) -> int:
+    """多进程展开视频帧, 帧范围按关键帧切分, 输出与 extract_frames 的编号完全一致
+
+    Args:
+        video_path: str;视频路径
+        result_folder: str;帧图片的保存目录
+        workers: int;进程数, 0 表示使用 CPU 核数
+        progress_callback: callable;进度回调, 参数为 (从第 0 帧开始连续完成的帧数, 总帧数)
+        cancel_event: threading.Event;置位后不再启动新的分段, 已经开始的分段在当前帧写完后停止
+        proxy_size: tuple;显示区域的 (宽, 高), 设置后同时生成 proxy 文件
+        executor: ProcessPoolExecutor;外部传入的进程池, 不传时临时创建
+        proxy_max_mb: int;proxy 文件的大小上限(MB), 超出时不生成 proxy, 0 表示不限制
+
+    Returns:
+        int;从第 0 帧开始连续写入完成的帧数
+    """
+    if not os.path.exists(result_folder):
+        os.makedirs(result_folder)
+    workers = workers or os.cpu_count() or 1
+    seek_index = SeekIndex.load_or_build(video_path, result_folder)
+    frame_count = seek_index.frame_count
+    if frame_count == 0:
+        return 0
+    # 分段数多于进程数, 取消时可以更快停止, 也能平衡各段的耗时
+    ranges = split_ranges(seek_index, workers * 4)
+    proxy_writer = None
+    if proxy_size is not None:
+        cap = cv2.VideoCapture(video_path)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+        proxy_writer = ProxyWriter.create(result_folder, frame_count, proxy_shape(width, height, proxy_size),
+                                          proxy_max_mb)
+        if proxy_writer is not None:
+            proxy_writer.flush()
+
+    # threading.Event 不能传给子进程, 取消时创建标记文件, 子进程每一帧检查
+    cancel_path = os.path.join(result_folder, f".cancel_{os.getpid()}_{threading.get_ident()}")
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    finished = {}
+    try:
+        futures = {pool.submit(extract_range, video_path, result_folder, start, stop, proxy_writer is not None,
+                               cancel_path): (start, stop) for start, stop in ranges}
+        pending = set(futures)
+        while pending:
+            # 定时检查取消, 不等待某个分段完成
+            done_futures, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done_futures:
+                if future.cancelled():
+                    continue
+                start, stop = futures[future]
+                finished[start] = (stop, future.result())
+            if cancel_event is not None and cancel_event.is_set() and not os.path.exists(cancel_path):
+                open(cancel_path, "w").close()
+                for f in pending:
+                    f.cancel()
+            if done_futures and progress_callback is not None:
+                progress_callback(_contiguous_done(finished), frame_count)
+    finally:
+        if executor is None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if os.path.exists(cancel_path):
+            os.remove(cancel_path)
+    done = _contiguous_done(finished)
+    if proxy_writer is not None:
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        proxy_writer.close(complete=done == frame_count and not cancelled)
+    return done
+
+
+def _contiguous_done(finished: dict) -> int:
+    """计算从第 0 帧开始连续完成的帧数
+
+    Args:
+        finished: dict;起始帧 -> (结束帧, 写入帧数)
+    """
+    done = 0
+    while done in finished:
+        stop, count = finished[done]
+        if done + count < stop:
+            # 该段提前结束(视频实际帧数少于索引), 后续的帧不连续
+            return done + count
+        done = stop
+    return done
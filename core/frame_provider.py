@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+""" 视频帧按需解码;
+show_frame 需要哪一帧才解码哪一帧, 最近访问的帧保存在有内存上限的 LRU 缓存中;
+后台已经展开到缓存目录的帧直接读取图片, 其余的帧从视频中解码;
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from core.frame_extract import frame_file_name
+from core.seek_index import SeekIndex
+from utils.timer import LatencyStats
+
+
+class FrameLRUCache(object):
+    """ 按内存预算淘汰的帧缓存;
+    """
+
+    def __init__(self, budget_bytes: int):
+        """
+        Args:
+            budget_bytes: int;缓存可以占用的最大字节数
+        """
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, frame_idx: int) -> Optional[np.ndarray]:
+        """获取缓存的帧, 命中后移动到队尾
+
+        Args:
+            frame_idx: int;帧号
+
+        Returns:
+            np.ndarray;未命中返回 None
+        """
+        with self._lock:
+            frame = self._frames.get(frame_idx)
+            if frame is not None:
+                self._frames.move_to_end(frame_idx)
+            return frame
+
+    def put(self, frame_idx: int, frame: np.ndarray) -> None:
+        """写入一帧, 超出预算时从最久未使用的帧开始淘汰
+
+        Args:
+            frame_idx: int;帧号
+            frame: np.ndarray;解码后的帧
+        """
+        if frame.nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._frames.pop(frame_idx, None)
+            if old is not None:
+                self.used_bytes -= old.nbytes
+            self._frames[frame_idx] = frame
+            self.used_bytes += frame.nbytes
+            while self.used_bytes > self.budget_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._frames.clear()
+            self.used_bytes = 0
+
+    def __contains__(self, frame_idx: int) -> bool:
+        return frame_idx in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class FrameProvider(object):
+    """ 视频帧提供者, 负责打开视频并按帧号返回 BGR 格式的 numpy 数组;
+    """
+
+    def __init__(self, video_path: str, budget_mb: int = 512, cache_folder: Optional[str] = None):
+        """
+        Args:
+            video_path: str;视频路径
+            budget_mb: int;帧缓存的内存预算(MB)
+            cache_folder: str;帧图片的缓存目录, 已展开的帧直接读取图片
+        """
+        self.video_path = video_path
+        self.cache_folder = cache_folder
+        # 缓存目录中已经完整写入的帧数, 由后台展开线程更新
+        self.extracted = 0
+        self.cache = FrameLRUCache(budget_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._cap = cv2.VideoCapture(video_path)
+        if not self._cap.isOpened():
+            raise IOError(f"视频无法打开: {video_path}")
+        self.frame_count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # 解码器下一次 read 返回的帧号, 顺序访问时不需要 seek
+        self._next_idx = 0
+        # 帧定位索引, 设置后跳转只从前一个关键帧开始解码
+        self.seek_index = None
+        # 稀疏缓存: 目录、缓存序号 -> 原始帧号的映射以及已经展开的数量
+        self.sparse_folder = None
+        self.frame_map = None
+        self.sparse_extracted = 0
+        # 非顺序访问(跳转)的解码耗时
+        self.jump_stats = LatencyStats("jump")
+
+    def set_seek_index(self, seek_index: SeekIndex) -> None:
+        """设置帧定位索引, 索引中的帧数是遍历得到的精确值
+
+        Args:
+            seek_index: SeekIndex;帧定位索引
+        """
+        self.seek_index = seek_index
+        if seek_index.frame_count > 0:
+            self.frame_count = seek_index.frame_count
+
+    def set_sparse(self, folder: str, frame_map) -> None:
+        """设置稀疏缓存, 已经展开的帧直接读取稀疏缓存中的图片
+
+        Args:
+            folder: str;稀疏缓存目录
+            frame_map: SparseFrameMap;缓存序号 -> 原始帧号的映射
+        """
+        self.sparse_folder = folder
+        self.frame_map = frame_map
+        self.sparse_extracted = len(frame_map) if frame_map.complete else 0
+
+    def get_frame(self, frame_idx: int) -> Optional[np.ndarray]:
+        """获取指定帧
+
+        Args:
+            frame_idx: int;帧号
+
+        Returns:
+            np.ndarray;BGR 帧数据, 解码失败返回 None
+        """
+        if not 0 <= frame_idx < self.frame_count:
+            return None
+        frame = self.cache.get(frame_idx)
+        if frame is not None:
+            return frame
+        if self.cache_folder and frame_idx < self.extracted:
+            frame = cv2.imread(os.path.join(self.cache_folder, frame_file_name(frame_idx)))
+        elif self.frame_map is not None:
+            cache_idx = self.frame_map.index_of(frame_idx)
+            if 0 <= cache_idx < self.sparse_extracted:
+                frame = cv2.imread(os.path.join(self.sparse_folder, frame_file_name(cache_idx)))
+        if frame is None:
+            with self._lock:
+                frame = self._decode(frame_idx)
+        if frame is not None:
+            self.cache.put(frame_idx, frame)
+        return frame
+
+    def skip_frame(self, frame_idx: int) -> bool:
+        """顺序播放时跳过一帧: 解码器正好位于该帧时只 grab(不转换不返回), 已经缓存的帧不需要处理
+
+        Args:
+            frame_idx: int;帧号
+
+        Returns:
+            bool;视频已经结束返回 False
+        """
+        if not 0 <= frame_idx < self.frame_count:
+            return False
+        with self._lock:
+            if self._cap is None or frame_idx != self._next_idx:
+                return True
+            if not self._cap.grab():
+                self._next_idx = -1
+                return False
+            self._next_idx = frame_idx + 1
+        return True
+
+    def _decode(self, frame_idx: int) -> Optional[np.ndarray]:
+        """从视频中解码指定帧, 调用方需要持有锁"""
+        if self._cap is None:
+            return None
+        if frame_idx == self._next_idx:
+            ret, frame = self._cap.read()
+        else:
+            start_time = time.perf_counter()
+            ret, frame = self._seek_read(frame_idx)
+            self.jump_stats.add((time.perf_counter() - start_time) * 1000)
+        if not ret:
+            # 位置未知, 下一次强制 seek
+            self._next_idx = -1
+            return None
+        self._next_idx = frame_idx + 1
+        return frame
+
+    def _seek_read(self, frame_idx: int):
+        """跳转到指定帧并解码, 有索引时从前一个关键帧开始顺序 grab"""
+        if self.seek_index is None or not self.seek_index.has_keyframes:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            return self._cap.read()
+        start = self.seek_index.keyframe_before(frame_idx)
+        # 当前解码位置位于关键帧与目标帧之间时, 直接向后解码更快
+        if not start <= self._next_idx < frame_idx:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            self._next_idx = start
+        for _ in range(frame_idx - self._next_idx):
+            if not self._cap.grab():
+                return False, None
+        return self._cap.read()
+
+    def release(self) -> None:
+        """释放视频句柄以及缓存"""
+        with self._lock:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+        self.cache.clear()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+""" GT 文件的紧凑存储格式;
+原来的 GT json 中 y_li 逐帧保存 0/1, 每帧约 10 个字节; 新格式只保存标注区间(起止帧, 包含两端)以及总帧数,
+需要逐帧掩码时再展开成 numpy 数组;
+    - 文本格式 <视频名>.json: {"video_name", "total_frames", "section_frames", "runs": [[43, 136], ...]}
+    - 二进制格式 <视频名>.gtb: 文件头 + int32 的区间数组
+读取时兼容原来带 y_li 的 json 文件;
+转换已有文件: python -m core.gt_format D:/gt_json [--binary] [--out D:/gt_rle]
+"""
+import os
+import json
+import struct
+import argparse
+from typing import Optional
+
+import numpy as np
+
+from core.intervals import as_runs, from_mask, rasterize
+
+GT_MAGIC = b"GTRL"
+GT_VERSION = 2
+# magic, version, total_frames, 区间数, 视频名字节数, section_frames 字节数
+GT_HEADER = struct.Struct("<4sBIIII")
+# 各版本的文件头, 第 1 版的名称与帧段长度为 16 位, 帧段很多时会溢出
+GT_HEADERS = {1: struct.Struct("<4sBIIHH"), GT_VERSION: GT_HEADER}
+JSON_EXT = ".json"
+BINARY_EXT = ".gtb"
+
+
+class GroundTruth(object):
+    """ 一个视频的 GT 标注;
+    """
+
+    def __init__(self, video_name: str, total_frames: int, runs, section_frames: str = ""):
+        """
+        Args:
+            video_name: str;视频名称
+            total_frames: int;总帧数
+            runs: 序列;[起始帧, 结束帧(包含)] 列表
+            section_frames: str;标注时输入的帧段, 例: "43-136,200-250"
+        """
+        self.video_name = video_name
+        self.total_frames = int(total_frames)
+        self.runs = as_runs(runs)
+        self.section_frames = section_frames or ""
+        self._mask = None
+
+    @classmethod
+    def from_mask(cls, video_name: str, mask, section_frames: str = "") -> "GroundTruth":
+        """由逐帧掩码构建"""
+        return cls(video_name, len(mask), from_mask(mask), section_frames)
+
+    def mask(self) -> np.ndarray:
+        """展开为逐帧掩码, 第一次调用时计算"""
+        if self._mask is None:
+            self._mask = rasterize(self.runs, self.total_frames)
+        return self._mask
+
+    def to_dict(self) -> dict:
+        return {
+            "video_name": self.video_name,
+            "total_frames": self.total_frames,
+            "section_frames": self.section_frames,
+            "runs": self.runs.tolist(),
+        }
+
+    def save(self, folder: str, binary: bool = False, stem: Optional[str] = None) -> str:
+        """保存到目录, 同名的另一种格式文件会被删除, 避免读到旧数据
+
+        Args:
+            folder: str;保存目录
+            binary: bool;是否保存为二进制格式
+            stem: str;文件名(不含后缀), 默认为视频名去掉后缀
+
+        Returns:
+            str;文件路径
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        stem = os.path.join(folder, stem or os.path.splitext(self.video_name)[0])
+        path, other = (stem + BINARY_EXT, stem + JSON_EXT) if binary else (stem + JSON_EXT, stem + BINARY_EXT)
+        if binary:
+            name = self.video_name.encode("utf-8")
+            section = self.section_frames.encode("utf-8")
+            with open(path, "wb") as f:
+                f.write(GT_HEADER.pack(GT_MAGIC, GT_VERSION, self.total_frames, len(self.runs), len(name),
+                                       len(section)))
+                f.write(name)
+                f.write(section)
+                f.write(self.runs.astype("<i4").tobytes())
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+        if os.path.exists(other):
+            os.remove(other)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "GroundTruth":
+        """读取 GT 文件, 支持二进制格式、区间 json 以及原来带 y_li 的 json
+
+        Args:
+            path: str;文件路径
+
+        Returns:
+            GroundTruth;
+
+        Raises:
+            ValueError;文件格式不正确
+        """
+        if path.endswith(BINARY_EXT):
+            with open(path, "rb") as f:
+                data = f.read()
+            header = GT_HEADERS.get(data[4]) if len(data) > 4 and data[0:4] == GT_MAGIC else None
+            if header is None or len(data) < header.size:
+                raise ValueError(f"GT 文件格式错误: {path}")
+            magic, version, total_frames, n_runs, name_len, section_len = header.unpack_from(data)
+            offset = header.size
+            name = data[offset:offset + name_len].decode("utf-8")
+            offset += name_len
+            section = data[offset:offset + section_len].decode("utf-8")
+            offset += section_len
+            runs = np.frombuffer(data, dtype="<i4", count=n_runs * 2, offset=offset).reshape(-1, 2)
+            return cls(name, total_frames, runs, section)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "runs" in data:
+            return cls(data.get("video_name", ""), data["total_frames"], data["runs"], data.get("section_frames"))
+        if "y_li" in data:
+            gt = cls.from_mask(data.get("video_name", ""), data["y_li"], data.get("section_frames"))
+            # 以文件中记录的总帧数为准
+            gt.total_frames = int(data.get("total_frames", gt.total_frames))
+            return gt
+        raise ValueError(f"GT 文件格式错误: {path}")
+
+
+def find_gt_file(folder: str, video_name: str) -> Optional[str]:
+    """查找视频对应的 GT 文件, 优先使用二进制格式
+
+    Args:
+        folder: str;GT 目录
+        video_name: str;视频文件名
+
+    Returns:
+        str;文件不存在返回 None
+    """
+    stem = os.path.join(folder, os.path.splitext(video_name)[0])
+    for ext in (BINARY_EXT, JSON_EXT):
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return None
+
+
+def convert_folder(folder: str, out_folder: Optional[str] = None, binary: bool = False) -> int:
+    """批量将原来带 y_li 的 GT json 转换为区间格式
+
+    Args:
+        folder: str;原 GT 目录
+        out_folder: str;输出目录, 默认原地替换
+        binary: bool;是否转换为二进制格式
+
+    Returns:
+        int;转换的文件数
+    """
+    out_folder = out_folder or folder
+    converted = 0
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(JSON_EXT):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            gt = GroundTruth.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"跳过 {name}: {e}")
+            continue
+        gt.video_name = gt.video_name or name
+        before = os.path.getsize(path)
+        # 文件名与原文件保持一致, 原地转换为二进制时会删除原 json
+        out_path = gt.save(out_folder, binary=binary, stem=os.path.splitext(name)[0])
+        converted += 1
+        print(f"{name}: {before} -> {os.path.getsize(out_path)} bytes")
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GT json 转换为区间格式")
+    parser.add_argument("folder", help="GT json 目录")
+    parser.add_argument("--out", default=None, help="输出目录, 默认原地替换")
+    parser.add_argument("--binary", action="store_true", help="转换为二进制格式(.gtb)")
+    args = parser.parse_args()
+    print(f"转换完成 {convert_folder(args.folder, args.out, args.binary)} 个文件")
+
+
+if __name__ == '__main__':
+    main()
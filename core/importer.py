@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+""" 标注数据导入;
+将已有的 GT 文件(gt_json 目录, 支持二进制、区间 json 以及原来带 y_li 的 json)或者导出的 CSV 文件批量写入数据库,
+按 video_name 插入或者更新, 全部数据在一个事务中提交;
+在项目根目录下运行:
+    python -m core.importer gt qt_core/temp/gt_json
+    python -m core.importer csv result_20250101.csv
+"""
+import os
+import csv
+import time
+import argparse
+from typing import Iterator
+
+from core.config import Config
+from core.db import write_with_retry
+from core.gt_format import GroundTruth, JSON_EXT, BINARY_EXT
+from core.intervals import format_sections
+from core.models import BaseDBOperateModel, VideoInfo
+
+
+def iter_gt_folder(folder: str) -> Iterator[dict]:
+    """读取 GT 目录, 每个文件生成一条 {video_name, section_frames}, 无法读取的文件跳过
+
+    Args:
+        folder: str;GT 目录
+
+    Yields:
+        dict;
+    """
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith((JSON_EXT, BINARY_EXT)):
+            continue
+        try:
+            gt = GroundTruth.load(os.path.join(folder, name))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"跳过 {name}: {e}")
+            continue
+        yield {
+            "video_name": gt.video_name or os.path.splitext(name)[0],
+            # 原来带 y_li 的文件可能没有记录输入的帧段, 由区间生成
+            "section_frames": gt.section_frames or format_sections(gt.runs),
+        }
+
+
+def iter_csv(path: str) -> Iterator[dict]:
+    """读取导出的 CSV 文件, 只保留 VideoInfo 中除 id 以外的字段, 空字符串视为空值
+
+    Args:
+        path: str;CSV 文件路径
+
+    Yields:
+        dict;
+    """
+    columns = {column.name: column for column in VideoInfo.__table__.columns if column.name != "id"}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        if "video_name" not in (reader.fieldnames or []):
+            raise ValueError(f"CSV 文件缺少 video_name 列: {path}")
+        names = [name for name in reader.fieldnames if name in columns]
+        # 整数字段在 CSV 中为文本, 按字段确定一次转换方式
+        integer = {name for name in names if columns[name].type.python_type is int}
+        for row in reader:
+            if not row["video_name"]:
+                continue
+            yield {name: (int(float(row[name])) if name in integer else row[name]) if row[name] not in ("", None) else None
+                   for name in names}
+
+
+def import_rows(session_factory, rows: list, batch_size: int = 500) -> int:
+    """批量写入数据库, 全部写入后一次提交; 数据库被其他人锁定时回滚并重试整个事务
+
+    Args:
+        session_factory: callable;返回数据库会话, 例如 Config.SESSION
+        rows: list;dict 数据
+        batch_size: int;每条语句的最大条数
+
+    Returns:
+        int;写入的条数
+    """
+    return write_with_retry(session_factory,
+                            lambda session: BaseDBOperateModel.upsert_all(session, VideoInfo, rows,
+                                                                          batch_size=batch_size),
+                            retries=Config.DB_WRITE_RETRIES, delay=Config.DB_RETRY_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入标注数据")
+    parser.add_argument("source", choices=("gt", "csv"), help="gt: GT 目录, csv: 导出的 CSV 文件")
+    parser.add_argument("path", help="GT 目录或者 CSV 文件路径")
+    parser.add_argument("--batch", type=int, default=500, help="每条语句的最大条数")
+    args = parser.parse_args()
+    # 重试时需要重新写入全部数据, 先读取到内存中
+    rows = list(iter_gt_folder(args.path) if args.source == "gt" else iter_csv(args.path))
+    start = time.perf_counter()
+    count = import_rows(Config.SESSION, rows, args.batch)
+    cost = time.perf_counter() - start
+    print(f"导入 {count} 条, 耗时 {cost:.2f}s, {count / cost if cost else 0:.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
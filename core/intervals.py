@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+""" 帧区间运算;
+区间统一表示为形状 (n, 2) 的 int64 数组, 每行为 [起始帧, 结束帧(包含)], 与标注时输入的 "43-136" 一致;
+除 parse_sections 外, 各函数的输入可以是任意顺序、可以重叠的区间, 输出都是排好序且互不相邻的区间;
+"""
+import re
+from typing import Iterable
+
+import numpy as np
+
+# 帧段之间的分隔符, 界面中每行一个帧段, 数据库中用逗号分隔
+SECTION_SEP = re.compile(r"[,\n，]")
+SECTION_PATTERN = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$")
+
+
+def empty() -> np.ndarray:
+    """空区间"""
+    return np.empty((0, 2), dtype=np.int64)
+
+
+def as_runs(runs) -> np.ndarray:
+    """转换为 (n, 2) 的 int64 数组"""
+    return np.asarray(runs, dtype=np.int64).reshape(-1, 2)
+
+
+def parse_sections(text: str) -> np.ndarray:
+    """解析帧段字符串, 例: "43-136,200-250", 单独的数字表示只有一帧的帧段
+
+    Args:
+        text: str;帧段字符串, 逗号或者换行分隔
+
+    Returns:
+        np.ndarray;合并后的区间
+
+    Raises:
+        ValueError;帧段格式错误或者起始帧大于结束帧
+    """
+    runs = []
+    for item in SECTION_SEP.split(text or ""):
+        if not item.strip():
+            continue
+        matched = SECTION_PATTERN.match(item)
+        if matched is None:
+            raise ValueError(f"帧段格式错误: {item.strip()}")
+        start = int(matched.group(1))
+        stop = int(matched.group(2)) if matched.group(2) is not None else start
+        if start > stop:
+            raise ValueError(f"帧段起始帧大于结束帧: {item.strip()}")
+        runs.append((start, stop))
+    return merge(runs)
+
+
+def format_sections(runs, sep: str = ",") -> str:
+    """区间 -> 帧段字符串
+
+    Args:
+        runs: 序列;区间
+        sep: str;分隔符
+
+    Returns:
+        str;例: "43-136,200-250"
+    """
+    return sep.join(f"{start}-{stop}" for start, stop in as_runs(runs).tolist())
+
+
+def merge(runs) -> np.ndarray:
+    """排序并合并重叠以及首尾相接的区间
+
+    Args:
+        runs: 序列;区间
+
+    Returns:
+        np.ndarray;合并后的区间
+    """
+    runs = as_runs(runs)
+    if len(runs) == 0:
+        return empty()
+    runs = runs[np.argsort(runs[:, 0], kind="stable")]
+    # 当前区间的起始帧超过前面所有区间的最大结束帧 + 1 时开始一个新区间
+    reach = np.maximum.accumulate(runs[:, 1])
+    new_group = np.concatenate(([True], runs[1:, 0] > reach[:-1] + 1))
+    group_start = np.flatnonzero(new_group)
+    group_stop = np.concatenate((group_start[1:], [len(runs)])) - 1
+    return np.column_stack([runs[group_start, 0], reach[group_stop]])
+
+
+def length(runs) -> int:
+    """区间覆盖的帧数"""
+    runs = merge(runs)
+    return int((runs[:, 1] - runs[:, 0] + 1).sum())
+
+
+def clip(runs, total_frames: int) -> np.ndarray:
+    """截断到 [0, total_frames) 范围内
+
+    Args:
+        runs: 序列;区间
+        total_frames: int;总帧数
+
+    Returns:
+        np.ndarray;截断后的区间, 完全超出范围的区间被丢弃
+    """
+    runs = merge(runs)
+    runs = np.column_stack([np.maximum(runs[:, 0], 0), np.minimum(runs[:, 1], total_frames - 1)])
+    return runs[runs[:, 0] <= runs[:, 1]]
+
+
+def union(*groups: Iterable) -> np.ndarray:
+    """多组区间的并集"""
+    return merge(np.concatenate([as_runs(runs) for runs in groups]) if groups else empty())
+
+
+def intersection(a, b) -> np.ndarray:
+    """两组区间的交集
+
+    Args:
+        a: 序列;区间
+        b: 序列;区间
+
+    Returns:
+        np.ndarray;交集区间
+    """
+    a, b = merge(a), merge(b)
+    if len(a) == 0 or len(b) == 0:
+        return empty()
+    # 两组区间各自不重叠, 对 a 的每个区间二分查找 b 中可能相交的区间范围
+    first = np.searchsorted(b[:, 1], a[:, 0], side="left")
+    last = np.searchsorted(b[:, 0], a[:, 1], side="right")
+    counts = np.maximum(last - first, 0)
+    a_idx = np.repeat(np.arange(len(a)), counts)
+    b_idx = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = np.maximum(a[a_idx, 0], b[b_idx, 0])
+    stops = np.minimum(a[a_idx, 1], b[b_idx, 1])
+    keep = starts <= stops
+    return np.column_stack([starts[keep], stops[keep]])
+
+
+def complement(runs, total_frames: int) -> np.ndarray:
+    """[0, total_frames) 范围内不属于区间的部分"""
+    runs = clip(runs, total_frames)
+    starts = np.concatenate(([0], runs[:, 1] + 1))
+    stops = np.concatenate((runs[:, 0] - 1, [total_frames - 1]))
+    keep = starts <= stops
+    return np.column_stack([starts[keep], stops[keep]])
+
+
+def difference(a, b) -> np.ndarray:
+    """属于 a 但不属于 b 的区间"""
+    a, b = merge(a), merge(b)
+    if len(a) == 0 or len(b) == 0:
+        return a
+    # 只需要在 a 覆盖的范围内取 b 的补集
+    total_frames = int(max(a[-1, 1], b[-1, 1])) + 1
+    return intersection(a, complement(b, total_frames))
+
+
+def rasterize(runs, total_frames: int) -> np.ndarray:
+    """区间 -> 逐帧掩码, 超出 [0, total_frames) 的部分被截断
+
+    Args:
+        runs: 序列;区间
+        total_frames: int;总帧数
+
+    Returns:
+        np.ndarray;uint8 数组, 区间内的帧为 1
+    """
+    delta = np.zeros(total_frames + 1, dtype=np.int32)
+    runs = clip(runs, total_frames)
+    # 合并后的区间互不重叠, 起止位置不会重复, 可以直接按下标赋值
+    delta[runs[:, 0]] += 1
+    delta[runs[:, 1] + 1] -= 1
+    return np.cumsum(delta[:-1]).astype(np.uint8)
+
+
+def from_mask(mask) -> np.ndarray:
+    """逐帧掩码 -> 区间
+
+    Args:
+        mask: 序列;逐帧的 0/1
+
+    Returns:
+        np.ndarray;区间
+    """
+    mask = np.asarray(mask) != 0
+    if mask.size == 0:
+        return empty()
+    diff = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(diff == 1)
+    stops = np.flatnonzero(diff == -1) - 1
+    return np.column_stack([starts, stops]).astype(np.int64)
+
+
+def frame_iou(a, b) -> float:
+    """按帧计算两组区间的 IoU, 两组都为空时返回 1.0
+
+    Args:
+        a: 序列;区间
+        b: 序列;区间
+
+    Returns:
+        float;交集帧数 / 并集帧数
+    """
+    union_frames = length(union(a, b))
+    if union_frames == 0:
+        return 1.0
+    return length(intersection(a, b)) / union_frames
+
+
+def segment_iou(a, b) -> np.ndarray:
+    """两组区间中每一对区间之间的 IoU
+
+    Args:
+        a: 序列;区间, 例如 GT 帧段
+        b: 序列;区间, 例如算法检测出的帧段
+
+    Returns:
+        np.ndarray;形状为 (len(a), len(b)) 的 IoU 矩阵
+    """
+    a, b = as_runs(a), as_runs(b)
+    inter = (np.minimum(a[:, None, 1], b[None, :, 1]) - np.maximum(a[:, None, 0], b[None, :, 0]) + 1).clip(min=0)
+    size_a = (a[:, 1] - a[:, 0] + 1)[:, None]
+    size_b = (b[:, 1] - b[:, 0] + 1)[None, :]
+    return inter / np.maximum(size_a + size_b - inter, 1)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+""" 视频元数据探测与缓存;
+每个文件只探测一次(时长、帧率、精确帧数、分辨率、编码、关键帧数), 结果按文件指纹保存在数据库的 mediainfo 表中,
+标注工具以及 video_tools 下的脚本都从这里读取, 不再为了读取时长或者帧数重新打开整个视频;
+"""
+import os
+import re
+import subprocess
+import threading
+from typing import Optional
+
+import cv2
+
+from core.cache_manager import video_fingerprint
+from core.config import Config
+from core.db import write_with_retry
+from core.models import BaseDBOperateModel, MediaInfo
+from core.seek_index import SeekIndex
+
+try:
+    # moviepy 依赖的 ffmpeg 可执行文件, 用于读取容器中的时长与音视频编码
+    import imageio_ffmpeg
+except ImportError:
+    imageio_ffmpeg = None
+
+DURATION_PATTERN = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+STREAM_PATTERN = re.compile(r"Stream #[^:]+:[^:]+:\s*(Video|Audio):\s*([\w-]+)")
+
+
+def read_container(video_path: str) -> dict:
+    """通过 ffmpeg 读取容器信息, 只解析文件头, 不解码
+
+    Args:
+        video_path: str;视频路径
+
+    Returns:
+        dict;duration / video_codec / audio_codec, ffmpeg 不可用时返回空字典
+    """
+    if imageio_ffmpeg is None:
+        return {}
+    try:
+        proc = subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", video_path],
+                              capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=30)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"ffmpeg 读取失败: {video_path} {e}")
+        return {}
+    info = {"audio_codec": ""}
+    matched = DURATION_PATTERN.search(proc.stderr)
+    if matched is not None:
+        hours, minutes, seconds = matched.groups()
+        info["duration"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    for kind, codec in STREAM_PATTERN.findall(proc.stderr):
+        key = "video_codec" if kind == "Video" else "audio_codec"
+        # 多个音视频流时记录第一个
+        if not info.get(key):
+            info[key] = codec
+    return info
+
+
+def probe_file(video_path: str, seek_index: Optional[SeekIndex] = None) -> dict:
+    """探测一个视频文件
+
+    Args:
+        video_path: str;视频路径
+        seek_index: SeekIndex;已经构建好的帧定位索引, 提供精确帧数与关键帧, 为空时遍历一次数据包构建
+
+    Returns:
+        dict;MediaInfo 的各个字段(不含 id)
+
+    Raises:
+        IOError;视频无法打开
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"视频无法打开: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        declared_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    finally:
+        cap.release()
+    if seek_index is None:
+        seek_index = SeekIndex.build(video_path)
+    container = read_container(video_path)
+    frame_count = seek_index.frame_count or declared_count
+    duration = container.get("duration") or (frame_count / fps if fps else None)
+    video_codec = container.get("video_codec") or "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip()
+    return {
+        "file_name": os.path.basename(video_path),
+        "file_size": os.path.getsize(video_path),
+        "duration": duration,
+        "fps": fps,
+        "frame_count": frame_count,
+        "width": width,
+        "height": height,
+        "video_codec": video_codec or None,
+        "audio_codec": container.get("audio_codec"),
+        "keyframe_count": len(seek_index.keyframes) if seek_index.has_keyframes else None,
+    }
+
+
+def is_header_only(info: dict) -> bool:
+    """是否为只读取了容器头的部分记录, 部分记录没有精确帧数"""
+    return info.get("frame_count") is None
+
+
+class MediaProbe(object):
+    """ 带数据库缓存的视频元数据探测;
+    """
+
+    def __init__(self, session_factory=None, engine=None, fingerprint_func=None):
+        """
+        Args:
+            session_factory: callable;返回数据库会话, 默认使用 Config.SESSION
+            engine: Engine;用于创建 mediainfo 表, 默认使用 Config 中的 SQLite
+            fingerprint_func: callable;计算文件指纹, 例如帧缓存管理中带缓存的 fingerprint, 默认自行计算并缓存
+        """
+        self.session_factory = session_factory or Config.SESSION
+        self.fingerprint_func = fingerprint_func
+        MediaInfo.__table__.create(engine or Config.DB_CONFIG.get("sql_lite"), checkfirst=True)
+        # (路径, 大小, 修改时间) -> 指纹, 同一个文件不重复计算指纹
+        self._fingerprints = {}
+        # 指纹 -> 元数据
+        self._infos = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, video_path: str) -> str:
+        if self.fingerprint_func is not None:
+            return self.fingerprint_func(video_path)
+        stat = os.stat(video_path)
+        key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            fp = self._fingerprints.get(key)
+        if fp is None:
+            fp = video_fingerprint(video_path)
+            with self._lock:
+                self._fingerprints[key] = fp
+        return fp
+
+    def lookup(self, video_path: str, header_only: bool = False) -> Optional[dict]:
+        """只读取缓存, 没有探测过的文件返回 None, 可以在界面线程中调用
+
+        Args:
+            video_path: str;视频路径
+            header_only: bool;是否接受只读取了容器头的记录(没有精确帧数)
+
+        Returns:
+            dict;元数据
+        """
+        fp = self.fingerprint(video_path)
+        with self._lock:
+            info = self._infos.get(fp)
+        if info is None:
+            session = self.session_factory()
+            try:
+                info = BaseDBOperateModel.get_one(db_query=session.query(MediaInfo),
+                                                  filters={MediaInfo.fingerprint == fp}) or None
+            finally:
+                session.close()
+            if info is not None:
+                with self._lock:
+                    self._infos[fp] = info
+        if info is not None and not header_only and is_header_only(info):
+            return None
+        return info
+
+    def _save(self, info: dict) -> None:
+        """写入或者更新一条元数据, 只读取了容器头的记录在完整探测后被覆盖"""
+        write_with_retry(self.session_factory,
+                         lambda session: BaseDBOperateModel.upsert_all(session, MediaInfo, [info], key="fingerprint"),
+                         retries=Config.DB_WRITE_RETRIES, delay=Config.DB_RETRY_DELAY)
+        with self._lock:
+            self._infos[info["fingerprint"]] = info
+
+    def header(self, video_path: str) -> dict:
+        """只需要时长或者音视频编码时使用, 有缓存时读取缓存, 否则只读取容器头(不遍历数据包)并保存为部分记录,
+        之后完整探测时补全
+
+        Args:
+            video_path: str;视频路径
+
+        Returns:
+            dict;元数据, 部分记录没有帧数等字段, ffmpeg 不可用时为空字典
+        """
+        info = self.lookup(video_path, header_only=True)
+        if info is not None:
+            return info
+        container = read_container(video_path)
+        if not container:
+            return container
+        info = {
+            "fingerprint": self.fingerprint(video_path),
+            "file_name": os.path.basename(video_path),
+            "file_size": os.path.getsize(video_path),
+            "duration": container.get("duration"),
+            "video_codec": container.get("video_codec"),
+            "audio_codec": container.get("audio_codec"),
+        }
+        self._save(info)
+        return info
+
+    def get(self, video_path: str, seek_index: Optional[SeekIndex] = None) -> dict:
+        """读取元数据, 没有缓存时探测并保存
+
+        Args:
+            video_path: str;视频路径
+            seek_index: SeekIndex;已经构建好的帧定位索引, 探测时直接使用
+
+        Returns:
+            dict;元数据
+        """
+        info = self.lookup(video_path)
+        if info is not None:
+            return info
+        info = probe_file(video_path, seek_index)
+        info["fingerprint"] = self.fingerprint(video_path)
+        # 其他进程已经写入了同一个文件时按指纹覆盖
+        self._save(info)
+        return info
@@ -0,0 +1,558 @@
+# -*- coding: utf-8 -*-
+""" 数据库模型以及通用的数据操作, 不依赖界面库, 标注工具与命令行工具共用;
+"""
+import math
+import time
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import desc, asc, and_, or_, func, event, select, insert, update, bindparam
+from sqlalchemy.dialects import sqlite, mysql
+from sqlalchemy_utils import Choice, ChoiceType
+from sqlalchemy.orm.query import Query
+from sqlalchemy.orm.session import Session
+from sqlalchemy import Column, Integer, String, Float, BigInteger
+from sqlalchemy.orm import declarative_base
+
+from core.config import Config
+
+Base = declarative_base()
+
+
+class BaseDBOperateModel(object):
+    """ 数据操作类;
+    """
+    # (表名, 查询语句, 参数) -> (总数, 缓存时间), 按最近使用排序, 最多 Config.COUNT_CACHE_SIZE 条;
+    # 通过本类写入数据时清除对应表的缓存
+    _count_cache = OrderedDict()
+    _count_lock = threading.Lock()
+
+    @classmethod
+    def get_list(cls, db_query: Query, filters: set, order: str = "-id", offset: int = 0, limit: int = 15,
+                 count_mode: str = "exact", columns: list = None) -> dict:
+        """分页查询数据
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            order: str;排序规则，例："+id,-create_time"
+            offset: int;偏移量
+            limit: int;取多少条
+            count_mode: str;总数的计算方式, 见 count
+            columns: list;只查询的字段名, 设置后通过 select_rows 直接读取字段, 不构建 ORM 对象
+
+        Returns:            dict;数据结果
+        """
+        count_number = cls.count(db_query, filters, count_mode)
+        result = {
+            "page": {
+                "count": count_number,
+                "total_page": cls.get_page_number(count_number, limit),
+                "current_page": offset
+            },
+        }
+        filter_result = list()
+        if offset != 0:
+            offset = (offset - 1) * limit
+        if result["page"]["count"] > 0 and columns:
+            result["list"] = cls.select_rows(db_query, filters, columns, order, offset, limit)
+            return result
+        if result["page"]["count"] > 0:
+            # 禁用全部检查
+            # noinspection All
+            filter_query = db_query.filter(*filters)
+            order_rules = cls.order_transfer(order)
+            # noinspection All
+            filter_result = filter_query.order_by(*order_rules).offset(offset).limit(limit).all()
+        result["list"] = [cls.to_dict(c) for c in filter_result]
+        return result
+
+    @classmethod
+    def get_page_after(cls, db_query: Query, filters: set, order: str = "-id", cursor: list = None, limit: int = 15,
+                       count_mode: str = "cached") -> dict:
+        """按游标分页查询数据, 从上一页最后一条的排序字段继续查询, 不使用 OFFSET, 翻到多深都只读取一页的数据
+
+        排序字段中没有 id 时自动追加 id 保证顺序唯一; 排序字段需要不为空
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            order: str;排序规则，例："+id,-create_time"
+            cursor: list;上一页返回的 next_cursor, 为空时查询第一页
+            limit: int;取多少条
+            count_mode: str;总数的计算方式, 见 count, 为 none 时不计算总数
+
+        Returns:
+            dict;数据结果, page 中的 next_cursor 为空表示已经是最后一页
+        """
+        keys = cls.keyset_columns(db_query, order)
+        # noinspection All
+        filter_query = db_query.filter(*filters)
+        if cursor:
+            # (a, b) > (x, y) 展开为 a > x or (a = x and b > y), 每个字段按各自的排序方向比较
+            conditions = list()
+            for i, (column, descending) in enumerate(keys):
+                equals = [keys[j][0] == cursor[j] for j in range(i)]
+                conditions.append(and_(*equals, column < cursor[i] if descending else column > cursor[i]))
+            # noinspection All
+            filter_query = filter_query.filter(or_(*conditions))
+        order_rules = [column.desc() if descending else column.asc() for column, descending in keys]
+        # 多取一条用于判断是否还有下一页
+        # noinspection All
+        rows = [cls.to_dict(c) for c in filter_query.order_by(*order_rules).limit(limit + 1).all()]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = [rows[-1][column.key] for column, _ in keys] if has_more else None
+        count_number = cls.count(db_query, filters, count_mode) if count_mode != "none" else None
+        return {
+            "page": {
+                "count": count_number,
+                "total_page": cls.get_page_number(count_number, limit) if count_number is not None else None,
+                "next_cursor": next_cursor,
+            },
+            "list": rows,
+        }
+
+    @classmethod
+    def select_rows(cls, db_query: Query, filters: set, columns: list = None, order: str = "-id", offset: int = 0,
+                    limit: int = 0, as_dict: bool = True) -> list:
+        """只查询指定字段, 使用 Core 的 select 直接读取, 不构建 ORM 对象, 也不逐个字段调用 getattr
+
+        Choice 字段的转换按字段判断一次, 只有 ChoiceType 的字段逐行转换, 结果与 to_dict 一致
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            columns: list;字段名, 为空时查询全部字段
+            order: str;排序规则，例："+id,-create_time"
+            offset: int;偏移量(条数)
+            limit: int;取多少条, 0 表示全部
+            as_dict: bool;True 返回 dict 列表, False 返回与 columns 顺序一致的元组列表
+
+        Returns:
+            list;查询结果
+        """
+        statement, names = cls.select_statement(db_query, filters, columns, order)
+        if offset:
+            statement = statement.offset(offset)
+        if limit:
+            statement = statement.limit(limit)
+        rows = cls.unwrap_choices(statement, db_query.session.execute(statement).all())
+        if as_dict:
+            return [dict(zip(names, row)) for row in rows]
+        return [tuple(row) for row in rows]
+
+    @classmethod
+    def iter_rows(cls, db_query: Query, filters: set, columns: list = None, order: str = "-id",
+                  batch_size: int = 1000):
+        """分批读取全部数据, 数据库游标按批取数, 内存中最多只有一批数据
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            columns: list;字段名, 为空时查询全部字段
+            order: str;排序规则，例："+id,-create_time"
+            batch_size: int;每批的条数
+
+        Yields:
+            tuple;(字段名列表, 元组列表)
+        """
+        statement, names = cls.select_statement(db_query, filters, columns, order)
+        result = db_query.session.execute(statement.execution_options(yield_per=batch_size))
+        try:
+            for rows in result.partitions():
+                yield names, [tuple(row) for row in cls.unwrap_choices(statement, rows)]
+        finally:
+            result.close()
+
+    @classmethod
+    def select_statement(cls, db_query: Query, filters: set, columns: list = None, order: str = "-id"):
+        """构建只查询指定字段的 select 语句
+
+        Returns:
+            tuple;(select 语句, 字段名列表)
+        """
+        table = db_query.column_descriptions[0]["entity"].__table__
+        selected = [table.c[name] for name in columns] if columns else list(table.columns)
+        statement = select(*selected).where(*filters).order_by(*cls.order_transfer(order))
+        return statement, [column.name for column in selected]
+
+    @staticmethod
+    def unwrap_choices(statement, rows) -> list:
+        """Choice 字段转换为 value, 只对 ChoiceType 的字段逐行转换"""
+        choice_idx = [i for i, column in enumerate(statement.selected_columns) if isinstance(column.type, ChoiceType)]
+        if not choice_idx:
+            return rows
+
+        def unwrap(row):
+            row = list(row)
+            for i in choice_idx:
+                if isinstance(row[i], Choice):
+                    row[i] = row[i].value
+            return row
+        return [unwrap(row) for row in rows]
+
+    @classmethod
+    def keyset_columns(cls, db_query: Query, order: str) -> list:
+        """order排序规则转换为游标分页使用的字段
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            order: str;排序规则，例："+id,-create_time"
+
+        Returns:
+            list;(字段, 是否降序) 列表, 最后一个字段为 id
+        """
+        model = db_query.column_descriptions[0]["entity"]
+        keys = list()
+        for item in order.split(","):
+            name = item[1:] if item[0] in "+-" else item
+            keys.append((getattr(model, name), item[0] == "-"))
+        if all(column.key != "id" for column, _ in keys):
+            keys.append((model.id, keys[-1][1] if keys else False))
+        return keys
+
+    @classmethod
+    def count(cls, db_query: Query, filters: set, mode: str = "exact") -> int:
+        """符合条件的数据数量
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            mode: str;exact 每次执行 count; cached 缓存 count 的结果, 写入或者超过 Config.COUNT_CACHE_SECONDS 后重新计算;
+                approximate 没有过滤条件时使用 max(id)(只读取主键索引的最后一条, 删除过数据时偏大), 否则同 cached
+
+        Returns:
+            int;
+        """
+        # noinspection All
+        filter_query = db_query.filter(*filters)
+        if mode == "exact":
+            return filter_query.count()
+        if mode == "approximate" and not filters:
+            model = db_query.column_descriptions[0]["entity"]
+            return db_query.session.query(func.max(model.id)).scalar() or 0
+        compiled = filter_query.statement.compile()
+        key = (cls.table_name(db_query), str(compiled), repr(sorted(compiled.params.items())))
+        now = time.monotonic()
+        with cls._count_lock:
+            cached = cls._count_cache.get(key)
+            if cached is not None and now - cached[1] < Config.COUNT_CACHE_SECONDS:
+                cls._count_cache.move_to_end(key)
+                return cached[0]
+            # 过期的条目在访问时删除
+            cls._count_cache.pop(key, None)
+        count_number = filter_query.count()
+        with cls._count_lock:
+            cls._count_cache[key] = (count_number, now)
+            while len(cls._count_cache) > Config.COUNT_CACHE_SIZE:
+                cls._count_cache.popitem(last=False)
+        return count_number
+
+    @classmethod
+    def invalidate_count(cls, table_name: str, db_session: Session = None) -> None:
+        """清除一个表的总数缓存
+
+        Args:
+            table_name: str;表名
+            db_session: Session;写入数据的会话, 提交后再清除一次, 避免提交前其他会话缓存了旧的总数
+        """
+        if db_session is not None:
+            db_session.info.setdefault("count_tables", set()).add(table_name)
+        with cls._count_lock:
+            for key in [key for key in cls._count_cache if key[0] == table_name]:
+                del cls._count_cache[key]
+
+    @staticmethod
+    def table_name(db_query: Query) -> str:
+        return db_query.column_descriptions[0]["entity"].__tablename__
+
+    @classmethod
+    def get_all(cls, db_query: Query, filters: set, order: str = "-id", limit: int = 0, columns: list = None) -> list:
+        """获取所有符合条件的数据
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            order: str;排序规则，例："+id,-create_time"
+            limit: int;取多少条
+            columns: list;只查询的字段名, 设置后通过 select_rows 直接读取字段, 不构建 ORM 对象
+
+        Returns:
+            list;多条查询数据结果
+        """
+        if columns:
+            return cls.select_rows(db_query, filters, columns, order, limit=limit)
+        if not filters:
+            result = db_query
+        else:
+            # noinspection All
+            result = db_query.filter(*filters)
+        order_rules = cls.order_transfer(order)
+        result = result.order_by(*order_rules)
+        if limit != 0:
+            # noinspection All
+            result = result.limit(limit)
+        # noinspection All
+        result = result.all()
+        result = [cls.to_dict(c) for c in result]
+        return result
+
+    @classmethod
+    def get_one(cls, db_query: Query, filters: set, order: str = "-id", columns: list = None) -> dict:
+        """获取一条符合条件的数据
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            order: str;排序规则，例："+id,-create_time"
+            columns: list;只查询的字段名, 设置后通过 select_rows 直接读取字段, 不构建 ORM 对象
+
+        Returns:
+            dict;单条查询数据结果
+        """
+        if columns:
+            rows = cls.select_rows(db_query, filters, columns, order, limit=1)
+            return rows[0] if rows else {}
+        # noinspection All
+        result = db_query.filter(*filters)
+        order_rules = cls.order_transfer(order)
+        # noinspection All
+        result = result.order_by(*order_rules).first()
+        if result is None:
+            return {}
+        result = cls.to_dict(result)
+        return result
+
+    @classmethod
+    def insert(cls, db_session: Session, model, data: dict) -> int:
+        """插入一条数据
+
+        Args:
+            db_session: Session;数据库会话连接
+            model: BaseModel;数据模型类对象
+            data: set;插入数据
+
+        Returns:
+            int;插入成功后返回的id编号
+        """
+        users = model(**data)
+        db_session.add(users)
+        db_session.flush()
+        cls.invalidate_count(model.__tablename__, db_session)
+        return users.id
+
+    @classmethod
+    def insert_all(cls, db_session: Session, model, data: list) -> bool:
+        """插入多条数据
+
+        Args:
+            db_session: Session;数据库会话连接
+            model: BaseModel;数据模型类对象
+            data: set;插入数据
+
+        Returns:
+            bool;插入多条数据成功返回True
+        """
+        users = list()
+        for user_info in data:
+            users.append(model(**user_info))
+        db_session.add_all(users)
+        cls.invalidate_count(model.__tablename__, db_session)
+        db_session.commit()
+        return True
+
+    @classmethod
+    def upsert_all(cls, db_session: Session, model, data: list, key: str = "video_name", batch_size: int = 500) -> int:
+        """批量插入或者更新, 按唯一字段判断数据是否已经存在, 不构建 ORM 对象, 不提交事务(由调用方统一提交)
+
+        SQLite 与 MySQL 每批只执行一条 INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE 语句,
+        其他数据库先查询已经存在的 key, 再分别批量插入与批量更新; 只更新数据中给出的字段, 其他字段保持不变
+
+        Args:
+            db_session: Session;数据库会话连接
+            model: BaseModel;数据模型类对象
+            data: list;dict 列表, 每条都需要包含 key
+            key: str;唯一字段名
+            batch_size: int;每条语句的最大条数, SQLite 的参数个数有上限
+
+        Returns:
+            int;写入的条数
+        """
+        # 字段不同的数据不能放在同一条语句中, 按字段分组
+        groups = dict()
+        for item in data:
+            groups.setdefault(tuple(sorted(item)), list()).append(item)
+        dialect = db_session.get_bind().dialect.name
+        for names, rows in groups.items():
+            columns = [name for name in names if name != key]
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                if dialect == "sqlite":
+                    statement = sqlite.insert(model).values(batch)
+                    statement = statement.on_conflict_do_update(
+                        index_elements=[key], set_={name: statement.excluded[name] for name in columns}) \
+                        if columns else statement.on_conflict_do_nothing(index_elements=[key])
+                    db_session.execute(statement)
+                elif dialect == "mysql":
+                    statement = mysql.insert(model).values(batch)
+                    db_session.execute(statement.on_duplicate_key_update(
+                        {name: statement.inserted[name] for name in columns or [key]}))
+                else:
+                    column = getattr(model, key)
+                    exists = set(db_session.execute(select(column).where(column.in_([item[key] for item in batch])))
+                                 .scalars())
+                    new_rows = [item for item in batch if item[key] not in exists]
+                    # 参数名不能与字段名相同
+                    old_rows = [{f"_{name}": value for name, value in item.items()} for item in batch
+                                if item[key] in exists]
+                    if new_rows:
+                        db_session.execute(insert(model), new_rows)
+                    if old_rows and columns:
+                        db_session.connection().execute(
+                            update(model.__table__).where(model.__table__.c[key] == bindparam(f"_{key}"))
+                            .values({name: bindparam(f"_{name}") for name in columns}), old_rows)
+        cls.invalidate_count(model.__tablename__, db_session)
+        return len(data)
+
+    @classmethod
+    def update(cls, db_query: Query, data: dict, filters: set) -> int:
+        """修改符合条件的数据
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            data: dict;插入数据
+            filters: set;过滤条件
+
+        Returns:
+            int;修改数据成功返回的行数
+        """
+        cls.invalidate_count(cls.table_name(db_query), db_query.session)
+        # noinspection All
+        return db_query.filter(*filters).update(data, synchronize_session=False)
+
+    @classmethod
+    def delete(cls, db_query: Query, filters: set) -> int:
+        """删除符合条件的数据
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+
+        Returns:
+             int;修改数据成功返回的行数
+        """
+        cls.invalidate_count(cls.table_name(db_query), db_query.session)
+        # noinspection All
+        return db_query.filter(*filters).delete(synchronize_session=False)
+
+    @staticmethod
+    def get_count(db_query: Query, filters: set, field=False) -> int:
+        """获取符合条件的数据数量
+
+        Args:
+            db_query: Query;数据库session绑定了查询数据库模型的查询类
+            filters: set;过滤条件
+            field: bool;是否指定字段计数
+
+        Returns:
+            int;
+        """
+        if field:
+            # noinspection All
+            return db_query.filter(*filters).scalar()
+        else:
+            # noinspection All
+            return db_query.filter(*filters).count()
+
+    @staticmethod
+    def get_page_number(count: int, page_size: int) -> int:
+        """获取总页数
+
+        Args:
+            count: int;数据总数
+            page_size: int;分页大小
+
+        Returns:
+            int;总页数
+        """
+        page_size = abs(page_size)
+        if page_size != 0:
+            total_page = math.ceil(count / page_size)
+        else:
+            total_page = math.ceil(count / 5)
+        return total_page
+
+    @staticmethod
+    def order_transfer(order: str):
+        """order排序规则转换
+
+        Args:
+            order: str;排序规则，例："+id,-create_time"
+
+        Returns:
+            list;排序规则列表
+        """
+        order_array = order.split(",")
+        order_rules = list()
+        for item in order_array:
+            sort_rule = item[0]
+            if sort_rule == "-":
+                order_rules.append(desc(item[1:]))
+            else:
+                order_rules.append(asc(item[1:]))
+        return order_rules
+
+    @staticmethod
+    def to_dict(model_obj):
+        if not hasattr(model_obj, "_fields"):
+            only = model_obj.__table__.columns
+            result = {field.name: (
+                getattr(model_obj, field.name).value if isinstance(getattr(model_obj, field.name), Choice) else getattr(
+                    model_obj, field.name)) for field in only}
+        else:
+            only = model_obj.keys()
+            result = {field: (
+                getattr(model_obj, field).value if isinstance(getattr(model_obj, field), Choice) else getattr(
+                    model_obj, field)) for field in only}
+        return result
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_counts(db_session):
+    """会话提交后清除写入过的表的总数缓存"""
+    for table_name in db_session.info.pop("count_tables", ()):
+        BaseDBOperateModel.invalidate_count(table_name)
+
+
+class VideoInfo(Base):
+    """构建数据库的信息;
+    """
+    __tablename__ = "videoinfo"
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="编号")
+    video_name = Column(String(255), nullable=False, unique=True, comment="视频名称")
+    category = Column(String(255), nullable=True, comment="视频类别")
+    theme = Column(String(255), nullable=True, comment="视频主题")
+    key_frames = Column(String(255), nullable=True, comment="关键帧")
+    section_frames = Column(String(255), nullable=True, comment="帧段")
+    quality_category = Column(String(255), nullable=True, comment="视频质量")
+    status = Column(Integer, nullable=True, comment="状态")
+    notes = Column(String(255), nullable=True)
+
+
+class MediaInfo(Base):
+    """视频文件的元数据缓存, 按文件指纹区分, 文件改名或者移动后仍然有效;
+    """
+    __tablename__ = "mediainfo"
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="编号")
+    fingerprint = Column(String(32), nullable=False, unique=True, comment="文件指纹")
+    file_name = Column(String(255), nullable=True, comment="最近一次探测时的文件名")
+    file_size = Column(BigInteger, nullable=True, comment="文件大小(字节)")
+    duration = Column(Float, nullable=True, comment="时长(秒)")
+    fps = Column(Float, nullable=True, comment="帧率")
+    frame_count = Column(Integer, nullable=True, comment="精确帧数")
+    width = Column(Integer, nullable=True, comment="宽")
+    height = Column(Integer, nullable=True, comment="高")
+    video_codec = Column(String(32), nullable=True, comment="视频编码")
+    audio_codec = Column(String(32), nullable=True, comment="音频编码, 空字符串表示没有音轨, NULL 表示未知")
+    keyframe_count = Column(Integer, nullable=True, comment="关键帧数")
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+""" 视频播放;
+后台线程顺序解码并完成缩放与颜色转换, 结果写入固定大小的环形缓冲区; 界面按统一的播放时钟取帧,
+显示跟不上时跳过已经落后于时钟的帧, 而不是逐帧播放导致画面越来越慢;
+"""
+import time
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.frame_provider import FrameProvider
+from core.proxy import proxy_shape
+from core.seek_index import SeekIndex
+
+
+class PlaybackClock(object):
+    """ 播放时钟, 根据开始播放以来经过的时间计算当前应该显示的帧号;
+    """
+
+    def __init__(self, fps: float):
+        self.fps = fps
+        self.start_frame = 0
+        self._start_time = None
+
+    @property
+    def running(self) -> bool:
+        return self._start_time is not None
+
+    def start(self, frame_idx: int) -> None:
+        """从指定帧开始计时"""
+        self.start_frame = frame_idx
+        self._start_time = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """开始计时以来经过的秒数"""
+        return time.perf_counter() - self._start_time if self.running else 0.0
+
+    def frame(self) -> int:
+        """当前应该显示的帧号, 未开始计时返回起始帧"""
+        return self.start_frame + int(self.elapsed() * self.fps)
+
+
+class DecodeRingBuffer(object):
+    """ 解码线程与界面之间的环形缓冲区, 每个槽位的数组分配一次后重复使用;
+    界面取走的槽位在下一次取帧时才释放, 保证绘制期间不会被解码线程覆盖;
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: int;槽位数
+        """
+        self.capacity = capacity
+        self.buffers = [None] * capacity
+        self.indices = [-1] * capacity
+        # 由于落后于时钟而被丢弃的帧数
+        self.dropped = 0
+        self._read = 0
+        self._count = 0
+        self._held = False
+        self._finished = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def buffer(self, slot: int, width: int, height: int) -> np.ndarray:
+        """槽位对应的 RGB 数组, 尺寸变化时重新分配"""
+        if self.buffers[slot] is None or self.buffers[slot].shape[0:2] != (height, width):
+            self.buffers[slot] = np.empty((height, width, 3), dtype=np.uint8)
+        return self.buffers[slot]
+
+    def acquire(self) -> Optional[int]:
+        """解码线程等待一个空闲槽位
+
+        Returns:
+            int;槽位号, 缓冲区已经关闭时返回 None
+        """
+        with self._cond:
+            while not self._closed and self._count + self._held >= self.capacity:
+                self._cond.wait()
+            if self._closed:
+                return None
+            return (self._read + self._held + self._count) % self.capacity
+
+    def commit(self, slot: int, frame_idx: int) -> None:
+        """槽位写入完成"""
+        with self._cond:
+            self.indices[slot] = frame_idx
+            self._count += 1
+            self._cond.notify_all()
+
+    def peek(self) -> int:
+        """最早的一帧的帧号, 缓冲区为空返回 -1"""
+        with self._cond:
+            return self.indices[self._next_slot()] if self._count else -1
+
+    def take(self, target: int) -> Optional[Tuple[int, np.ndarray]]:
+        """取出不晚于 target 的最新一帧, 更早的帧直接丢弃
+
+        Args:
+            target: int;时钟当前的帧号
+
+        Returns:
+            tuple;(帧号, RGB 数组), 缓冲区中的帧都晚于时钟时返回 None
+        """
+        with self._cond:
+            self._release_held()
+            # 后面还有不晚于时钟的帧时, 前面的帧已经来不及显示
+            while self._count > 1 and self.indices[(self._next_slot() + 1) % self.capacity] <= target:
+                self._advance()
+                self.dropped += 1
+            slot = self._next_slot()
+            if not self._count or self.indices[slot] > target:
+                return None
+            self._count -= 1
+            self._held = True
+            return self.indices[slot], self.buffers[slot]
+
+    def finish(self) -> None:
+        """解码线程已经解码到视频末尾"""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        with self._cond:
+            return self._closed
+
+    @property
+    def drained(self) -> bool:
+        """解码结束并且所有帧都已经取出"""
+        with self._cond:
+            return self._finished and not self._count
+
+    def close(self) -> None:
+        """停止播放, 唤醒等待中的解码线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _next_slot(self) -> int:
+        return (self._read + self._held) % self.capacity
+
+    def _advance(self) -> None:
+        self._read = (self._read + 1) % self.capacity
+        self._count -= 1
+
+    def _release_held(self) -> None:
+        if self._held:
+            self._read = (self._read + 1) % self.capacity
+            self._held = False
+            self._cond.notify_all()
+
+
+class PlaybackEngine(object):
+    """ 从指定帧开始按原始帧率播放一个视频;
+    """
+
+    def __init__(self, video_path: str, start_idx: int, fps: float, display_size: Tuple[int, int],
+                 seek_index: Optional[SeekIndex] = None, capacity: int = 8):
+        """
+        Args:
+            video_path: str;视频路径
+            start_idx: int;起始帧号
+            fps: float;播放帧率
+            display_size: tuple;显示区域的 (宽, 高)
+            seek_index: SeekIndex;帧定位索引, 用于快速定位到起始帧
+            capacity: int;环形缓冲区的槽位数
+        """
+        self.video_path = video_path
+        self.start_idx = start_idx
+        self.display_size = display_size
+        self.seek_index = seek_index
+        self.clock = PlaybackClock(fps)
+        self.ring = DecodeRingBuffer(capacity)
+        self.shown = 0
+        # 解码后已经落后于时钟, 跳过缩放直接丢弃的帧数
+        self.skipped = 0
+        self._thread = threading.Thread(target=self._decode_loop, name="playback", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止解码线程"""
+        self.ring.close()
+        self._thread.join()
+
+    def take(self) -> Optional[Tuple[int, np.ndarray]]:
+        """取出时钟当前应该显示的帧, 第一帧解码完成时开始计时
+
+        Returns:
+            tuple;(帧号, RGB 数组), 没有需要显示的新帧时返回 None
+        """
+        if not self.clock.running:
+            first = self.ring.peek()
+            if first < 0:
+                return None
+            self.clock.start(first)
+        result = self.ring.take(self.clock.frame())
+        if result is not None:
+            self.shown += 1
+        return result
+
+    @property
+    def finished(self) -> bool:
+        return self.ring.drained
+
+    @property
+    def dropped(self) -> int:
+        return self.ring.dropped + self.skipped
+
+    def achieved_fps(self) -> float:
+        elapsed = self.clock.elapsed()
+        return self.shown / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> str:
+        return (f"playback: shown={self.shown} dropped={self.dropped} fps={self.achieved_fps():.1f}/"
+                f"{self.clock.fps:.1f}")
+
+    def _decode_loop(self) -> None:
+        """解码线程, 使用独立的解码器, 不与界面的逐帧查看共用"""
+        provider = FrameProvider(self.video_path, budget_mb=0)
+        try:
+            if self.seek_index is not None:
+                provider.set_seek_index(self.seek_index)
+            scaled = None
+            for frame_idx in range(self.start_idx, provider.frame_count):
+                # 落后于时钟时不会经过 acquire, 每一帧都检查是否已经停止, 否则 stop 要等到解码到视频末尾
+                if self.ring.closed:
+                    return
+                if self.clock.running and frame_idx < self.clock.frame():
+                    # 已经来不及显示的帧只 grab 不解码, 尽快追上时钟
+                    if not provider.skip_frame(frame_idx):
+                        break
+                    self.skipped += 1
+                    continue
+                frame = provider.get_frame(frame_idx)
+                if frame is None:
+                    break
+                slot = self.ring.acquire()
+                if slot is None:
+                    return
+                width, height = proxy_shape(frame.shape[1], frame.shape[0], self.display_size)
+                if scaled is None or scaled.shape[0:2] != (height, width):
+                    scaled = np.empty((height, width, 3), dtype=np.uint8)
+                cv2.resize(frame, (width, height), dst=scaled, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(scaled, cv2.COLOR_BGR2RGB, dst=self.ring.buffer(slot, width, height))
+                self.ring.commit(slot, frame_idx)
+        finally:
+            provider.release()
+            self.ring.finish()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+""" 相邻视频预取;
+标注当前视频时, 在后台线程中提前准备前后 k 个视频的缓存目录、帧定位索引、前几帧画面以及数据库记录,
+切换视频时直接取用, 不需要再从头加载;
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Optional, Set
+
+from core.cache_manager import FrameCacheManager
+from core.frame_provider import FrameProvider
+from core.seek_index import SeekIndex
+
+
+class PrefetchEntry(object):
+    """ 预取完成的视频;
+    """
+
+    def __init__(self, video_path: str, folder: str, provider: FrameProvider, record: dict):
+        self.video_path = video_path
+        self.folder = folder
+        self.provider = provider
+        self.record = record
+
+
+class NeighborPrefetcher(object):
+    """ 以当前视频为中心预取前后 depth 个视频;
+    """
+
+    def __init__(self, cache_manager: FrameCacheManager, record_loader: Callable[[str], dict],
+                 depth: int = 1, warm_frames: int = 5, budget_mb: int = 64):
+        """
+        Args:
+            cache_manager: FrameCacheManager;帧缓存管理
+            record_loader: callable;根据视频名称读取数据库记录, 在后台线程中调用
+            depth: int;预取当前视频前后多少个视频, 0 表示关闭预取
+            warm_frames: int;每个视频提前解码的帧数
+            budget_mb: int;预取视频的帧缓存内存预算(MB)
+        """
+        self.cache_manager = cache_manager
+        self.record_loader = record_loader
+        self.depth = depth
+        self.warm_frames = warm_frames
+        self.budget_mb = budget_mb
+        self._pool = ThreadPoolExecutor(max(1, depth * 2), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        # 视频路径 -> (Future, 取消事件)
+        self._tasks: Dict[str, tuple] = {}
+        # 视频路径 -> 缓存目录, 预取中的目录不能被淘汰
+        self._folders: Dict[str, str] = {}
+
+    def schedule(self, video_files: List[str], current_idx: int) -> None:
+        """根据当前视频重新安排预取, 不在新窗口内的任务会被取消
+
+        Args:
+            video_files: list;视频路径列表
+            current_idx: int;当前视频的索引
+        """
+        window = [video_files[i] for i in range(current_idx - self.depth, current_idx + self.depth + 1)
+                  if 0 <= i < len(video_files) and i != current_idx]
+        # 距离当前视频近的优先
+        window.sort(key=lambda p: abs(video_files.index(p) - current_idx))
+        with self._lock:
+            for video_path in list(self._tasks):
+                if video_path not in window:
+                    self._cancel(video_path)
+            for video_path in window:
+                if video_path not in self._tasks:
+                    cancel_event = threading.Event()
+                    future = self._pool.submit(self._prefetch, video_path, cancel_event)
+                    self._tasks[video_path] = (future, cancel_event)
+
+    def folders(self) -> Set[str]:
+        """正在预取或者已经预取完成的视频的缓存目录
+
+        Returns:
+            set;缓存目录
+        """
+        with self._lock:
+            return {self._folders[p] for p in self._tasks if p in self._folders}
+
+    def take(self, video_path: str) -> Optional[PrefetchEntry]:
+        """取出已经预取完成的视频, 未完成的任务直接取消
+
+        Args:
+            video_path: str;视频路径
+
+        Returns:
+            PrefetchEntry;没有可用的预取结果返回 None
+        """
+        with self._lock:
+            task = self._tasks.pop(video_path, None)
+            self._folders.pop(video_path, None)
+        if task is None:
+            return None
+        future, cancel_event = task
+        if not future.done() or future.cancelled() or future.exception() is not None:
+            cancel_event.set()
+            future.add_done_callback(self._release_result)
+            return None
+        return future.result()
+
+    def clear(self) -> None:
+        """取消所有预取任务, 例如重新加载视频目录时"""
+        with self._lock:
+            for video_path in list(self._tasks):
+                self._cancel(video_path)
+
+    def shutdown(self) -> None:
+        """关闭线程池"""
+        self.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _cancel(self, video_path: str) -> None:
+        """取消一个预取任务并释放已经打开的解码器, 调用方需要持有锁"""
+        future, cancel_event = self._tasks.pop(video_path)
+        self._folders.pop(video_path, None)
+        cancel_event.set()
+        future.cancel()
+        future.add_done_callback(self._release_result)
+
+    @staticmethod
+    def _release_result(future: Future) -> None:
+        """释放被丢弃的预取结果"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        entry = future.result()
+        if entry is not None:
+            entry.provider.release()
+
+    def _prefetch(self, video_path: str, cancel_event: threading.Event) -> Optional[PrefetchEntry]:
+        """在后台线程中预取一个视频"""
+        if cancel_event.is_set():
+            return None
+        folder = self.cache_manager.entry_folder(video_path)
+        with self._lock:
+            if video_path in self._tasks:
+                self._folders[video_path] = folder
+        provider = FrameProvider(video_path, budget_mb=self.budget_mb, cache_folder=folder)
+        try:
+            manifest = self.cache_manager.read_manifest(folder)
+            if manifest.get("complete"):
+                provider.extracted = manifest.get("frame_count", 0)
+            seek_index = SeekIndex.load_or_build(video_path, folder)
+            provider.set_seek_index(seek_index)
+            for frame_idx in range(min(self.warm_frames, provider.frame_count)):
+                if cancel_event.is_set():
+                    break
+                provider.get_frame(frame_idx)
+            record = self.record_loader(os.path.basename(video_path))
+        except Exception:
+            provider.release()
+            raise
+        if cancel_event.is_set():
+            provider.release()
+            return None
+        return PrefetchEntry(video_path, folder, provider, record)
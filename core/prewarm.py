@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+""" 帧缓存预热工具, 不依赖界面库;
+对视频目录中的每一个视频提前展开帧、生成 proxy 以及帧定位索引, 标注时界面只读取已经准备好的缓存;
+支持断点续跑: 已经完成的视频直接跳过, 中断的视频只补写缺失的帧;
+在项目根目录下运行: python -m core.prewarm D:/videos --workers 8
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Tuple
+
+from core.config import Config
+from core.cache_manager import FrameCacheManager
+from core.frame_extract import extract_frames
+from core.proxy import FrameProxy
+from core.seek_index import SeekIndex
+
+
+def list_videos(video_folder: str) -> list:
+    """列出目录下的视频, 与界面中 load_video_folder 的规则一致
+
+    Args:
+        video_folder: str;视频目录
+
+    Returns:
+        list;视频路径列表
+    """
+    return [os.path.join(video_folder, f) for f in sorted(os.listdir(video_folder))
+            if f.endswith(Config.VIDEO_EXTENSIONS)]
+
+
+def prewarm_video(video_path: str, cache_root: str, proxy_size: Optional[Tuple[int, int]],
+                  proxy_max_mb: int = 0) -> dict:
+    """预热单个视频的缓存, 在子进程中运行
+
+    Args:
+        video_path: str;视频路径
+        cache_root: str;帧缓存根目录
+        proxy_size: tuple;proxy 的显示区域大小, None 表示不生成
+        proxy_max_mb: int;proxy 文件的大小上限(MB), 0 表示不限制
+
+    Returns:
+        dict;video_name/status(done/partial/skip/failed)/frames/seconds
+    """
+    start = time.perf_counter()
+    manager = FrameCacheManager(cache_root)
+    folder = manager.entry_folder(video_path)
+    manifest = manager.read_manifest(folder)
+    has_proxy = FrameProxy.load(folder) is not None
+    result = {"video_name": os.path.basename(video_path), "folder": folder, "frames": manifest.get("frame_count", 0)}
+    if manifest.get("complete") and (proxy_size is None or has_proxy or manifest.get("proxy_skipped")):
+        result.update(status="skip", seconds=time.perf_counter() - start)
+        return result
+    # 帧定位索引遍历数据包得到精确帧数, 容器声明的帧数可能不准
+    frame_count = SeekIndex.load_or_build(video_path, folder).frame_count
+    done = extract_frames(video_path, folder, proxy_size=None if has_proxy else proxy_size,
+                          frame_count=frame_count or None, proxy_max_mb=proxy_max_mb)
+    if frame_count and done == frame_count:
+        proxy = FrameProxy.load(folder) is not None
+        manager.mark_complete(folder, done, proxy=proxy, proxy_skipped=proxy_size is not None and not proxy)
+        status = "done"
+    else:
+        # 视频截断或者解码中途失败, 不标记完成, 下次运行时继续补写
+        status = "partial" if done > 0 else "failed"
+    result.update(status=status, frames=done, seconds=time.perf_counter() - start)
+    return result
+
+
+def prewarm_folder(video_folder: str, workers: int = 0, cache_root: Optional[str] = None,
+                   proxy: Optional[bool] = None, quota_mb: Optional[int] = None) -> list:
+    """使用进程池预热整个视频目录
+
+    Args:
+        video_folder: str;视频目录
+        workers: int;进程数, 0 表示使用 CPU 核数
+        cache_root: str;帧缓存根目录, 默认与界面使用的目录一致
+        proxy: bool;是否生成 proxy, 默认使用 Config.PROXY_ENABLED
+        quota_mb: int;磁盘配额(MB), 默认使用 Config.TEMP_CACHE_QUOTA_MB
+
+    Returns:
+        list;每个视频的处理结果
+    """
+    cache_root = cache_root or os.path.join(Config.BASE_DIR, Config.TEMP_DIR)
+    quota_mb = Config.TEMP_CACHE_QUOTA_MB if quota_mb is None else quota_mb
+    proxy = Config.PROXY_ENABLED if proxy is None else proxy
+    proxy_size = Config.PROXY_SIZE if proxy else None
+    videos = list_videos(video_folder)
+    results = []
+    total_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(prewarm_video, video_path, cache_root, proxy_size, Config.PROXY_MAX_MB): video_path
+                   for video_path in videos}
+        for i, future in enumerate(as_completed(futures), start=1):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"video_name": os.path.basename(futures[future]), "status": "failed",
+                          "frames": 0, "seconds": 0.0, "error": str(e)}
+            results.append(result)
+            speed = result["frames"] / result["seconds"] if result["seconds"] and result["status"] == "done" else 0
+            print(f"[{i}/{len(videos)}] {result['video_name']:<40} {result['status']:<7} "
+                  f"frames={result['frames']:<7} time={result['seconds']:7.2f}s  {speed:7.1f} frames/s"
+                  + (f"  error={result['error']}" if result.get("error") else ""))
+    print(f"完成 {sum(1 for r in results if r['status'] == 'done')} 个, "
+          f"部分完成 {sum(1 for r in results if r['status'] == 'partial')} 个, "
+          f"跳过 {sum(1 for r in results if r['status'] == 'skip')} 个, "
+          f"失败 {sum(1 for r in results if r['status'] == 'failed')} 个, "
+          f"总耗时 {time.perf_counter() - total_start:.1f}s")
+
+    manager = FrameCacheManager(cache_root, quota_mb=quota_mb)
+    keep = {r["folder"] for r in results if r.get("folder")}
+    manager.evict(keep=keep)
+    stats = manager.stats()
+    if manager.quota_bytes and stats["total_bytes"] > manager.quota_bytes:
+        print(f"警告: 缓存占用 {stats['total_bytes'] / 1024 ** 2:.0f} MB 超出配额 {quota_mb} MB, "
+              f"界面运行时会按最近最少使用淘汰")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帧缓存预热")
+    parser.add_argument("video_folder", help="视频目录")
+    parser.add_argument("--workers", type=int, default=0, help="进程数, 默认使用 CPU 核数")
+    parser.add_argument("--cache-root", default=None, help="帧缓存根目录, 默认与界面一致")
+    parser.add_argument("--proxy", action=argparse.BooleanOptionalAction, default=None,
+                        help="是否生成拖动预览的 proxy, 默认使用 Config.PROXY_ENABLED")
+    parser.add_argument("--quota-mb", type=int, default=None, help="磁盘配额(MB)")
+    args = parser.parse_args()
+    prewarm_folder(args.video_folder, workers=args.workers, cache_root=args.cache_root,
+                   proxy=args.proxy, quota_mb=args.quota_mb)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+""" 低分辨率的拖动预览(proxy);
+展开视频帧时把每一帧预先缩放到界面显示的大小, 以 RGB 格式连续保存在一个 uint8 数组文件中;
+拖动滑块时直接内存映射该文件, 不需要解码也不需要缩放;
+"""
+import os
+import shutil
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+PROXY_FILE_NAME = "proxy.npy"
+
+
+def proxy_shape(width: int, height: int, display_size: Tuple[int, int]) -> Tuple[int, int]:
+    """按比例缩放到显示区域内的尺寸
+
+    Args:
+        width: int;视频宽度
+        height: int;视频高度
+        display_size: tuple;显示区域的 (宽, 高)
+
+    Returns:
+        tuple;缩放后的 (宽, 高)
+    """
+    scale = min(display_size[0] / width, display_size[1] / height)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def proxy_bytes(frame_count: int, size: Tuple[int, int]) -> int:
+    """proxy 文件的大小(字节)"""
+    return frame_count * size[0] * size[1] * 3
+
+
+class ProxyWriter(object):
+    """ 逐帧写入 proxy 文件, 全部写完之后才会替换成正式文件;
+    """
+
+    @classmethod
+    def create(cls, result_folder: str, frame_count: int, size: Tuple[int, int],
+               max_mb: int = 0) -> Optional["ProxyWriter"]:
+        """预先分配 proxy 文件, 超出上限或者磁盘剩余空间不足时不生成
+
+        Args:
+            result_folder: str;帧缓存目录
+            frame_count: int;总帧数
+            size: tuple;proxy 帧的 (宽, 高)
+            max_mb: int;proxy 文件的大小上限(MB), 0 表示不限制
+
+        Returns:
+            ProxyWriter;不生成时返回 None
+        """
+        need = proxy_bytes(frame_count, size)
+        if max_mb and need > max_mb * 1024 * 1024:
+            print(f"proxy 需要 {need / 1024 ** 2:.0f} MB, 超出上限 {max_mb} MB, 不生成 proxy")
+            return None
+        # 留出一半的剩余空间给帧图片
+        free = shutil.disk_usage(result_folder).free
+        if need > free / 2:
+            print(f"proxy 需要 {need / 1024 ** 2:.0f} MB, 磁盘剩余 {free / 1024 ** 2:.0f} MB, 不生成 proxy")
+            return None
+        return cls(result_folder, frame_count, size)
+
+    def __init__(self, result_folder: str, frame_count: int, size: Tuple[int, int]):
+        """
+        Args:
+            result_folder: str;帧缓存目录
+            frame_count: int;总帧数
+            size: tuple;proxy 帧的 (宽, 高)
+        """
+        self.path = os.path.join(result_folder, PROXY_FILE_NAME)
+        self.tmp_path = f"{self.path}.tmp"
+        self.size = size
+        self.array = np.lib.format.open_memmap(self.tmp_path, mode="w+", dtype=np.uint8,
+                                               shape=(frame_count, size[1], size[0], 3))
+
+    @classmethod
+    def attach(cls, result_folder: str) -> "ProxyWriter":
+        """打开其他进程已经创建好的临时 proxy 文件, 用于多进程分段写入
+
+        Args:
+            result_folder: str;帧缓存目录
+
+        Returns:
+            ProxyWriter;只能 flush, 不能 close
+        """
+        writer = cls.__new__(cls)
+        writer.path = os.path.join(result_folder, PROXY_FILE_NAME)
+        writer.tmp_path = f"{writer.path}.tmp"
+        writer.array = np.load(writer.tmp_path, mmap_mode="r+")
+        writer.size = (writer.array.shape[2], writer.array.shape[1])
+        return writer
+
+    def flush(self) -> None:
+        """将写入的数据刷新到文件"""
+        self.array.flush()
+
+    def write(self, frame_idx: int, frame: np.ndarray) -> None:
+        """写入一帧
+
+        Args:
+            frame_idx: int;帧号
+            frame: np.ndarray;BGR 格式的原始帧
+        """
+        if frame_idx >= len(self.array):
+            return
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self.array[frame_idx])
+
+    def close(self, complete: bool) -> None:
+        """关闭文件
+
+        Args:
+            complete: bool;所有帧是否都已写入, 未完成时删除临时文件
+        """
+        self.array.flush()
+        del self.array
+        if complete:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class FrameProxy(object):
+    """ 内存映射的 proxy 文件;
+    """
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+
+    @classmethod
+    def load(cls, result_folder: str, display_size: Optional[Tuple[int, int]] = None) -> Optional["FrameProxy"]:
+        """打开帧缓存目录中的 proxy 文件
+
+        Args:
+            result_folder: str;帧缓存目录
+            display_size: tuple;显示区域的 (宽, 高), 给出时尺寸不符合的 proxy(例如按旧配置生成的)视为不存在
+
+        Returns:
+            FrameProxy;文件不存在返回 None
+        """
+        path = os.path.join(result_folder, PROXY_FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            array = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        height, width = array.shape[1:3]
+        if display_size is not None and proxy_shape(width, height, display_size) != (width, height):
+            print(f"proxy 尺寸 {width}x{height} 与显示区域不符, 重新生成: {path}")
+            return None
+        return cls(array)
+
+    def frame(self, frame_idx: int) -> np.ndarray:
+        """获取一帧 RGB 数据, 返回的是映射内存的视图, 不会复制
+
+        Args:
+            frame_idx: int;帧号
+
+        Returns:
+            np.ndarray;形状为 (高, 宽, 3)
+        """
+        return self.array[frame_idx]
+
+    def __len__(self):
+        return len(self.array)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+""" 合并后的算法结果文件(JSONL, 每行一个视频的结果)的偏移索引;
+第一次打开时流式读取一遍文件, 记录每个视频的记录在文件中的字节偏移与长度, 索引保存在结果文件旁边,
+文件大小与修改时间不变时直接复用; 查询时通过内存映射只读取并解析一条记录;
+"""
+import os
+import re
+import json
+import mmap
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.timeline import record_curve
+
+JSONL_EXT = ".jsonl"
+INDEX_SUFFIX = ".index.json"
+# 只匹配作为顶层对象第一个键的视频名, 避免为了取名字解析整条记录, 也不会误取嵌套对象中的同名字段
+NAME_PATTERN = re.compile(rb'\s*\{\s*"video_name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def video_key(video_name: str) -> str:
+    """索引中使用不带后缀的视频名, 与 GT 文件名的规则一致"""
+    return os.path.splitext(os.path.basename(video_name))[0]
+
+
+def is_result_file(path: str) -> bool:
+    """路径是否为合并后的 JSONL 结果文件"""
+    return path.endswith(JSONL_EXT) and os.path.isfile(path)
+
+
+class ResultIndex(object):
+    """ JSONL 结果文件的 视频名 -> (偏移, 长度) 索引;
+    """
+
+    def __init__(self, path: str, entries: Dict[str, List[int]]):
+        """
+        Args:
+            path: str;JSONL 结果文件路径
+            entries: dict;视频名(不含后缀) -> [字节偏移, 字节长度]
+        """
+        self.path = path
+        self.entries = entries
+        self._file = None
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def index_path(path: str) -> str:
+        return path + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, path: str) -> "ResultIndex":
+        """流式读取结果文件构建索引, 内存占用只与单条记录的大小有关
+
+        Args:
+            path: str;JSONL 结果文件路径
+
+        Returns:
+            ResultIndex;
+        """
+        entries = {}
+        skipped = 0
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                length = len(line.rstrip(b"\r\n"))
+                if length:
+                    matched = NAME_PATTERN.match(line)
+                    if matched is not None:
+                        name = json.loads(b'"' + matched.group(1) + b'"')
+                    else:
+                        # 视频名不是第一个键时解析整条记录
+                        try:
+                            name = json.loads(line).get("video_name")
+                        except (ValueError, AttributeError):
+                            name = None
+                    if name:
+                        # 同一个视频出现多次时以最后一条为准
+                        entries[video_key(name)] = [offset, length]
+                    else:
+                        skipped += 1
+                offset += len(line)
+        if skipped:
+            print(f"{path}: 跳过 {skipped} 行没有 video_name 的记录")
+        return cls(path, entries)
+
+    def save(self) -> None:
+        """保存索引, 同时记录结果文件的大小与修改时间用于判断索引是否过期"""
+        stat = os.stat(self.path)
+        data = {"size": stat.st_size, "mtime": stat.st_mtime, "entries": self.entries}
+        tmp_path = f"{self.index_path(self.path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path(self.path))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ResultIndex"]:
+        """读取已经保存的索引, 索引不存在或者结果文件已经变化时返回 None"""
+        try:
+            with open(cls.index_path(path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        if data.get("size") != stat.st_size or data.get("mtime") != stat.st_mtime:
+            return None
+        return cls(path, data["entries"])
+
+    @classmethod
+    def load_or_build(cls, path: str) -> "ResultIndex":
+        """读取索引, 不可用时重新构建并保存
+
+        Args:
+            path: str;JSONL 结果文件路径
+
+        Returns:
+            ResultIndex;
+        """
+        index = cls.load(path)
+        if index is None:
+            index = cls.build(path)
+            try:
+                index.save()
+            except OSError as e:
+                # 结果文件所在目录只读时只在内存中使用索引
+                print(f"索引保存失败: {e}")
+        return index
+
+    def __contains__(self, video_name: str) -> bool:
+        return video_key(video_name) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self) -> List[str]:
+        """索引中的视频名(不含后缀)"""
+        return sorted(self.entries)
+
+    def read(self, video_name: str) -> Optional[dict]:
+        """读取一个视频的记录
+
+        Args:
+            video_name: str;视频文件名
+
+        Returns:
+            dict;记录不存在时返回 None
+        """
+        entry = self.entries.get(video_key(video_name))
+        if entry is None:
+            return None
+        offset, length = entry
+        with self._lock:
+            if self._mmap is None:
+                self._file = open(self.path, "rb")
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            raw = self._mmap[offset:offset + length]
+        return json.loads(raw)
+
+    def curve(self, video_name: str) -> Optional[np.ndarray]:
+        """读取一个视频的逐帧曲线
+
+        Args:
+            video_name: str;视频文件名
+
+        Returns:
+            np.ndarray;记录不存在或者格式错误返回 None
+        """
+        try:
+            data = self.read(video_name)
+            return record_curve(data, video_name) if data is not None else None
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def close(self) -> None:
+        """释放内存映射"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._file.close()
+                self._mmap = None
+                self._file = None
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+""" 镜头切换检测, 用于预先给出关键帧与帧段的建议;
+顺序解码视频(不写入磁盘), 每帧缩小为灰度小图, 按块批量计算相邻帧之间的:
+    - 灰度直方图的 L1 距离(对整体亮度、内容变化敏感, 对运动不敏感)
+    - 像素平均差(对构图变化敏感)
+两者平均作为每一帧的切换分数(0~1), 分数保存在视频的缓存目录中, 再次打开视频时直接读取;
+"""
+import os
+import threading
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.intervals import empty
+
+SCORES_FILE_NAME = "scene_scores.npz"
+HIST_BINS = 16
+
+
+def _chunk_scores(frames: np.ndarray) -> np.ndarray:
+    """计算一块连续小图中相邻帧之间的分数
+
+    Args:
+        frames: np.ndarray;形状为 (n, h, w) 的 uint8 灰度小图, 第一帧为上一块的最后一帧
+
+    Returns:
+        np.ndarray;长度为 n-1 的分数
+    """
+    n = len(frames)
+    pixels = frames.reshape(n, -1)
+    # 每帧的直方图: 给每帧的 bin 加上偏移后一次 bincount
+    bins = (pixels >> 4).astype(np.int64) + (np.arange(n) * HIST_BINS)[:, None]
+    hist = np.bincount(bins.ravel(), minlength=n * HIST_BINS).reshape(n, HIST_BINS) / pixels.shape[1]
+    hist_dist = np.abs(np.diff(hist, axis=0)).sum(axis=1) / 2
+    pixel_diff = np.abs(np.diff(pixels.astype(np.int16), axis=0)).mean(axis=1) / 255
+    return ((hist_dist + pixel_diff) / 2).astype(np.float32)
+
+
+def compute_scores(video_path: str, size: Tuple[int, int] = (64, 36), chunk: int = 256,
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+    """流式计算每一帧的切换分数
+
+    Args:
+        video_path: str;视频路径
+        size: tuple;缩小后的 (宽, 高)
+        chunk: int;每次批量计算的帧数
+        progress_callback: callable;进度回调, 参数为 (已完成帧数, 总帧数)
+        cancel_event: threading.Event;置位后停止计算
+
+    Returns:
+        np.ndarray;每一帧的分数, 第 0 帧为 0, 取消时返回 None
+    """
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width, height = size
+    # 第 0 行保存上一块的最后一帧, 块之间的分数不会断开
+    buffer = np.empty((chunk + 1, height, width), dtype=np.uint8)
+    scores = [np.zeros(1, dtype=np.float32)]
+    filled = 0
+    done = 0
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            ret, frame = cap.read()
+            if not ret:
+                break
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=buffer[filled])
+            filled += 1
+            done += 1
+            if filled == chunk + 1:
+                scores.append(_chunk_scores(buffer))
+                buffer[0] = buffer[chunk]
+                filled = 1
+                if progress_callback is not None:
+                    progress_callback(done, frame_count)
+        if filled > 1:
+            scores.append(_chunk_scores(buffer[:filled]))
+    finally:
+        cap.release()
+    if progress_callback is not None:
+        progress_callback(done, max(done, frame_count))
+    return np.concatenate(scores) if done else np.zeros(0, dtype=np.float32)
+
+
+def save_scores(cache_folder: str, scores: np.ndarray) -> None:
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+    path = os.path.join(cache_folder, SCORES_FILE_NAME)
+    tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, scores=scores)
+    os.replace(tmp_path, path)
+
+
+def load_scores(cache_folder: str) -> Optional[np.ndarray]:
+    """读取缓存的分数, 不存在或者损坏返回 None"""
+    path = os.path.join(cache_folder, SCORES_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            return data["scores"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"镜头切换分数文件损坏, 重新计算: {path} {e}")
+        return None
+
+
+def load_or_compute(video_path: str, cache_folder: str, size: Tuple[int, int] = (64, 36),
+                    progress_callback: Optional[Callable[[int, int], None]] = None,
+                    cancel_event: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+    """读取缓存的分数, 不存在时计算并保存
+
+    Returns:
+        np.ndarray;每一帧的分数, 取消时返回 None
+    """
+    scores = load_scores(cache_folder)
+    if scores is None:
+        scores = compute_scores(video_path, size, progress_callback=progress_callback, cancel_event=cancel_event)
+        if scores is not None:
+            save_scores(cache_folder, scores)
+    return scores
+
+
+def detect_cuts(scores: np.ndarray, threshold: float = 0.35, min_gap: int = 12) -> np.ndarray:
+    """根据分数选出切换点
+
+    Args:
+        scores: np.ndarray;每一帧的分数
+        threshold: float;分数阈值
+        min_gap: int;两个切换点之间的最小帧数, 距离过近时保留分数高的
+
+    Returns:
+        np.ndarray;切换点的帧号(新镜头的第一帧), 升序
+    """
+    candidates = np.flatnonzero(scores >= threshold)
+    if len(candidates) == 0:
+        return candidates
+    # 按分数从高到低贪心选择, 与已选点距离过近的丢弃
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    taken = np.zeros(len(scores), dtype=bool)
+    cuts = []
+    for frame_idx in order.tolist():
+        lo, hi = max(0, frame_idx - min_gap + 1), frame_idx + min_gap
+        if not taken[lo:hi].any():
+            cuts.append(frame_idx)
+            taken[frame_idx] = True
+    return np.sort(np.asarray(cuts, dtype=np.int64))
+
+
+def cuts_to_sections(cuts: np.ndarray, frame_count: int, min_length: int = 1) -> np.ndarray:
+    """切换点 -> 镜头帧段
+
+    Args:
+        cuts: np.ndarray;切换点
+        frame_count: int;总帧数
+        min_length: int;帧数少于该值的镜头不作为候选帧段
+
+    Returns:
+        np.ndarray;[起始帧, 结束帧(包含)] 区间
+    """
+    if frame_count <= 0:
+        return empty()
+    cuts = np.asarray(cuts, dtype=np.int64)
+    starts = np.concatenate(([0], cuts[(cuts > 0) & (cuts < frame_count)]))
+    stops = np.concatenate((starts[1:], [frame_count])) - 1
+    keep = stops - starts + 1 >= min_length
+    return np.column_stack([starts[keep], stops[keep]])
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+""" 视频的帧定位索引;
+一次遍历视频的数据包(不解码)记录关键帧的位置以及每一帧的时间戳, 保存在帧缓存目录中;
+跳转到任意帧时只需要从前一个关键帧开始解码;
+"""
+import os
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+INDEX_FILE_NAME = "seek_index.npz"
+
+
+class SeekIndex(object):
+    """ 帧号 -> 前一个关键帧 / 时间戳 的映射;
+    """
+
+    def __init__(self, keyframes: np.ndarray, timestamps: np.ndarray, has_keyframes: bool = True):
+        """
+        Args:
+            keyframes: np.ndarray;升序排列的关键帧帧号
+            timestamps: np.ndarray;每一帧的显示时间戳(毫秒)
+            has_keyframes: bool;是否读取到了关键帧标记, 为 False 时 keyframes 为空, 跳转直接使用 OpenCV 的 seek
+        """
+        self.keyframes = np.asarray(keyframes, dtype=np.int64)
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.has_keyframes = has_keyframes
+
+    @property
+    def frame_count(self) -> int:
+        """索引中的精确帧数"""
+        return len(self.timestamps)
+
+    def keyframe_before(self, frame_idx: int) -> int:
+        """获取不晚于指定帧的最近关键帧
+
+        Args:
+            frame_idx: int;帧号
+
+        Returns:
+            int;关键帧帧号, 没有关键帧信息时返回 frame_idx 本身
+        """
+        if not self.has_keyframes:
+            return frame_idx
+        pos = int(np.searchsorted(self.keyframes, frame_idx, side="right")) - 1
+        return int(self.keyframes[pos]) if pos >= 0 else 0
+
+    def timestamp(self, frame_idx: int) -> float:
+        """获取帧的时间戳(毫秒)"""
+        return float(self.timestamps[frame_idx])
+
+    def save(self, path: str) -> None:
+        """保存索引文件
+
+        Args:
+            path: str;索引文件路径
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        # 先写临时文件再替换, 避免读到写了一半的索引; 临时文件名区分进程和线程, 并发构建时互不影响
+        tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keyframes=self.keyframes, timestamps=self.timestamps,
+                     has_keyframes=np.array(self.has_keyframes))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SeekIndex"]:
+        """读取索引文件
+
+        Args:
+            path: str;索引文件路径
+
+        Returns:
+            SeekIndex;文件不存在、损坏或者没有记录 has_keyframes 返回 None, 由调用方重新构建
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data["keyframes"], data["timestamps"], bool(data["has_keyframes"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def build(cls, video_path: str) -> "SeekIndex":
+        """遍历一次视频构建索引
+
+        FFmpeg 后端以原始数据包模式打开时 grab 不做解码, 可以直接读取关键帧标记;
+        当前的 OpenCV 不支持时退化为逐帧 grab, 只记录帧数与时间戳, has_keyframes 为 False;
+
+        Args:
+            video_path: str;视频路径
+
+        Returns:
+            SeekIndex;
+        """
+        key_prop = getattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME", None)
+        cap = None
+        if key_prop is not None:
+            cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+            if not cap.isOpened():
+                cap.release()
+                cap, key_prop = None, None
+        if cap is None:
+            cap = cv2.VideoCapture(video_path)
+        keyframes = []
+        timestamps = []
+        frame_idx = 0
+        try:
+            while cap.grab():
+                timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+                if key_prop is not None and (frame_idx == 0 or cap.get(key_prop)):
+                    keyframes.append(frame_idx)
+                frame_idx += 1
+        finally:
+            cap.release()
+        # 数据包按解码顺序读取, 排序后才是按显示顺序的时间戳
+        return cls(np.array(keyframes, dtype=np.int64), np.sort(np.array(timestamps, dtype=np.float64)),
+                   has_keyframes=key_prop is not None)
+
+    @classmethod
+    def load_or_build(cls, video_path: str, cache_folder: str) -> "SeekIndex":
+        """优先读取缓存目录中的索引, 不存在时构建并保存
+
+        Args:
+            video_path: str;视频路径
+            cache_folder: str;帧缓存目录
+
+        Returns:
+            SeekIndex;
+        """
+        index_path = os.path.join(cache_folder, INDEX_FILE_NAME)
+        index = cls.load(index_path)
+        if index is None:
+            index = cls.build(video_path)
+            index.save(index_path)
+        return index
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+""" 稀疏展开: 只展开部分帧用于快速浏览长视频;
+    - stride: 每隔 N 帧展开一帧
+    - window: 只展开一个时间或者帧号范围
+    - keyframe: 只展开关键帧(帧内编码, 不需要解码前面的帧)
+稀疏缓存位于视频缓存目录下的子目录中, 图片按缓存序号命名, 同时保存缓存序号 -> 原始帧号的映射,
+标注时记录的始终是原始帧号;
+"""
+import os
+import threading
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.frame_extract import frame_file_name
+from core.seek_index import SeekIndex
+
+MODES = ("all", "stride", "window", "keyframe")
+FRAME_MAP_NAME = "frame_map.npz"
+
+
+def sparse_tag(mode: str, stride: int = 10, window: Tuple[float, Optional[float]] = (0, None),
+               unit: str = "frame") -> str:
+    """稀疏缓存子目录的名称, 不同参数使用不同的目录
+
+    Args:
+        mode: str;stride / window / keyframe
+        stride: int;stride 模式的间隔帧数
+        window: tuple;window 模式的 (起始, 结束(不包含)), 结束为 None 表示到视频末尾
+        unit: str;window 的单位, frame 或者 second
+
+    Returns:
+        str;例: sparse_stride_10
+    """
+    if mode == "stride":
+        return f"sparse_stride_{stride}"
+    if mode == "window":
+        stop = "end" if window[1] is None else f"{window[1]:g}"
+        return f"sparse_window_{window[0]:g}_{stop}{'s' if unit == 'second' else ''}"
+    if mode == "keyframe":
+        return "sparse_keyframe"
+    raise ValueError(f"不支持的展开模式: {mode}")
+
+
+def plan_frames(mode: str, seek_index: SeekIndex, fps: float, stride: int = 10,
+                window: Tuple[float, Optional[float]] = (0, None), unit: str = "frame") -> np.ndarray:
+    """计算需要展开的原始帧号
+
+    Args:
+        mode: str;stride / window / keyframe
+        seek_index: SeekIndex;帧定位索引, 提供精确帧数以及关键帧
+        fps: float;视频帧率, window 的单位为秒时使用
+        stride: int;stride 模式的间隔帧数
+        window: tuple;window 模式的 (起始, 结束(不包含))
+        unit: str;window 的单位, frame 或者 second
+
+    Returns:
+        np.ndarray;升序排列的原始帧号
+
+    Raises:
+        ValueError;不支持的展开模式, 或者 keyframe 模式下索引中没有关键帧信息
+    """
+    frame_count = seek_index.frame_count
+    if mode == "stride":
+        return np.arange(0, frame_count, max(1, int(stride)), dtype=np.int64)
+    if mode == "window":
+        scale = fps if unit == "second" else 1
+        start = max(0, int(window[0] * scale))
+        stop = frame_count if window[1] is None else min(frame_count, int(window[1] * scale))
+        return np.arange(start, max(start, stop), dtype=np.int64)
+    if mode == "keyframe":
+        if not seek_index.has_keyframes:
+            # 不能退化为展开全部帧, 那样与 all 模式相同但是更慢
+            raise ValueError("当前 OpenCV 无法读取关键帧标记, 不支持只展开关键帧, 请使用 stride 或者 window 模式")
+        return seek_index.keyframes[seek_index.keyframes < frame_count].astype(np.int64)
+    raise ValueError(f"不支持的展开模式: {mode}")
+
+
+class SparseFrameMap(object):
+    """ 稀疏缓存的 缓存序号 -> 原始帧号 映射;
+    """
+
+    def __init__(self, frames: np.ndarray, complete: bool = False):
+        """
+        Args:
+            frames: np.ndarray;升序排列的原始帧号, 下标即缓存序号
+            complete: bool;所有帧是否都已经展开
+        """
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.complete = complete
+
+    def __len__(self):
+        return len(self.frames)
+
+    def to_frame(self, cache_idx: int) -> int:
+        """缓存序号 -> 原始帧号"""
+        cache_idx = min(max(0, cache_idx), len(self.frames) - 1)
+        return int(self.frames[cache_idx])
+
+    def to_cache(self, frame_idx: int) -> int:
+        """原始帧号 -> 不晚于该帧的最近一个缓存序号, 早于第一帧时返回 0"""
+        return max(0, int(np.searchsorted(self.frames, frame_idx, side="right")) - 1)
+
+    def index_of(self, frame_idx: int) -> int:
+        """原始帧号对应的缓存序号, 该帧没有展开时返回 -1"""
+        cache_idx = int(np.searchsorted(self.frames, frame_idx))
+        if cache_idx < len(self.frames) and self.frames[cache_idx] == frame_idx:
+            return cache_idx
+        return -1
+
+    def save(self, folder: str) -> None:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        path = os.path.join(folder, FRAME_MAP_NAME)
+        tmp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, frames=self.frames, complete=np.array(self.complete))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, folder: str) -> Optional["SparseFrameMap"]:
+        """读取映射文件, 不存在或者损坏返回 None"""
+        path = os.path.join(folder, FRAME_MAP_NAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(data["frames"], bool(data["complete"]))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"帧映射文件损坏, 重新生成: {path} {e}")
+            return None
+
+
+def prepare_sparse(video_path: str, entry_folder: str, mode: str, fps: float, stride: int = 10,
+                   window: Tuple[float, Optional[float]] = (0, None),
+                   unit: str = "frame") -> Tuple[str, SparseFrameMap, SeekIndex]:
+    """准备稀疏缓存目录以及帧映射, 映射与参数不一致时重新生成
+
+    Args:
+        video_path: str;视频路径
+        entry_folder: str;视频的缓存目录, 帧定位索引保存在其中
+        mode: str;stride / window / keyframe
+        fps: float;视频帧率
+        stride: int;stride 模式的间隔帧数
+        window: tuple;window 模式的 (起始, 结束(不包含))
+        unit: str;window 的单位, frame 或者 second
+
+    Returns:
+        tuple;(稀疏缓存目录, 帧映射, 帧定位索引)
+    """
+    seek_index = SeekIndex.load_or_build(video_path, entry_folder)
+    folder = os.path.join(entry_folder, sparse_tag(mode, stride, window, unit))
+    frames = plan_frames(mode, seek_index, fps, stride, window, unit)
+    frame_map = SparseFrameMap.load(folder)
+    if frame_map is None or not np.array_equal(frame_map.frames, frames):
+        if frame_map is not None:
+            # 图片按缓存序号命名, 映射变化后原来的图片不再对应
+            for name in os.listdir(folder):
+                if name.endswith(".jpg"):
+                    os.remove(os.path.join(folder, name))
+        frame_map = SparseFrameMap(frames)
+        frame_map.save(folder)
+    return folder, frame_map, seek_index
+
+
+def extract_sparse(video_path: str, folder: str, frame_map: SparseFrameMap, seek_index: Optional[SeekIndex] = None,
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event: Optional[threading.Event] = None, progress_step: int = 10) -> int:
+    """按帧映射展开, 图片按缓存序号命名
+
+    两个目标帧之间有关键帧时从该关键帧开始解码, 否则从当前位置向后 grab(只解码不转换), 不解码与目标无关的 GOP;
+
+    Args:
+        video_path: str;视频路径
+        folder: str;稀疏缓存目录
+        frame_map: SparseFrameMap;帧映射
+        seek_index: SeekIndex;帧定位索引, 为空时每次都通过 CAP_PROP_POS_FRAMES 跳转
+        progress_callback: callable;进度回调, 参数为 (已完成数量, 总数量)
+        cancel_event: threading.Event;置位后停止展开
+        progress_step: int;每展开多少帧回调一次进度
+
+    Returns:
+        int;缓存序号 0 ~ 返回值-1 的图片都已完整写入
+    """
+    total = len(frame_map)
+    cap = cv2.VideoCapture(video_path)
+    # 解码器下一次 read 返回的帧号
+    pos = 0
+    done = 0
+    try:
+        for cache_idx, frame_idx in enumerate(frame_map.frames.tolist()):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            frame_path = os.path.join(folder, frame_file_name(cache_idx))
+            if not os.path.exists(frame_path):
+                start = seek_index.keyframe_before(frame_idx) if seek_index is not None else frame_idx
+                if frame_idx < pos or start > pos:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+                    pos = start
+                while pos < frame_idx and cap.grab():
+                    pos += 1
+                if pos < frame_idx:
+                    break
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                pos = frame_idx + 1
+                cv2.imwrite(frame_path, frame)
+            done = cache_idx + 1
+            if progress_callback is not None and (done % progress_step == 0 or done == total):
+                progress_callback(done, total)
+    finally:
+        cap.release()
+    if done == total and not frame_map.complete:
+        frame_map.complete = True
+        frame_map.save(folder)
+    if progress_callback is not None and done != total:
+        progress_callback(done, total)
+    return done
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+""" 时间轴曲线的数据处理;
+帧数远多于屏幕像素时, 每个像素列只绘制该列覆盖帧的最小值与最大值(包络), 绘制开销与帧数无关;
+"""
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.gt_format import GroundTruth, find_gt_file, BINARY_EXT
+
+
+def minmax_envelope(values: np.ndarray, start: int, stop: int, buckets: int) -> Tuple[np.ndarray, np.ndarray,
+                                                                                        np.ndarray]:
+    """按像素列对 [start, stop) 范围内的数据降采样
+
+    Args:
+        values: np.ndarray;每一帧的取值
+        start: int;起始帧
+        stop: int;结束帧(不包含)
+        buckets: int;像素列数
+
+    Returns:
+        tuple;(每列的起始帧号, 每列的最小值, 每列的最大值), 帧数不超过列数时每帧一列, 最小值与最大值相同
+    """
+    start = max(0, start)
+    stop = min(len(values), stop)
+    if stop <= start or buckets <= 0:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty
+    window = values[start:stop]
+    if len(window) <= buckets:
+        frames = np.arange(start, stop)
+        return frames, window, window
+    edges = np.linspace(0, len(window), buckets + 1).astype(np.int64)[:-1]
+    edges = np.unique(edges)
+    return edges + start, np.minimum.reduceat(window, edges), np.maximum.reduceat(window, edges)
+
+
+def read_curve(folder: str, video_name: str) -> Optional[np.ndarray]:
+    """读取视频对应的 GT / 算法文件中的逐帧曲线, 区间格式的 GT 展开为逐帧掩码
+
+    Args:
+        folder: str;文件目录
+        video_name: str;视频文件名
+
+    Returns:
+        np.ndarray;文件不存在或者格式错误返回 None
+    """
+    path = find_gt_file(folder, video_name)
+    if path is None:
+        return None
+    try:
+        if path.endswith(BINARY_EXT):
+            return GroundTruth.load(path).mask().astype(np.float32)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return record_curve(data, video_name)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def record_curve(data: dict, video_name: str) -> np.ndarray:
+    """一条 GT / 算法记录中的逐帧曲线
+
+    Args:
+        data: dict;记录, 区间格式包含 runs 与 total_frames, 逐帧格式包含 y_li
+        video_name: str;视频文件名
+
+    Returns:
+        np.ndarray;float32 数组
+    """
+    if "runs" in data:
+        return GroundTruth(video_name, data["total_frames"], data["runs"]).mask().astype(np.float32)
+    # 算法结果以及原来的 GT 文件逐帧保存 y_li
+    return np.asarray(data["y_li"], dtype=np.float32)
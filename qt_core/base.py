@@ -2,291 +2,36 @@
 import os
 import sys
 import json
-import math
-from datetime import date
-from typing import List
-
-import cv2
-import pandas as pd
-from sqlalchemy import desc, asc
-from sqlalchemy.sql.operators import json_path_getitem_op
-from sqlalchemy.testing.config import db_url
-from sqlalchemy_utils import Choice
-from matplotlib import pyplot as plt
-from sqlalchemy.orm.query import Query
-from matplotlib.ticker import MaxNLocator
-from sqlalchemy.orm.session import Session
-from sqlalchemy import create_engine, Column, Integer, String
-from sqlalchemy.orm import declarative_base, sessionmaker, scoped_session
+from datetime import datetime
 
 from PyQt6.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, \
     QLineEdit, QComboBox, QSlider, QMessageBox, QTextEdit, QRadioButton, QButtonGroup, QProgressBar
 from PyQt6.QtGui import QPixmap, QImage
 from PyQt6.QtCore import Qt
 
-Base = declarative_base()
-
-
-class Config:
-    """设置配置文件;
-    """
-    QUALITY_CLASSIFY = ["优", "良", "中", "差"]
-    SCENE_CONFIG = ['三体', "地球"]
-
-    DB_NAME = "video"
-    TABLE_NAME = "video_info"
-    DB_CONFIG = {
-        "sql_lite": create_engine(f'sqlite:///{DB_NAME}.db'),
-        "mysql": "",  # 配置 MySql 的加载连接;
-    }
-
-    SESSION = scoped_session(sessionmaker(DB_CONFIG.get("sql_lite")))
-
-    # 设置视频帧展开成为的图片的缓存目录;
-    TEMP_DIR = "temp_frames"
-    # 设置项目的基本路径
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-
-class BaseDBOperateModel(object):
-    """ 数据操作类;
-    """
-
-    @classmethod
-    def get_list(cls, db_query: Query, filters: set, order: str = "-id", offset: int = 0, limit: int = 15) -> dict:
-        """分页查询数据
-
-        Args:
-            db_query: Query;数据库session绑定了查询数据库模型的查询类
-            filters: set;过滤条件
-            order: str;排序规则，例："+id,-create_time"
-            offset: int;偏移量
-            limit: int;取多少条
-
-        Returns:            dict;数据结果
-        """
-        # noinspection All
-        count_number = db_query.filter(*filters).count()
-        result = {
-            "page": {
-                "count": count_number,
-                "total_page": cls.get_page_number(count_number, limit),
-                "current_page": offset
-            },
-        }
-        filter_result = list()
-        if offset != 0:
-            offset = (offset - 1) * limit
-        if result["page"]["count"] > 0:
-            # 禁用全部检查
-            # noinspection All
-            filter_query = db_query.filter(*filters)
-            order_rules = cls.order_transfer(order)
-            # noinspection All
-            filter_result = filter_query.order_by(*order_rules).offset(offset).limit(limit).all()
-        result["list"] = [cls.to_dict(c) for c in filter_result]
-        return result
-
-    @classmethod
-    def get_all(cls, db_query: Query, filters: set, order: str = "-id", limit: int = 0) -> list:
-        """获取所有符合条件的数据（有问题，暂不使用）
-
-        Args:
-            db_query: Query;数据库session绑定了查询数据库模型的查询类
-            filters: set;过滤条件
-            order: str;排序规则，例："+id,-create_time"
-            limit: int;取多少条
-
-        Returns:
-            list;多条查询数据结果
-        """
-        if not filters:
-            result = db_query
-        else:
-            # noinspection All
-            result = db_query.filter(*filters)
-        order_rules = cls.order_transfer(order)
-        result.order_by(*order_rules)
-        if limit != 0:
-            # noinspection All
-            result = result.limit(limit)
-        # noinspection All
-        result = result.all()
-        result = [cls.to_dict(c) for c in result]
-        return result
-
-    @classmethod
-    def get_one(cls, db_query: Query, filters: set, order: str = "-id") -> dict:
-        """获取一条符合条件的数据
-
-        Args:
-            db_query: Query;数据库session绑定了查询数据库模型的查询类
-            filters: set;过滤条件
-            order: str;排序规则，例："+id,-create_time"
-
-        Returns:
-            dict;单条查询数据结果
-        """
-        # noinspection All
-        result = db_query.filter(*filters)
-        order_rules = cls.order_transfer(order)
-        # noinspection All
-        result = result.order_by(*order_rules).first()
-        if result is None:
-            return {}
-        result = cls.to_dict(result)
-        return result
-
-    @staticmethod
-    def insert(db_session: Session, model, data: dict) -> int:
-        """插入一条数据
-
-        Args:
-            db_session: Session;数据库会话连接
-            model: BaseModel;数据模型类对象
-            data: set;插入数据
-
-        Returns:
-            int;插入成功后返回的id编号
-        """
-        users = model(**data)
-        db_session.add(users)
-        db_session.flush()
-        return users.id
-
-    @staticmethod
-    def insert_all(db_session: Session, model, data: list) -> bool:
-        """插入多条数据
-
-        Args:
-            db_session: Session;数据库会话连接
-            model: BaseModel;数据模型类对象
-            data: set;插入数据
-
-        Returns:
-            bool;插入多条数据成功返回True
-        """
-        users = list()
-        for user_info in data:
-            users.append(model(**user_info))
-        db_session.add_all(users)
-        db_session.commit()
-        return True
-
-    @staticmethod
-    def update(db_query: Query, data: dict, filters: set) -> int:
-        """修改符合条件的数据
-
-        Args:
-            db_query: Query;数据库session绑定了查询数据库模型的查询类
-            data: dict;插入数据
-            filters: set;过滤条件
-
-        Returns:
-            int;修改数据成功返回的行数
-        """
-        # noinspection All
-        return db_query.filter(*filters).update(data, synchronize_session=False)
-
-    @staticmethod
-    def delete(db_query: Query, filters: set) -> int:
-        """删除符合条件的数据
-
-        Args:
-            db_query: Query;数据库session绑定了查询数据库模型的查询类
-            filters: set;过滤条件
-
-        Returns:
-             int;修改数据成功返回的行数
-        """
-        # noinspection All
-        return db_query.filter(*filters).delete(synchronize_session=False)
-
-    @staticmethod
-    def get_count(db_query: Query, filters: set, field=False) -> int:
-        """获取符合条件的数据数量
-
-        Args:
-            db_query: Query;数据库session绑定了查询数据库模型的查询类
-            filters: set;过滤条件
-            field: bool;是否指定字段计数
-
-        Returns:
-            int;
-        """
-        if field:
-            # noinspection All
-            return db_query.filter(*filters).scalar()
-        else:
-            # noinspection All
-            return db_query.filter(*filters).count()
-
-    @staticmethod
-    def get_page_number(count: int, page_size: int) -> int:
-        """获取总页数
-
-        Args:
-            count: int;数据总数
-            page_size: int;分页大小
-
-        Returns:
-            int;总页数
-        """
-        page_size = abs(page_size)
-        if page_size != 0:
-            total_page = math.ceil(count / page_size)
-        else:
-            total_page = math.ceil(count / 5)
-        return total_page
-
-    @staticmethod
-    def order_transfer(order: str):
-        """order排序规则转换
-
-        Args:
-            order: str;排序规则，例："+id,-create_time"
-
-        Returns:
-            list;排序规则列表
-        """
-        order_array = order.split(",")
-        order_rules = list()
-        for item in order_array:
-            sort_rule = item[0]
-            if sort_rule == "-":
-                order_rules.append(desc(item[1:]))
-            else:
-                order_rules.append(asc(item[1:]))
-        return order_rules
-
-    @staticmethod
-    def to_dict(model_obj):
-        if not hasattr(model_obj, "_fields"):
-            only = model_obj.__table__.columns
-            result = {field.name: (
-                getattr(model_obj, field.name).value if isinstance(getattr(model_obj, field.name), Choice) else getattr(
-                    model_obj, field.name)) for field in only}
-        else:
-            only = model_obj.keys()
-            result = {field: (
-                getattr(model_obj, field).value if isinstance(getattr(model_obj, field), Choice) else getattr(
-                    model_obj, field)) for field in only}
-        return result
-
-
-class VideoInfo(Base):
-    """构建数据库的信息;
-    """
-    __tablename__ = "videoinfo"
-    id = Column(Integer, primary_key=True, autoincrement=True, comment="编号")
-    video_name = Column(String(255), nullable=False, unique=True, comment="视频名称")
-    category = Column(String(255), nullable=True, comment="视频类别")
-    theme = Column(String(255), nullable=True, comment="视频主题")
-    key_frames = Column(String(255), nullable=True, comment="关键帧")
-    section_frames = Column(String(255), nullable=True, comment="帧段")
-    quality_category = Column(String(255), nullable=True, comment="视频质量")
-    status = Column(Integer, nullable=True, comment="状态")
-    notes = Column(String(255), nullable=True)
+# 将项目根目录加入搜索路径, 直接运行本文件时也可以导入 core 包
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.config import Config
+from core.cache_manager import FrameCacheManager
+from core.timeline import read_curve
+from core.display import DisplayPipeline
+from core.frame_provider import FrameProvider
+from core.prefetch import NeighborPrefetcher
+from core.proxy import FrameProxy
+from core.gt_format import GroundTruth
+from core.intervals import parse_sections, clip, format_sections
+from qt_core.render_scheduler import RenderScheduler
+from qt_core.timeline import TimelineWidget
+from qt_core.player import PlaybackController
+from qt_core.workers import FrameExtractWorker, SeekIndexWorker, EvaluateWorker, ResultIndexWorker, \
+    SparseExtractWorker, SceneDetectWorker, ExportWorker
+from core.scene_detect import load_scores, detect_cuts, cuts_to_sections
+from core.result_index import is_result_file
+from core.evaluate import format_summary
+from core.models import Base, BaseDBOperateModel, VideoInfo
+from core.media_probe import MediaProbe
+from core.export import default_export_path
+from core.db import write_with_retry
 
 
 class QtMain(QWidget):
@@ -303,7 +48,7 @@ class QtMain(QWidget):
         self.quality_text = None
         self.select_frame = None
         self.alg_path_edit = None
-        self.alg_image_label = None
+        self.timeline = None
         self.status_combobox = None
         self.combox_classify = None
         self.video_path_edit = None
@@ -317,11 +62,58 @@ class QtMain(QWidget):
         self.video_files = []
         self.frames = []
         self.frame_files = []
+        # 当前视频的帧提供者, 按需解码
+        self.frame_provider = None
+        # 拖动滑块时使用的低分辨率 proxy
+        self.frame_proxy = None
+        # 帧显示的缩放与颜色转换, 缓冲区在多次显示之间复用
+        self.display_pipeline = DisplayPipeline(Config.DISPLAY_SIZE)
+        self.shown_frames = 0
+        # 滑块拖动时合并渲染请求, 丢弃过时的帧
+        self.render_scheduler = RenderScheduler(lambda idx: self.show_frame(idx, use_proxy=True),
+                                                max_fps=Config.RENDER_MAX_FPS, parent=self)
+        # 按原始帧率播放, 帧画面与时间轴使用同一个播放时钟
+        self.player = PlaybackController(self.play_render, parent=self)
+        self.player.stopped.connect(self.playback_stopped)
+        self.btn_play = None
+        # 后台展开视频帧的线程以及进度条
+        self.extract_worker = None
+        # 已经取消但还没有退出的展开线程, 退出前保持引用, 关闭窗口时等待
+        self.retired_workers = []
+        self.index_worker = None
+        self.progress = None
+        # 展开模式, 稀疏模式下滑块的位置为缓存序号, 通过 frame_map 转换为原始帧号
+        self.extract_mode = Config.EXTRACT_MODE
+        self.extract_mode_combobox = None
+        self.frame_map = None
+        # 镜头切换检测的线程以及当前视频的切换分数
+        self.scene_worker = None
+        self.scene_scores = None
+        self.btn_scene = None
+        # 当前视频缓存的元数据(时长、精确帧数等), 没有探测过时为 None
+        self.media_info = None
+        # 导出标注数据的线程以及按钮
+        self.export_worker = None
+        self.btn_csv = None
+        # 批量评估算法结果的线程
+        self.evaluate_worker = None
+        # 合并后的 JSONL 算法结果文件的偏移索引以及构建索引的线程
+        self.result_index = None
+        self.result_index_worker = None
 
         # set temp directory
         self.temp_dir = Config.TEMP_DIR
         if not os.path.exists(self.temp_dir):
             os.makedirs(self.temp_dir)
+        self.cache_manager = FrameCacheManager(os.path.join(Config.BASE_DIR, self.temp_dir),
+                                               quota_mb=Config.TEMP_CACHE_QUOTA_MB)
+        # 后台预取前后相邻的视频
+        self.prefetcher = NeighborPrefetcher(self.cache_manager, self.get_video_database,
+                                             depth=Config.PREFETCH_DEPTH,
+                                             warm_frames=Config.PREFETCH_FRAMES,
+                                             budget_mb=Config.PREFETCH_CACHE_MB)
+        # 视频元数据缓存, 与帧缓存共用文件指纹
+        self.media_probe = MediaProbe(fingerprint_func=self.cache_manager.fingerprint)
 
         # init Qt Main
         self.init_ui()
@@ -388,12 +180,19 @@ class QtMain(QWidget):
         self.slider.setMaximum(len(self.frames) - 1)  # TODO
         self.slider.setValue(0)
         self.slider.sliderMoved.connect(self.slider_moved)
+        self.slider.sliderReleased.connect(self.slider_released)
         # self.slider.valueChanged.connect(self.update_frame)  # 设置改变函数
         # 添加 QLabel 显示 当前的帧号
         self.video_frame_number = QLabel("当前帧号: 0")
         self.video_frame_number.setStyleSheet("color: red;")
         left_vbox.addWidget(self.video_frame_number)
-        left_vbox.addWidget(self.slider)
+        # 播放按钮与滑块放在同一行
+        slider_layout = QHBoxLayout()
+        self.btn_play = QPushButton("播放", self)
+        self.btn_play.clicked.connect(self.click_btn_play)
+        slider_layout.addWidget(self.btn_play)
+        slider_layout.addWidget(self.slider)
+        left_vbox.addLayout(slider_layout)
 
         # #设置右半部分
         page_hbox = QHBoxLayout()
@@ -442,28 +241,31 @@ class QtMain(QWidget):
 
         progress = QProgressBar()
         progress.setMinimum(0)
-        progress.setMinimum(100)
+        progress.setMaximum(100)
+        progress.setValue(0)
+        self.progress = progress
         btn_reload = QPushButton("重新加载")
+        # 展开模式, 长视频可以先稀疏展开快速浏览
+        self.extract_mode_combobox = QComboBox(self)
+        for label, mode in (("全部帧", "all"), (f"每{Config.EXTRACT_STRIDE}帧", "stride"), ("时间窗口", "window"),
+                            ("关键帧", "keyframe")):
+            self.extract_mode_combobox.addItem(label, mode)
+        self.extract_mode_combobox.setCurrentIndex(max(0, self.extract_mode_combobox.findData(self.extract_mode)))
+        self.extract_mode_combobox.currentIndexChanged.connect(self.change_extract_mode)
 
         load_hbox.addWidget(radio_video)
         load_hbox.addWidget(radio_alg)
         load_hbox.addWidget(radio_gt)
         load_hbox.addWidget(radio_all)
+        load_hbox.addWidget(self.extract_mode_combobox)
         load_hbox.addWidget(progress)
         load_hbox.addWidget(btn_reload)
         right_vbox.addLayout(load_hbox)
 
-        # todo 此处编写的算法图片的显示类, 需要再次实现相关的图片定位
-        alg_image = QLabel(self)
-        alg_image.setAlignment(Qt.AlignmentFlag.AlignCenter)  # 设置居中显示
-        # Demo 部分后期更改
-        q_img_alg = QImage(r"D:\code\pythoncode\pro_qt\images\sword.png")
-        # 使用 scaled 方法缩放图像
-        scaled_image_alg = q_img_alg.scaled(520, 200, Qt.AspectRatioMode.KeepAspectRatio)
-        pixmap_alg = QPixmap.fromImage(scaled_image_alg)
-        alg_image.setPixmap(pixmap_alg)
-        self.alg_image_label = alg_image
-        right_vbox.addWidget(alg_image)
+        # GT / 算法曲线的时间轴, 滚轮缩放, 双击恢复, 单击跳转到对应帧
+        self.timeline = TimelineWidget(self)
+        self.timeline.frameSelected.connect(self.timeline_selected)
+        right_vbox.addWidget(self.timeline)
 
         # TODO 此处实现输入框组合
         input_hbox = QHBoxLayout()
@@ -518,16 +320,22 @@ class QtMain(QWidget):
         btn_target = QPushButton("标记")
         btn_submit = QPushButton("提交")
         btn_update = QPushButton("更新")
-        btn_csv = QPushButton("输出 CSV")
+        self.btn_csv = QPushButton("输出 CSV")
         btn_version = QPushButton("版本信息")
+        btn_cache = QPushButton("缓存信息")
+        self.btn_scene = QPushButton("镜头检测")
+        self.btn_scene.clicked.connect(self.click_btn_scene)
+        btn_cache.clicked.connect(self.click_btn_cache)
         btn_version.clicked.connect(self.click_btn_version)
         btn_target.clicked.connect(self.click_btn_target)
         btn_submit.clicked.connect(self.click_btn_submit)
-        btn_csv.clicked.connect(self.click_btn_csv)
+        self.btn_csv.clicked.connect(self.click_btn_csv)
         btn_hbox.addWidget(btn_target)
         btn_hbox.addWidget(btn_submit)
         btn_hbox.addWidget(btn_update)
-        btn_hbox.addWidget(btn_csv)
+        btn_hbox.addWidget(self.btn_csv)
+        btn_hbox.addWidget(self.btn_scene)
+        btn_hbox.addWidget(btn_cache)
         btn_hbox.addWidget(btn_version)
         right_vbox.addLayout(btn_hbox)
 
@@ -567,7 +375,7 @@ class QtMain(QWidget):
 
     def click_btn_alg(self):
         """ implement select alg json files directory;
-
+        合并后的 JSONL 结果文件可以直接在输入框中填写文件路径.
         """
         folder_path = QFileDialog.getExistingDirectory(self, "选择文件夹")
         if folder_path:
@@ -634,8 +442,9 @@ class QtMain(QWidget):
         if folder:
             # 视频目录不为空
             self.video_files = [os.path.join(folder, f) for f in os.listdir(folder) if
-                                f.endswith((".mp4", ".avi", ".mov"))]
+                                f.endswith(Config.VIDEO_EXTENSIONS)]
             if self.video_files:
+                self.prefetcher.clear()
                 self.current_video_idx = 0
                 # 加载目录的第一个视频的
                 self.load_current_video()
@@ -651,12 +460,17 @@ class QtMain(QWidget):
             video_path = self.video_files[self.current_video_idx]
             video_name = os.path.basename(video_path)
             self.video_name.setText(video_name)
+            # 已经预取的视频直接使用预取的数据库记录以及解码器
+            prefetched = self.prefetcher.take(video_path)
             # 此处需要加载判断视频数据是否已经存在
             session = Config.SESSION()
             try:
-                db_query = session.query(VideoInfo)
-                video_exists = BaseDBOperateModel.get_one(db_query=db_query,
-                                                          filters={VideoInfo.video_name == video_name})
+                if prefetched is not None:
+                    video_exists = prefetched.record
+                else:
+                    db_query = session.query(VideoInfo)
+                    video_exists = BaseDBOperateModel.get_one(db_query=db_query,
+                                                              filters={VideoInfo.video_name == video_name})
                 print(video_exists)
                 if video_exists:
                     # 视频存在进行数据的显示,根据选择的模式进行设置;
@@ -685,14 +499,37 @@ class QtMain(QWidget):
             finally:
                 session.close()
 
-            video_name = os.path.basename(video_path)
-            temp_dir = os.path.join(Config.BASE_DIR, self.temp_dir)
-            if video_name in os.listdir(temp_dir):
-                self.frame_files = [i for i in os.listdir(os.path.join(temp_dir, video_name[0:-4]))]
+            # 切换视频时取消上一个视频的展开任务并释放解码器, 新视频的帧在 show_frame 时按需解码
+            self.stop_extract()
+            self.release_provider()
+            if prefetched is not None:
+                result_folder = prefetched.folder
+                self.frame_provider = prefetched.provider
+                self.frame_provider.cache.budget_bytes = Config.FRAME_CACHE_MB * 1024 * 1024
             else:
-                self.frame_files = self.extract_frames(video_path)
-            self.slider.setMaximum(len(self.frame_files) - 1)
+                # 缓存目录按视频内容的指纹区分, 同名的不同视频不会冲突
+                result_folder = self.cache_manager.entry_folder(video_path)
+                try:
+                    self.frame_provider = FrameProvider(video_path, budget_mb=Config.FRAME_CACHE_MB,
+                                                        cache_folder=result_folder)
+                except IOError as e:
+                    QMessageBox.warning(self, "警告", str(e))
+                    return
+            self.cache_manager.touch(result_folder)
+            # 探测过的视频直接使用精确帧数, 不依赖容器声明的帧数
+            self.media_info = self.media_probe.lookup(video_path)
+            if self.media_info is not None and self.media_info.get("frame_count"):
+                self.frame_provider.frame_count = self.media_info["frame_count"]
+            # 已经检测过的视频直接显示缓存的镜头切换分数
+            self.scene_scores = load_scores(result_folder)
+            self.update_slider_range()
+            self.update_curves(reset_window=True)
             self.show_frame(0)
+            if self.frame_provider.seek_index is None or self.media_info is None:
+                self.start_seek_index(video_path, result_folder)
+            self.start_extract(video_path, result_folder)
+            # 当前视频加载完成后再预取相邻的视频, 用户跳到别处时不在范围内的预取会被取消
+            self.prefetcher.schedule(self.video_files, self.current_video_idx)
 
     def load_alg_folder(self):
         """单独加载算法的图片;
@@ -701,7 +538,9 @@ class QtMain(QWidget):
         video_folder = self.video_path_edit.text()
         alg_folder = self.alg_path_edit.text()
         if video_folder and alg_folder:
-            pass
+            # JSONL 结果文件的索引还在构建时, 构建完成后会自动刷新曲线
+            if "alg" not in self.update_curves() and self.result_index_worker is None:
+                QMessageBox.warning(self, "警告", "视频没有对应的算法 json 文件;")
         else:
             QMessageBox.information(self, "警告", "视频或者算法的路径为空.")
 
@@ -714,22 +553,77 @@ class QtMain(QWidget):
         # 获取输入框中的目录的值
         video_folder = self.video_path_edit.text()
         gt_folder = self.gt_path_edit.text()
-        video_name = self.video_name.text()
-        gt_path = os.path.join(gt_folder, f"{video_name[0:-4]}.json")
         if video_folder and gt_folder:
-            # 获取数据库中的信息
-            try:
-                with open(gt_path, "r", encoding="utf-8") as f:
-                    gt_data = json.load(f)
-            except FileExistsError as e:
-                QMessageBox.warning(self, "警告", "视频没有对应的 json 文件;")
-            # 调用绘图的方法
-            x_li = [i for i in range(gt_data.get("total_frames"))]
-            for i in range(gt_data.get("total_frames")):
-                self.draw_png(x=x_li, y=gt_data.get("y_li"), frame_idx=i)
+            if "gt" not in self.update_curves():
+                QMessageBox.warning(self, "警告", "视频没有对应的 GT 文件;")
         else:
             QMessageBox.information(self, "警告", "视频或者算法的路径为空.")
 
+    def update_curves(self, reset_window=False):
+        """ 读取当前视频的 GT / 算法曲线并显示到时间轴, 路径为空或者文件不存在的曲线跳过;
+
+        Args:
+            reset_window: bool;时间轴恢复显示全部帧, 加载新视频时使用, 其他刷新保留用户的缩放
+
+        Returns:
+            dict;成功读取的曲线名称 -> 数组
+        """
+        video_name = self.video_name.text().strip()
+        curves = {}
+        gt_folder = self.gt_path_edit.text()
+        for name, values in (("gt", read_curve(gt_folder, video_name) if gt_folder else None),
+                             ("alg", self.read_alg_curve(video_name)), ("scene", self.scene_scores)):
+            if values is not None:
+                curves[name] = values
+        total_frames = self.frame_provider.frame_count if self.frame_provider is not None else 0
+        self.timeline.set_curves(total_frames, curves, reset=reset_window)
+        self.timeline.set_cursor(self.current_frame_idx)
+        return curves
+
+    def read_alg_curve(self, video_name):
+        """ 读取算法曲线, 算法路径可以是每个视频一个 json 的目录, 也可以是合并后的 JSONL 结果文件;
+        JSONL 文件的索引没有准备好时在后台构建, 本次返回 None;
+        """
+        alg_path = self.alg_path_edit.text()
+        if not alg_path:
+            return None
+        if not is_result_file(alg_path):
+            return read_curve(alg_path, video_name)
+        if self.result_index is None or self.result_index.path != alg_path:
+            self.start_result_index(alg_path)
+            return None
+        return self.result_index.curve(video_name)
+
+    def start_result_index(self, path):
+        """ 在后台读取或者构建 JSONL 结果文件的索引;
+        """
+        if self.result_index_worker is not None:
+            if self.result_index_worker.path == path:
+                return
+            # 路径已经变化, 丢弃正在构建的旧索引
+            self.result_index_worker.ready.disconnect()
+        worker = ResultIndexWorker(path, parent=self)
+        worker.ready.connect(self.update_result_index)
+        self.result_index_worker = worker
+        worker.start()
+
+    def update_result_index(self, index):
+        """ 索引准备好之后刷新曲线;
+        """
+        self.result_index_worker = None
+        if self.result_index is not None:
+            self.result_index.close()
+        self.result_index = index
+        print(f"算法结果索引: {index.path} 共 {len(index)} 个视频")
+        self.update_curves()
+
+    def timeline_selected(self, frame_idx):
+        """ 点击时间轴跳转到对应帧;
+        """
+        self.player.stop()
+        self.slider.setValue(self.frame_to_slider(frame_idx))
+        self.show_frame(frame_idx)
+
     def load_all_folder(self):
         """ 加载全部的选项;
         """
@@ -737,108 +631,315 @@ class QtMain(QWidget):
         alg_folder = self.alg_path_edit.text()
         gt_folder = self.gt_path_edit.text()
         if video_folder and gt_folder and alg_folder:
-            pass
+            self.load_video_folder()
+            self.update_curves()
+            self.start_evaluate(gt_folder, alg_folder)
         else:
             QMessageBox.information(self, "警告", "视频或者算法或gt的路径为空.")
 
-    def extract_frames(self, video_path):
+    def start_evaluate(self, gt_folder, alg_folder):
+        """ 在后台批量评估整个目录的算法结果, 结果表格保存到临时目录;
+        """
+        if self.evaluate_worker is not None and self.evaluate_worker.isRunning():
+            QMessageBox.information(self, "提示", "正在评估, 请稍候.")
+            return
+        out_path = os.path.join(Config.BASE_DIR, self.temp_dir,
+                                f"evaluate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        worker = EvaluateWorker(gt_folder, alg_folder, out_path, workers=Config.EVAL_WORKERS,
+                                threshold=Config.EVAL_THRESHOLD, iou_threshold=Config.EVAL_IOU, parent=self)
+        worker.finished_summary.connect(self.evaluate_finished)
+        self.evaluate_worker = worker
+        worker.start()
+
+    def evaluate_finished(self, summary):
+        """ 显示批量评估的汇总结果;
         """
+        worker = self.evaluate_worker
+        self.evaluate_worker = None
+        if isinstance(summary, str):
+            QMessageBox.warning(self, "警告", f"评估失败: {summary}")
+            return
+        text = format_summary(summary)
+        print(text)
+        QMessageBox.information(self, "评估结果", f"{text}\n结果已保存: {worker.out_path}")
 
-        Args:
-            video_path:
+    def start_extract(self, video_path, result_folder):
+        """ 在后台线程中展开视频帧, 已经展开完成的视频直接使用缓存;
+        """
+        if self.extract_mode != "all":
+            self.start_sparse_extract(video_path, result_folder)
+            return
+        manifest = self.cache_manager.read_manifest(result_folder)
+        self.frame_proxy = FrameProxy.load(result_folder, Config.PROXY_SIZE)
+        if manifest.get("complete") and (self.frame_proxy is not None or not Config.PROXY_ENABLED
+                                         or manifest.get("proxy_skipped")):
+            self.frame_provider.extracted = manifest.get("frame_count", 0)
+            self.progress.setValue(100)
+            return
+        self.progress.setValue(0)
+        # proxy 已经存在时不再重复生成
+        proxy_size = Config.PROXY_SIZE if Config.PROXY_ENABLED and self.frame_proxy is None else None
+        frame_count = self.media_info.get("frame_count") if self.media_info is not None else None
+        worker = FrameExtractWorker(video_path, result_folder, proxy_size=proxy_size,
+                                    workers=Config.EXTRACT_WORKERS, frame_count=frame_count, parent=self)
+        worker.progress.connect(self.update_extract_progress)
+        worker.finished.connect(self.extract_finished)
+        self.extract_worker = worker
+        worker.start()
+
+    def start_sparse_extract(self, video_path, result_folder):
+        """ 在后台线程中按稀疏模式展开, 已经展开的部分会直接跳过;
+        """
+        self.progress.setValue(0)
+        self.frame_proxy = FrameProxy.load(result_folder, Config.PROXY_SIZE)
+        worker = SparseExtractWorker(video_path, result_folder, self.extract_mode, self.frame_provider.fps,
+                                     stride=Config.EXTRACT_STRIDE, window=Config.EXTRACT_WINDOW,
+                                     unit=Config.EXTRACT_WINDOW_UNIT, parent=self)
+        worker.planned.connect(self.sparse_planned)
+        worker.failed.connect(lambda message: QMessageBox.warning(self, "警告", message))
+        worker.progress.connect(self.update_extract_progress)
+        worker.finished.connect(self.extract_finished)
+        self.extract_worker = worker
+        worker.start()
+
+    def sparse_planned(self, folder, frame_map):
+        """ 稀疏展开的帧映射准备完成, 滑块改为按缓存序号移动;
+        """
+        if self.sender() is not self.extract_worker or self.frame_provider is None:
+            return
+        self.frame_provider.set_sparse(folder, frame_map)
+        self.frame_map = frame_map if len(frame_map) else None
+        self.update_slider_range()
+        self.slider.setValue(self.frame_to_slider(self.current_frame_idx))
 
-        Returns:
+    def change_extract_mode(self):
+        """ 切换展开模式, 当前视频按新的模式重新展开;
+        """
+        self.extract_mode = self.extract_mode_combobox.currentData()
+        if self.frame_provider is None:
+            return
+        self.stop_extract()
+        self.frame_map = None
+        self.frame_provider.frame_map = None
+        self.update_slider_range()
+        self.start_extract(self.frame_provider.video_path, self.frame_provider.cache_folder)
+
+    def update_slider_range(self):
+        """ 滑块范围, 稀疏模式下为缓存数量, 否则为视频帧数;
+        """
+        if self.frame_map is not None:
+            self.slider.setMaximum(len(self.frame_map) - 1)
+        elif self.frame_provider is not None:
+            self.slider.setMaximum(self.frame_provider.frame_count - 1)
+
+    def slider_to_frame(self, position):
+        """ 滑块位置 -> 原始帧号;
+        """
+        return self.frame_map.to_frame(position) if self.frame_map is not None else position
+
+    def frame_to_slider(self, frame_idx):
+        """ 原始帧号 -> 滑块位置, 稀疏模式下为不晚于该帧的最近一个缓存序号;
+        """
+        return self.frame_map.to_cache(frame_idx) if self.frame_map is not None else frame_idx
+
+    def start_seek_index(self, video_path, cache_folder):
+        """ 在后台线程中加载帧定位索引, 用于滑块跳转, 同时把视频元数据写入缓存;
+        """
+        worker = SeekIndexWorker(video_path, cache_folder, media_probe=self.media_probe, parent=self)
+        worker.ready.connect(self.update_seek_index)
+        self.index_worker = worker
+        worker.start()
 
+    def update_seek_index(self, seek_index):
+        """ 帧定位索引加载完成;
         """
-        # 缓存目录不存在的时候进行创建
-        video_name = os.path.basename(video_path)[0:-4]
-        result_folder = os.path.join(Config.BASE_DIR, os.path.join(self.temp_dir, video_name))
-        if not os.path.exists(result_folder):
-            os.makedirs(result_folder)
-        cap = cv2.VideoCapture(video_path)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        frames = []
-        for i in range(frame_count):
-            ret, frame = cap.read()
-            if ret:
-                frame_path = os.path.join(result_folder, f"frame_{i:04d}.jpg")
-                cv2.imwrite(frame_path, frame)
-                frames.append(frame_path)
-        cap.release()
-        return frames
-
-    def show_frame(self, frame_idx):
-        """显示指定帧"""
-        # 获取视频的名字
-        video_name = self.video_name.text().strip()[0:-4]
-        img_folder = os.path.join(Config.BASE_DIR, os.path.join(self.temp_dir, video_name))  # 获取到图片文件的目录
-        if 0 <= frame_idx < len(self.frame_files):
+        if self.sender() is not self.index_worker or self.frame_provider is None:
+            return
+        self.frame_provider.set_seek_index(seek_index)
+        self.update_slider_range()
+
+    def release_provider(self):
+        """ 释放当前视频的解码器, 并输出跳转耗时的统计;
+        """
+        self.player.stop()
+        self.stop_scene_detect()
+        self.scene_scores = None
+        self.media_info = None
+        if self.index_worker is not None:
+            self.index_worker.wait()
+            self.index_worker = None
+        if self.frame_provider is not None:
+            if self.frame_provider.jump_stats.summary()["count"]:
+                print(self.frame_provider.jump_stats)
+            if self.shown_frames:
+                print(self.display_pipeline.timer.report())
+            if self.render_scheduler.requested:
+                print(self.render_scheduler.report())
+            self.display_pipeline.timer.reset()
+            self.render_scheduler.reset()
+            self.shown_frames = 0
+            self.frame_provider.release()
+            self.frame_provider = None
+        self.frame_proxy = None
+        self.frame_map = None
+
+    def extract_finished(self):
+        """ 展开结束后记录缓存信息, 加载生成的 proxy, 并按配额淘汰旧的缓存;
+        """
+        worker = self.sender()
+        if worker is not self.extract_worker or self.frame_provider is None:
+            return
+        folder = self.frame_provider.cache_folder
+        self.frame_proxy = FrameProxy.load(folder, Config.PROXY_SIZE)
+        if worker.is_cancelled() or worker.done == 0:
+            return
+        if isinstance(worker, SparseExtractWorker):
+            # 稀疏缓存的完成状态记录在帧映射中, 不修改完整缓存的 manifest
+            self.cache_manager.evict(keep={folder} | self.prefetcher.folders())
+            return
+        self.cache_manager.mark_complete(folder, worker.done, proxy=self.frame_proxy is not None,
+                                         proxy_skipped=worker.proxy_size is not None and self.frame_proxy is None)
+        removed = self.cache_manager.evict(keep={folder} | self.prefetcher.folders())
+        if removed:
+            print("淘汰缓存:", removed)
+
+    def stop_extract(self):
+        """ 取消正在运行的展开任务;
+        """
+        if self.extract_worker is not None:
+            # 不在界面线程中等待, 线程在当前帧写完后自行退出
+            worker, self.extract_worker = self.extract_worker, None
+            worker.cancel()
+            worker.progress.disconnect()
+            worker.finished.disconnect()
+            if isinstance(worker, SparseExtractWorker):
+                worker.planned.disconnect()
+                worker.failed.disconnect()
+            self.retired_workers.append(worker)
+            worker.finished.connect(lambda: self.retire_finished(worker))
+            if not worker.isRunning():
+                self.retire_finished(worker)
+
+    def retire_finished(self, worker):
+        """ 已经取消的展开线程退出;
+        """
+        if worker in self.retired_workers:
+            self.retired_workers.remove(worker)
+
+    def update_extract_progress(self, done, total):
+        """ 展开进度更新, 已展开的帧交给帧提供者直接读取;
+        """
+        # 已经取消的任务仍可能有排队中的信号, 直接忽略
+        if self.sender() is not self.extract_worker:
+            return
+        if self.frame_provider is not None:
+            if isinstance(self.extract_worker, SparseExtractWorker):
+                self.frame_provider.sparse_extracted = done
+            else:
+                self.frame_provider.extracted = done
+        self.progress.setValue(int(done * 100 / total) if total else 0)
+
+    def show_frame(self, frame_idx, use_proxy=False):
+        """显示指定帧
+
+        Args:
+            frame_idx: int;帧号
+            use_proxy: bool;拖动过程中使用低分辨率 proxy, 不解码也不缩放
+        """
+        if self.frame_provider is None:
+            return
+        timer = self.display_pipeline.timer
+        if use_proxy and self.frame_proxy is not None and 0 <= frame_idx < len(self.frame_proxy):
             self.current_frame_idx = frame_idx
-            # 设置当前的帧号
             self.video_frame_number.setText(f"当前帧号: {frame_idx}")
+            with timer.stage("decode"):
+                image = self.frame_proxy.frame(frame_idx)
+            # proxy 已经是显示尺寸, 内存映射的数据直接显示
+            self.paint_frame(image)
+            self.timeline.set_cursor(frame_idx)
+            return
+        if 0 <= frame_idx < self.frame_provider.frame_count:
+            # 使用内存加载的方式将数据加载到图形界面上, 不经过磁盘
+            with timer.stage("decode"):
+                image = self.frame_provider.get_frame(frame_idx)
+            if image is None:
+                return
+            self.current_frame_idx = frame_idx
+            # 设置当前的帧号以及最近一次跳转的耗时
+            jump_ms = self.frame_provider.jump_stats.last
+            self.video_frame_number.setText(f"当前帧号: {frame_idx}  跳转耗时: {jump_ms:.1f} ms")
+            # 缩放与颜色转换在复用的缓冲区中完成, 不再使用 QImage.scaled
+            self.paint_frame(self.display_pipeline.prepare(image))
+            self.timeline.set_cursor(frame_idx)
 
-            # 方式一: 使用内存加载的方式将数据加载到, 图形的界面上面;
-            # image = cv2.imread(self.frame_files[frame_idx])
-            # image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            # h, w, ch = image.shape
-            # bytes_per_line = ch * w
-            # q_img = QImage(image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            # self.video_label.setPixmap(QPixmap.fromImage(q_img))
+    def paint_frame(self, image):
+        """将 RGB 数组显示到界面上, QImage 直接引用数组内存, 只在生成 QPixmap 时复制一次
 
-            # 方式二: 加载完成图片,从图片中一次读取
-            img_path = os.path.join(img_folder, f"frame_{frame_idx:04d}.jpg")
-            q_img = QImage(img_path)  # 读取文件夹
-            scaled_image = q_img.scaled(520, 725, Qt.AspectRatioMode.KeepAspectRatio)
-            self.video_label.setPixmap(QPixmap.fromImage(scaled_image))
+        Args:
+            image: np.ndarray;形状为 (高, 宽, 3) 的连续 RGB 数组
+        """
+        with self.display_pipeline.timer.stage("paint"):
+            h, w, ch = image.shape
+            q_img = QImage(image.data, w, h, ch * w, QImage.Format.Format_RGB888)
+            self.video_label.setPixmap(QPixmap.fromImage(q_img))
+        self.shown_frames += 1
+        if Config.DISPLAY_TIMING_EVERY and self.shown_frames % Config.DISPLAY_TIMING_EVERY == 0:
+            print(self.display_pipeline.timer.report())
 
     def slider_moved(self, position):
-        """滑块移动事件处理"""
-        self.show_frame(position)
+        """滑块移动事件处理, 交给调度器合并后再渲染"""
+        self.player.stop()
+        self.render_scheduler.request(self.slider_to_frame(position))
+
+    def click_btn_play(self):
+        """播放 / 暂停"""
+        if self.player.is_playing:
+            self.player.stop()
+            return
+        if self.frame_provider is None:
+            return
+        start_idx = self.current_frame_idx
+        # 已经在最后一帧时从头播放
+        if start_idx >= self.frame_provider.frame_count - 1:
+            start_idx = 0
+        self.render_scheduler.cancel()
+        self.player.play(self.frame_provider.video_path, start_idx, self.frame_provider.fps, Config.DISPLAY_SIZE,
+                         seek_index=self.frame_provider.seek_index, capacity=Config.PLAYBACK_BUFFER)
+        self.btn_play.setText("暂停")
+
+    def play_render(self, frame_idx, image):
+        """显示播放引擎按时钟取出的帧, 滑块、帧号与时间轴游标同步更新
+
+        Args:
+            frame_idx: int;帧号
+            image: np.ndarray;已经缩放好的 RGB 数组
+        """
+        self.current_frame_idx = frame_idx
+        self.video_frame_number.setText(f"当前帧号: {frame_idx}")
+        self.paint_frame(image)
+        self.slider.blockSignals(True)
+        self.slider.setValue(self.frame_to_slider(frame_idx))
+        self.slider.blockSignals(False)
+        self.timeline.set_cursor(frame_idx)
+
+    def playback_stopped(self, report):
+        """播放结束, 显示实际帧率以及丢帧数"""
+        self.btn_play.setText("播放")
+        print(report)
+        self.video_frame_number.setText(f"当前帧号: {self.current_frame_idx}  {report}")
+
+    def slider_released(self):
+        """滑块停止拖动后加载原始分辨率的帧"""
+        self.render_scheduler.cancel()
+        self.show_frame(self.slider_to_frame(self.slider.value()))
 
     def click_btn_target(self):
-        """标记当前帧"""
+        """标记当前帧, 稀疏展开模式下记录的也是原始帧号"""
         current_text = self.frame_text.toPlainText()
         # 检查当前选择的是关键帧,还是关键帧段;
         new_text = f"{current_text}\n{self.current_frame_idx}" if current_text else str(self.current_frame_idx)
         self.frame_text.setPlainText(new_text)
 
-    def draw_png(self, x: List[int], y: List[int], frame_idx: int) -> None:
-        """
-        Use matplotlib to draw png image and image save algorithm image folder directory;
-        Returns:
-
-        """
-        # 应用字体配置
-        plt.rcParams['font.sans-serif'] = ['SimHei']
-        plt.rcParams['axes.unicode_minus'] = False
-        # 创建图形
-        plt.figure()
-        plt.gca().xaxis.set_major_locator(MaxNLocator(nbins=10))
-        plt.xlim(min(x), max(x))
-        # 绘制折线图：虚线、颜色设置为红色
-        plt.plot(
-            x,
-            y,
-            linestyle='--',  # 虚线样式
-            color='green',  # 红色
-        )
-        plt.axvline(x=frame_idx, color='red', linestyle='--', linewidth=2, label='当前帧')
-        # 添加标签和标题
-        plt.xlabel('frame')
-        plt.legend()
-        # 保存为PNG（必须在plt.show()之前）
-        image_path = os.path.join(Config.BASE_DIR, os.path.join(self.temp_dir, f"alg_{self.current_frame_idx:04d}.png"))
-        plt.savefig(
-            image_path,  # 文件名（可包含路径，如 'images/plot.png'）
-            dpi=300,  # 分辨率（默认100，数值越高越清晰）
-            bbox_inches='tight'  # 去除多余空白边框
-        )
-        plt.close()
-
-    def update_alg_img(self):
-        """update video output alg and gt json draw png ."""
-        pass
-
     def change_quality(self):
         """ 选择当前的视频质量;
         """
@@ -880,58 +981,76 @@ class QtMain(QWidget):
             # 处理帧序列的逻辑;
             data_dict["section_frames"] = current_text.strip().replace("\n", ",")
         if data_dict.get("section_frames"):
-            # 设置视频写入的标注数据,
-            xframe_ind = [i for i in range(len(self.frame_files))]
-            y_li = [0 for _ in range(len(self.frame_files))]
-            sec_list = data_dict["section_frames"].split(",") if "," in data_dict["section_frames"] else [
-                data_dict["section_frames"]]
-            for sec in sec_list:
-                print(sec)
-                sec_li = [i for i in range(int(sec.split("-")[0]), int(sec.split("-")[1]) + 1)]
-                for frame in sec_li:
-                    if frame in xframe_ind:
-                        y_li[frame] = 1
-            gt_data = {
-                "video_name": video_name,
-                "total_frames": len(xframe_ind),
-                "section_frames": data_dict.get("section_frames"),
-                "y_li": y_li
-            }
+            # 设置视频写入的标注数据, 优先使用探测缓存中的精确帧数
+            total_frames = 0
+            if self.media_info is not None and self.media_info.get("frame_count"):
+                total_frames = self.media_info["frame_count"]
+            elif self.frame_provider is not None:
+                total_frames = self.frame_provider.frame_count
+            if not total_frames:
+                # 帧数未知时截断会清空全部帧段, 拒绝保存
+                QMessageBox.warning(self, "警告", "无法获取当前视频的总帧数, 请先加载视频后再提交帧段！")
+                return
+            try:
+                runs = parse_sections(data_dict["section_frames"])
+            except ValueError as e:
+                QMessageBox.information(self, "提示", str(e))
+                return
+            # 重叠的帧段已经合并, 超出总帧数的部分被截断
+            gt = GroundTruth(video_name, total_frames, clip(runs, total_frames), data_dict["section_frames"])
             json_folder = os.path.join(Config.BASE_DIR, os.path.join(self.temp_dir, "gt_json"))
-            if not os.path.exists(json_folder):
-                os.makedirs(json_folder)
-            json_path = os.path.join(json_folder, video_name.replace(".mp4", ".json"))
-            # json_path = os.path.join(Config.BASE_DIR, os.path.join(self.temp_dir, )
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(gt_data, f, indent=4, ensure_ascii=False)
+            gt.save(json_folder, binary=Config.GT_BINARY)
 
-        session = Config.SESSION()
         try:
-            # 首先进行数据的查询, 如果存在进行更新, 不存在则进行添加
-            exist = BaseDBOperateModel.get_one(session.query(VideoInfo), filters={VideoInfo.video_name == video_name})
-            if exist:
-                BaseDBOperateModel.update(session.query(VideoInfo), data_dict,
-                                          filters={VideoInfo.video_name == video_name})
-                session.commit()  # 提交事务
-            else:
-                BaseDBOperateModel.insert(session, VideoInfo, data_dict)
-                session.commit()
+            # 按视频名称插入或者更新, 一条语句完成; 其他人正在写入时等待并重试
+            write_with_retry(Config.SESSION, lambda session: BaseDBOperateModel.upsert_all(session, VideoInfo,
+                                                                                           [data_dict]),
+                             retries=Config.DB_WRITE_RETRIES, delay=Config.DB_RETRY_DELAY)
         except Exception as e:
             print(f"数据插入的时候出现异常:{e}")
-        finally:
-            session.close()
+            # 提交失败需要让标注人员知道, 否则标注会丢失
+            QMessageBox.warning(self, "警告", f"提交失败, 请稍后重试: {e}")
 
     def click_btn_update(self):
         """update input data format update database."""
         pass
 
-    @staticmethod
-    def click_btn_csv():
-        """get database info export to csv file."""
-        db_query = Config.SESSION().query(VideoInfo)
-        data_all = BaseDBOperateModel.get_all(db_query=db_query, filters=set())
-        df = pd.DataFrame(data_all)
-        df.to_csv(f"./result_{date.today().strftime('%Y%m%d')}.csv", index=False)
+    def click_btn_csv(self):
+        """get database info export to csv file, 导出中再次点击取消."""
+        if self.export_worker is not None:
+            self.stop_export()
+            return
+        worker = ExportWorker(default_export_path(".", Config.EXPORT_FORMAT), Config.EXPORT_FORMAT,
+                              batch_size=Config.EXPORT_BATCH, parent=self)
+        worker.progress.connect(self.update_export_progress)
+        worker.finished_export.connect(self.export_finished)
+        self.export_worker = worker
+        worker.start()
+
+    def stop_export(self):
+        """取消正在运行的导出"""
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.export_worker.wait()
+            self.export_worker = None
+        self.btn_csv.setText("输出 CSV")
+
+    def update_export_progress(self, done, total):
+        if self.sender() is not self.export_worker:
+            return
+        self.btn_csv.setText(f"输出 CSV {int(done * 100 / total) if total else 0}%")
+
+    def export_finished(self, result):
+        """导出完成"""
+        if self.sender() is not self.export_worker:
+            return
+        worker = self.export_worker
+        self.export_worker = None
+        self.btn_csv.setText("输出 CSV")
+        if isinstance(result, str):
+            QMessageBox.warning(self, "警告", f"导出失败: {result}")
+        elif result >= 0:
+            print(f"导出 {result} 条: {worker.out_path}")
 
     @staticmethod
     def get_video_database(video_name):
@@ -953,6 +1072,82 @@ class QtMain(QWidget):
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
 
+    def closeEvent(self, event):
+        """ 关闭窗口时停止后台任务;
+        """
+        self.stop_extract()
+        self.release_provider()
+        self.prefetcher.shutdown()
+        for worker in list(self.retired_workers):
+            worker.wait()
+        self.stop_export()
+        if self.evaluate_worker is not None:
+            # 评估在进程池中进行, 无法中途取消, 等待完成后退出
+            self.evaluate_worker.wait()
+        if self.result_index_worker is not None:
+            self.result_index_worker.wait()
+        if self.result_index is not None:
+            self.result_index.close()
+        super().closeEvent(event)
+
+    def click_btn_scene(self):
+        """镜头切换检测, 检测中再次点击取消"""
+        if self.scene_worker is not None:
+            self.stop_scene_detect()
+            return
+        if self.frame_provider is None:
+            return
+        worker = SceneDetectWorker(self.frame_provider.video_path, self.frame_provider.cache_folder,
+                                   size=Config.SCENE_SIZE, parent=self)
+        worker.progress.connect(self.update_scene_progress)
+        worker.ready.connect(self.scene_detected)
+        self.scene_worker = worker
+        worker.start()
+
+    def stop_scene_detect(self):
+        """取消正在运行的镜头切换检测"""
+        if self.scene_worker is not None:
+            self.scene_worker.cancel()
+            self.scene_worker.wait()
+            self.scene_worker = None
+        self.btn_scene.setText("镜头检测")
+
+    def update_scene_progress(self, done, total):
+        if self.sender() is not self.scene_worker:
+            return
+        self.btn_scene.setText(f"镜头检测 {int(done * 100 / total) if total else 0}%")
+
+    def scene_detected(self, scores):
+        """显示切换分数曲线, 并把切换点(关键帧模式)或者镜头帧段(帧段模式)作为建议填入输入框"""
+        if self.sender() is not self.scene_worker or self.frame_provider is None:
+            return
+        self.scene_worker = None
+        self.btn_scene.setText("镜头检测")
+        if scores is None:
+            return
+        self.scene_scores = scores
+        self.update_curves()
+        fps = self.frame_provider.fps
+        cuts = detect_cuts(scores, Config.SCENE_THRESHOLD, max(1, int(fps * Config.SCENE_MIN_GAP_SECONDS)))
+        if self.select_frame.currentText() == "关键帧":
+            suggestion = "\n".join(str(frame_idx) for frame_idx in cuts.tolist())
+        else:
+            sections = cuts_to_sections(cuts, len(scores), max(1, int(fps * Config.SCENE_MIN_SECTION_SECONDS)))
+            suggestion = format_sections(sections, sep="\n")
+        print(f"镜头检测: {len(cuts)} 个切换点")
+        if not suggestion:
+            return
+        # 已经有标注时先确认, 不直接覆盖
+        if self.frame_text.toPlainText().strip():
+            reply = QMessageBox.question(self, "镜头检测", f"检测到 {len(cuts)} 个切换点, 是否替换当前的帧输入?")
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+        self.frame_text.setPlainText(suggestion)
+
+    def click_btn_cache(self):
+        """show frame cache stats"""
+        QMessageBox.information(self, "缓存信息", self.cache_manager.format_stats())
+
     def click_btn_version(self):
         """show version info and help info"""
         QMessageBox.information(self, "提示", "当前版本V1.0")
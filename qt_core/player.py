@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+""" 播放控制;
+定时器按半帧间隔轮询播放引擎, 帧画面、滑块、帧号以及时间轴游标都使用同一个播放时钟的帧号更新;
+"""
+from typing import Callable, Optional
+
+import numpy as np
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+from core.playback import PlaybackEngine
+from core.seek_index import SeekIndex
+
+
+class PlaybackController(QObject):
+    """ 管理播放引擎以及界面刷新定时器;
+    """
+    # 播放结束或者被停止, 参数为播放统计信息
+    stopped = pyqtSignal(str)
+
+    def __init__(self, render: Callable[[int, np.ndarray], None], parent=None):
+        """
+        Args:
+            render: callable;显示一帧, 参数为 (帧号, RGB 数组), 数组只在本次调用期间有效
+            parent: QObject;
+        """
+        super().__init__(parent)
+        self.render = render
+        self.engine: Optional[PlaybackEngine] = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+
+    @property
+    def is_playing(self) -> bool:
+        return self.engine is not None
+
+    def play(self, video_path: str, start_idx: int, fps: float, display_size, seek_index: Optional[SeekIndex] = None,
+             capacity: int = 8) -> None:
+        """从指定帧开始播放
+
+        Args:
+            video_path: str;视频路径
+            start_idx: int;起始帧号
+            fps: float;视频帧率
+            display_size: tuple;显示区域的 (宽, 高)
+            seek_index: SeekIndex;帧定位索引
+            capacity: int;解码环形缓冲区的槽位数
+        """
+        self.stop()
+        self.engine = PlaybackEngine(video_path, start_idx, fps, display_size, seek_index=seek_index,
+                                     capacity=capacity)
+        self.engine.start()
+        # 轮询间隔为半帧, 显示时间与时钟的偏差不超过半帧
+        self._timer.start(max(1, int(500 / fps)))
+
+    def stop(self) -> str:
+        """停止播放
+
+        Returns:
+            str;播放统计信息, 没有在播放时返回空字符串
+        """
+        if self.engine is None:
+            return ""
+        self._timer.stop()
+        engine, self.engine = self.engine, None
+        engine.stop()
+        report = engine.report()
+        self.stopped.emit(report)
+        return report
+
+    def _tick(self) -> None:
+        """取出时钟当前对应的帧并显示"""
+        engine = self.engine
+        if engine is None:
+            return
+        result = engine.take()
+        if result is not None:
+            self.render(*result)
+        elif engine.finished:
+            self.stop()
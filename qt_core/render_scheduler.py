@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+""" 滑块拖动的渲染调度;
+拖动滑块时只记录最新请求的帧号, 由定时器按目标刷新率渲染, 已经过时的请求直接丢弃;
+"""
+import time
+from typing import Callable
+
+from PyQt6.QtCore import QObject, QTimer
+
+from utils.timer import LatencyStats
+
+
+class RenderScheduler(QObject):
+    """ 合并渲染请求, 始终渲染最新请求的帧;
+    """
+
+    def __init__(self, render: Callable[[int], None], max_fps: int = 60, parent=None):
+        """
+        Args:
+            render: callable;渲染函数, 参数为帧号
+            max_fps: int;最大刷新率, 0 表示不限制(仍然会合并同一轮事件循环中的请求)
+            parent: QObject;
+        """
+        super().__init__(parent)
+        self.render = render
+        self.interval_ms = 1000 / max_fps if max_fps else 0
+        self.requested = 0
+        self.rendered = 0
+        self.dropped = 0
+        # 从请求到渲染完成的耗时
+        self.latency = LatencyStats("render_latency")
+        self._pending = None
+        self._pending_time = 0.0
+        self._last_render = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+
+    def request(self, frame_idx: int) -> None:
+        """请求渲染一帧, 尚未渲染的旧请求会被替换
+
+        Args:
+            frame_idx: int;帧号
+        """
+        now = time.perf_counter()
+        self.requested += 1
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = frame_idx
+        self._pending_time = now
+        if not self._timer.isActive():
+            wait_ms = self.interval_ms - (now - self._last_render) * 1000
+            self._timer.start(max(0, int(wait_ms)))
+
+    def cancel(self) -> None:
+        """丢弃尚未渲染的请求"""
+        self._timer.stop()
+        if self._pending is not None:
+            self.dropped += 1
+            self._pending = None
+
+    def _flush(self) -> None:
+        """定时器触发, 渲染最新请求的帧"""
+        if self._pending is None:
+            return
+        frame_idx, request_time = self._pending, self._pending_time
+        self._pending = None
+        self.render(frame_idx)
+        self._last_render = time.perf_counter()
+        self.rendered += 1
+        self.latency.add((self._last_render - request_time) * 1000)
+
+    def reset(self) -> None:
+        """清空计数"""
+        self.cancel()
+        self.requested = self.rendered = self.dropped = 0
+        self.latency.reset()
+
+    def report(self) -> str:
+        """计数以及延迟分布"""
+        lines = [f"requested={self.requested} rendered={self.rendered} dropped={self.dropped}",
+                 str(self.latency)]
+        lines += [f"  {label:>8}: {count}" for label, count in self.latency.histogram()]
+        return "\n".join(lines)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+""" 内嵌在标注界面中的时间轴控件, 直接使用内存中的数组绘制 GT / 算法曲线;
+曲线部分绘制成缓存图层, 只有窗口范围或者控件大小变化时才重新绘制, 切换帧时只重绘游标;
+"""
+from typing import Dict, Optional
+
+import numpy as np
+from PyQt6.QtCore import Qt, QPointF, QLineF, QRectF, pyqtSignal
+from PyQt6.QtGui import QPainter, QPixmap, QPen, QColor, QPolygonF
+from PyQt6.QtWidgets import QWidget
+
+from core.timeline import minmax_envelope
+
+CURVE_COLORS = {"gt": QColor(0, 160, 0), "alg": QColor(30, 90, 220), "scene": QColor(230, 130, 0)}
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 36, 10, 10, 22
+# 缩放时窗口内至少保留的帧数
+MIN_WINDOW = 10
+
+
+class TimelineWidget(QWidget):
+    """ GT / 算法曲线的时间轴;
+    """
+    # 点击时间轴选择的帧号
+    frameSelected = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(520, 200)
+        self.setMouseTracking(False)
+        self.total_frames = 0
+        self.curves: Dict[str, np.ndarray] = {}
+        self.cursor = 0
+        self.window_start = 0
+        self.window_stop = 0
+        self._y_min = 0.0
+        self._y_max = 1.0
+        self._static: Optional[QPixmap] = None
+
+    def set_curves(self, total_frames: int, curves: Dict[str, np.ndarray], reset: bool = False) -> None:
+        """设置当前视频的曲线, 总帧数不变时保留当前的缩放窗口
+
+        Args:
+            total_frames: int;视频总帧数
+            curves: dict;曲线名称(gt/alg/scene) -> 每一帧的取值
+            reset: bool;窗口恢复为全部帧, 切换视频时使用
+        """
+        old_total = self.total_frames
+        self.curves = {name: np.asarray(y, dtype=np.float32) for name, y in curves.items() if y is not None}
+        non_empty = [y for y in self.curves.values() if len(y)]
+        self.total_frames = max([total_frames] + [len(y) for y in non_empty])
+        self._y_min = float(min(y.min() for y in non_empty)) if non_empty else 0.0
+        self._y_max = float(max(y.max() for y in non_empty)) if non_empty else 1.0
+        if self._y_max <= self._y_min:
+            self._y_max = self._y_min + 1.0
+        if reset or self.total_frames != old_total:
+            self.reset_window()
+        else:
+            # 只是曲线刷新(例如镜头切换分数计算完成), 不丢掉用户的缩放
+            self._static = None
+            self.update()
+
+    def clear(self) -> None:
+        """清空曲线"""
+        self.set_curves(0, {}, reset=True)
+
+    def set_cursor(self, frame_idx: int) -> None:
+        """移动当前帧游标, 游标超出缩放窗口时平移窗口
+
+        Args:
+            frame_idx: int;帧号
+        """
+        self.cursor = frame_idx
+        if self.total_frames and not self.window_start <= frame_idx < self.window_stop:
+            width = self.window_stop - self.window_start
+            start = min(max(0, frame_idx - width // 2), max(0, self.total_frames - width))
+            self.set_window(start, start + width)
+        else:
+            self.update()
+
+    def set_window(self, start: int, stop: int) -> None:
+        """缩放到指定的帧范围
+
+        Args:
+            start: int;起始帧
+            stop: int;结束帧(不包含)
+        """
+        start = max(0, int(start))
+        stop = min(self.total_frames, int(stop))
+        if stop - start < MIN_WINDOW:
+            stop = min(self.total_frames, start + MIN_WINDOW)
+            start = max(0, stop - MIN_WINDOW)
+        self.window_start, self.window_stop = start, stop
+        self._static = None
+        self.update()
+
+    def reset_window(self) -> None:
+        """显示全部帧"""
+        self.window_start, self.window_stop = 0, self.total_frames
+        self._static = None
+        self.update()
+
+    def _plot_rect(self):
+        """曲线绘制区域 (左, 上, 宽, 高)"""
+        return (MARGIN_LEFT, MARGIN_TOP, max(1, self.width() - MARGIN_LEFT - MARGIN_RIGHT),
+                max(1, self.height() - MARGIN_TOP - MARGIN_BOTTOM))
+
+    def _frame_to_x(self, frame_idx: float) -> float:
+        left, _, width, _ = self._plot_rect()
+        span = max(1, self.window_stop - self.window_start - 1)
+        return left + (frame_idx - self.window_start) * width / span
+
+    def _x_to_frame(self, x: float) -> int:
+        left, _, width, _ = self._plot_rect()
+        span = max(1, self.window_stop - self.window_start - 1)
+        frame_idx = self.window_start + round((x - left) * span / width)
+        return int(min(max(frame_idx, self.window_start), max(self.window_start, self.window_stop - 1)))
+
+    def _value_to_y(self, values: np.ndarray) -> np.ndarray:
+        _, top, _, height = self._plot_rect()
+        return top + height - (values - self._y_min) * height / (self._y_max - self._y_min)
+
+    def _render_static(self) -> QPixmap:
+        """绘制坐标轴以及曲线的缓存图层"""
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.GlobalColor.white)
+        painter = QPainter(pixmap)
+        left, top, width, height = self._plot_rect()
+        painter.setPen(QPen(Qt.GlobalColor.gray))
+        painter.drawRect(left, top, width, height)
+        painter.setPen(QPen(Qt.GlobalColor.black))
+        # 横轴刻度
+        if self.window_stop > self.window_start:
+            for tick in np.linspace(self.window_start, self.window_stop - 1, 6).astype(np.int64):
+                x = self._frame_to_x(tick)
+                painter.drawLine(QLineF(x, top + height, x, top + height + 4))
+                painter.drawText(QRectF(x - 25, top + height + 5, 50, 14), Qt.AlignmentFlag.AlignCenter, str(tick))
+        painter.drawText(QRectF(0, top, left - 4, 14), Qt.AlignmentFlag.AlignRight, f"{self._y_max:g}")
+        painter.drawText(QRectF(0, top + height - 14, left - 4, 14), Qt.AlignmentFlag.AlignRight, f"{self._y_min:g}")
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        for name, values in self.curves.items():
+            frames, mins, maxs = minmax_envelope(values, self.window_start, self.window_stop, width)
+            if len(frames) == 0:
+                continue
+            painter.setPen(QPen(CURVE_COLORS.get(name, QColor(Qt.GlobalColor.darkGray)), 1))
+            xs = [self._frame_to_x(f) for f in frames.tolist()]
+            y_min = self._value_to_y(mins).tolist()
+            y_max = self._value_to_y(maxs).tolist()
+            if len(frames) == min(self.window_stop, len(values)) - self.window_start:
+                # 没有降采样, 直接连线
+                painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, y_min)]))
+            else:
+                # 每列绘制 min-max 竖线, 相邻列之间连接, 保证跳变不会断开
+                lines = [QLineF(x, y0, x, y1) for x, y0, y1 in zip(xs, y_min, y_max)]
+                lines += [QLineF(xs[i], y_max[i], xs[i + 1], y_min[i + 1]) for i in range(len(xs) - 1)]
+                painter.drawLines(lines)
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        if self._static is None or self._static.size() != self.size():
+            self._static = self._render_static()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static)
+        if self.total_frames and self.window_start <= self.cursor < self.window_stop:
+            _, top, _, height = self._plot_rect()
+            x = self._frame_to_x(self.cursor)
+            painter.setPen(QPen(Qt.GlobalColor.red, 2, Qt.PenStyle.DashLine))
+            painter.drawLine(QLineF(x, top, x, top + height))
+        painter.end()
+
+    def resizeEvent(self, event):
+        self._static = None
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        """滚轮以鼠标所在的帧为中心缩放"""
+        if not self.total_frames:
+            return
+        center = self._x_to_frame(event.position().x())
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        width = max(MIN_WINDOW, int((self.window_stop - self.window_start) * factor))
+        ratio = (center - self.window_start) / max(1, self.window_stop - self.window_start)
+        start = int(center - width * ratio)
+        start = min(max(0, start), max(0, self.total_frames - width))
+        self.set_window(start, start + width)
+
+    def mousePressEvent(self, event):
+        if self.total_frames and event.button() == Qt.MouseButton.LeftButton:
+            self.frameSelected.emit(self._x_to_frame(event.position().x()))
+
+    def mouseDoubleClickEvent(self, event):
+        """双击恢复显示全部帧"""
+        self.reset_window()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+""" 界面使用的后台线程;
+"""
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.config import Config
+from core.evaluate import evaluate_folder
+from core.export import export_table
+from core.frame_extract import extract_frames, extract_frames_parallel
+from core.result_index import ResultIndex
+from core.scene_detect import load_or_compute
+from core.sparse import prepare_sparse, extract_sparse
+from core.seek_index import SeekIndex
+from core.models import VideoInfo
+
+
+class FrameExtractWorker(QThread):
+    """ 在后台线程中展开视频帧, 通过信号上报进度;
+    """
+    # 参数: 已完成帧数, 总帧数
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, video_path: str, result_folder: str, proxy_size=None, workers: int = 1, frame_count=None,
+                 parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.result_folder = result_folder
+        self.proxy_size = proxy_size
+        # 探测得到的精确帧数, 单进程展开时使用
+        self.frame_count = frame_count
+        # 大于 1 时使用多进程按关键帧分段展开
+        self.workers = workers
+        # 展开完成的帧数
+        self.done = 0
+        self._cancel_event = threading.Event()
+
+    def run(self):
+        if self.workers > 1:
+            self.done = extract_frames_parallel(self.video_path, self.result_folder, workers=self.workers,
+                                                progress_callback=self.progress.emit,
+                                                cancel_event=self._cancel_event,
+                                                proxy_size=self.proxy_size,
+                                                proxy_max_mb=Config.PROXY_MAX_MB)
+        else:
+            self.done = extract_frames(self.video_path, self.result_folder,
+                                       progress_callback=self.progress.emit,
+                                       cancel_event=self._cancel_event,
+                                       proxy_size=self.proxy_size,
+                                       frame_count=self.frame_count,
+                                       proxy_max_mb=Config.PROXY_MAX_MB)
+
+    def is_cancelled(self) -> bool:
+        """展开任务是否被取消"""
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """请求停止展开, 线程会在当前帧写完后退出"""
+        self._cancel_event.set()
+
+
+class SparseExtractWorker(QThread):
+    """ 在后台线程中按稀疏模式展开视频帧, 帧映射准备好之后先通过信号发出, 再开始展开;
+    """
+    # 参数: (稀疏缓存目录, SparseFrameMap)
+    planned = pyqtSignal(str, object)
+    # 参数: 已完成数量, 总数量
+    progress = pyqtSignal(int, int)
+    # 参数: 无法按该模式展开的原因
+    failed = pyqtSignal(str)
+
+    def __init__(self, video_path: str, entry_folder: str, mode: str, fps: float, stride: int = 10,
+                 window=(0, None), unit: str = "frame", parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.entry_folder = entry_folder
+        self.mode = mode
+        self.fps = fps
+        self.stride = stride
+        self.window = window
+        self.unit = unit
+        self.done = 0
+        self._cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            folder, frame_map, seek_index = prepare_sparse(self.video_path, self.entry_folder, self.mode, self.fps,
+                                                           self.stride, self.window, self.unit)
+        except ValueError as e:
+            self.failed.emit(str(e))
+            return
+        self.planned.emit(folder, frame_map)
+        if self._cancel_event.is_set():
+            return
+        self.done = extract_sparse(self.video_path, folder, frame_map, seek_index,
+                                   progress_callback=self.progress.emit, cancel_event=self._cancel_event)
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+
+class SceneDetectWorker(QThread):
+    """ 在后台线程中计算镜头切换分数, 已经缓存的直接读取;
+    """
+    # 参数: 已完成帧数, 总帧数
+    progress = pyqtSignal(int, int)
+    # 参数: 每一帧的分数 np.ndarray, 取消时为 None
+    ready = pyqtSignal(object)
+
+    def __init__(self, video_path: str, cache_folder: str, size=(64, 36), parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.cache_folder = cache_folder
+        self.size = size
+        self._cancel_event = threading.Event()
+
+    def run(self):
+        self.ready.emit(load_or_compute(self.video_path, self.cache_folder, self.size,
+                                        progress_callback=self.progress.emit, cancel_event=self._cancel_event))
+
+    def cancel(self):
+        self._cancel_event.set()
+
+
+class SeekIndexWorker(QThread):
+    """ 在后台线程中读取或者构建帧定位索引;
+    """
+    # 参数: SeekIndex
+    ready = pyqtSignal(object)
+
+    def __init__(self, video_path: str, cache_folder: str, media_probe=None, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.cache_folder = cache_folder
+        # 设置后顺便把元数据写入缓存, 复用刚刚构建的索引, 不再遍历一次视频
+        self.media_probe = media_probe
+
+    def run(self):
+        seek_index = SeekIndex.load_or_build(self.video_path, self.cache_folder)
+        if self.media_probe is not None:
+            try:
+                self.media_probe.get(self.video_path, seek_index)
+            except Exception as e:
+                print(f"视频元数据探测失败: {e}")
+        self.ready.emit(seek_index)
+
+
+class ResultIndexWorker(QThread):
+    """ 在后台线程中读取或者构建 JSONL 算法结果文件的偏移索引;
+    """
+    # 参数: ResultIndex
+    ready = pyqtSignal(object)
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def run(self):
+        self.ready.emit(ResultIndex.load_or_build(self.path))
+
+
+class EvaluateWorker(QThread):
+    """ 在后台线程中批量评估算法结果, 评估本身在进程池中进行;
+    """
+    # 参数: 汇总指标 dict, 评估失败时为异常信息 str
+    finished_summary = pyqtSignal(object)
+
+    def __init__(self, gt_folder: str, alg_folder: str, out_path: str, workers: int = 0, threshold: float = 0.5,
+                 iou_threshold: float = 0.5, parent=None):
+        super().__init__(parent)
+        self.gt_folder = gt_folder
+        self.alg_folder = alg_folder
+        self.out_path = out_path
+        self.workers = workers
+        self.threshold = threshold
+        self.iou_threshold = iou_threshold
+
+    def run(self):
+        try:
+            summary = evaluate_folder(self.gt_folder, self.alg_folder, self.out_path, workers=self.workers,
+                                      threshold=self.threshold, iou_threshold=self.iou_threshold)
+        except Exception as e:
+            summary = str(e)
+        self.finished_summary.emit(summary)
+
+
+class ExportWorker(QThread):
+    """ 在后台线程中分批导出标注数据;
+    """
+    # 参数: 已导出条数, 总条数
+    progress = pyqtSignal(int, int)
+    # 参数: 导出条数 int(取消时为 -1), 导出失败时为异常信息 str
+    finished_export = pyqtSignal(object)
+
+    def __init__(self, out_path: str, fmt: str = "csv", batch_size: int = 1000, parent=None):
+        super().__init__(parent)
+        self.out_path = out_path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self._cancel_event = threading.Event()
+
+    def run(self):
+        # scoped_session 按线程区分, 这里得到的是本线程独立的会话
+        session = Config.SESSION()
+        try:
+            result = export_table(session.query(VideoInfo), self.out_path, self.fmt, batch_size=self.batch_size,
+                                  progress_callback=self.progress.emit, cancel_event=self._cancel_event)
+        except Exception as e:
+            result = str(e)
+        finally:
+            Config.SESSION.remove()
+        self.finished_export.emit(result)
+
+    def cancel(self):
+        self._cancel_event.set()
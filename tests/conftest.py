@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# 与 video_tools 下的脚本一样, 从仓库根目录导入 core
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from core.benchmark import stress_writer
+from core.db import create_sqlite_engine, write_with_retry
+from core.models import Base, BaseDBOperateModel, VideoInfo
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "video.db")
+    engine = create_sqlite_engine(path, wal=True)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return path
+
+
+def video_names(db_path: str) -> set:
+    engine = create_sqlite_engine(db_path)
+    session = sessionmaker(engine)()
+    try:
+        return set(session.execute(select(VideoInfo.video_name)).scalars())
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def upsert(name: str):
+    return lambda session: BaseDBOperateModel.upsert_all(session, VideoInfo, [{"video_name": name, "status": 1}])
+
+
+def test_retry_after_lock_released(db_path):
+    # 另一个连接持有写锁, 释放之前的写入都会超时并重试
+    blocker = sqlite3.connect(db_path, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(0.3, blocker.commit)
+    timer.start()
+    engine = create_sqlite_engine(db_path, busy_timeout_ms=20)
+    retried = []
+    try:
+        write_with_retry(sessionmaker(engine), upsert("a.mp4"), retries=20, delay=0.02,
+                         on_retry=lambda attempt, e: retried.append(attempt))
+    finally:
+        timer.join()
+        blocker.close()
+        engine.dispose()
+    assert retried
+    assert video_names(db_path) == {"a.mp4"}
+
+
+def test_raise_when_retries_exhausted(db_path):
+    blocker = sqlite3.connect(db_path)
+    blocker.execute("BEGIN IMMEDIATE")
+    engine = create_sqlite_engine(db_path, busy_timeout_ms=10)
+    try:
+        with pytest.raises(OperationalError):
+            write_with_retry(sessionmaker(engine), upsert("a.mp4"), retries=2, delay=0.01)
+    finally:
+        blocker.rollback()
+        blocker.close()
+        engine.dispose()
+    assert video_names(db_path) == set()
+
+
+def test_concurrent_writers_lose_no_rows(db_path):
+    # 等待时间很短, 多个进程同时提交时必然出现锁冲突, 依赖重试保证不丢失
+    writers, submits = 4, 50
+    tasks = [(db_path, i, submits, True, 50, 20) for i in range(writers)]
+    with ProcessPoolExecutor(max_workers=writers) as executor:
+        results = list(executor.map(stress_writer, tasks))
+    assert sum(r[1] for r in results) == 0
+    assert sum(r[0] for r in results) == writers * submits
+    expected = {f"writer{w:03d}_{i:06d}.mp4" for w in range(writers) for i in range(submits)}
+    assert video_names(db_path) == expected
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+
+import numpy as np
+import pytest
+
+from core.gt_format import (GroundTruth, GT_HEADER, GT_HEADERS, GT_MAGIC, GT_VERSION, BINARY_EXT, JSON_EXT,
+                            find_gt_file)
+from core.intervals import format_sections
+
+
+def test_binary_round_trip(tmp_path):
+    gt = GroundTruth("视频_01.mp4", 1000, [[43, 136], [200, 250]], "43-136,200-250")
+    path = gt.save(str(tmp_path), binary=True)
+    assert path.endswith(BINARY_EXT)
+    with open(path, "rb") as f:
+        magic, version, total_frames, n_runs, name_len, section_len = GT_HEADER.unpack(f.read(GT_HEADER.size))
+    assert (magic, version, total_frames, n_runs) == (GT_MAGIC, GT_VERSION, 1000, 2)
+    assert name_len == len("视频_01.mp4".encode("utf-8"))
+    assert section_len == len("43-136,200-250")
+
+    loaded = GroundTruth.load(path)
+    assert loaded.video_name == "视频_01.mp4"
+    assert loaded.total_frames == 1000
+    assert loaded.section_frames == "43-136,200-250"
+    assert loaded.runs.tolist() == [[43, 136], [200, 250]]
+    assert int(loaded.mask().sum()) == 94 + 51
+
+
+def test_binary_long_section_frames(tmp_path):
+    # 帧段字符串超过 65535 字节
+    runs = [[i * 10, i * 10 + 4] for i in range(20000)]
+    section = format_sections(runs)
+    assert len(section) > 65535
+    path = GroundTruth("long.mp4", 200000, runs, section).save(str(tmp_path), binary=True)
+    loaded = GroundTruth.load(path)
+    assert loaded.section_frames == section
+    assert loaded.runs.tolist() == runs
+
+
+def test_load_version_1(tmp_path):
+    path = os.path.join(str(tmp_path), "v1" + BINARY_EXT)
+    with open(path, "wb") as f:
+        f.write(GT_HEADERS[1].pack(GT_MAGIC, 1, 100, 1, 5, 4))
+        f.write(b"a.mp4")
+        f.write(b"1-10")
+        f.write(np.array([[1, 10]], dtype="<i4").tobytes())
+    gt = GroundTruth.load(path)
+    assert (gt.video_name, gt.total_frames, gt.section_frames) == ("a.mp4", 100, "1-10")
+    assert gt.runs.tolist() == [[1, 10]]
+
+
+def test_json_round_trip_replaces_binary(tmp_path):
+    GroundTruth("a.mp4", 10, [[1, 2]]).save(str(tmp_path), binary=True)
+    path = GroundTruth("a.mp4", 10, [[3, 4]]).save(str(tmp_path))
+    assert path.endswith(JSON_EXT)
+    assert not os.path.exists(os.path.join(str(tmp_path), "a" + BINARY_EXT))
+    assert GroundTruth.load(path).runs.tolist() == [[3, 4]]
+    assert find_gt_file(str(tmp_path), "a.mp4") == path
+
+
+def test_load_legacy_y_li(tmp_path):
+    path = os.path.join(str(tmp_path), "old.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"video_name": "old.mp4", "section_frames": "2-4,8-8", "y_li": [0, 0, 1, 1, 1, 0, 0, 0, 1, 0]}, f)
+    gt = GroundTruth.load(path)
+    assert gt.video_name == "old.mp4"
+    assert gt.total_frames == 10
+    assert gt.runs.tolist() == [[2, 4], [8, 8]]
+    assert np.array_equal(gt.mask(), [0, 0, 1, 1, 1, 0, 0, 0, 1, 0])
+
+
+def test_load_rejects_bad_binary(tmp_path):
+    path = os.path.join(str(tmp_path), "bad" + BINARY_EXT)
+    with open(path, "wb") as f:
+        f.write(b"XXXX" + bytes(GT_HEADER.size))
+    with pytest.raises(ValueError):
+        GroundTruth.load(path)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from core.intervals import (parse_sections, format_sections, merge, clip, complement, rasterize, from_mask,
+                            intersection, difference, frame_iou, segment_iou)
+
+
+def test_merge_overlapping_and_adjacent():
+    runs = merge([[10, 20], [0, 5], [6, 8], [15, 30], [40, 40]])
+    assert runs.tolist() == [[0, 8], [10, 30], [40, 40]]
+
+
+def test_merge_nested_runs():
+    assert merge([[0, 100], [10, 20], [30, 40], [102, 103]]).tolist() == [[0, 100], [102, 103]]
+
+
+def test_merge_empty():
+    assert merge([]).shape == (0, 2)
+
+
+def test_parse_and_format_sections():
+    runs = parse_sections("200-250\n43-136，137-140,300")
+    assert runs.tolist() == [[43, 140], [200, 250], [300, 300]]
+    assert format_sections(runs) == "43-140,200-250,300-300"
+
+
+@pytest.mark.parametrize("text", ["10-a", "20-10", "-5"])
+def test_parse_sections_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        parse_sections(text)
+
+
+def test_clip_to_total_frames():
+    assert clip([[-5, 3], [8, 12], [20, 30]], 10).tolist() == [[0, 3], [8, 9]]
+    assert clip([[0, 5]], 0).shape == (0, 2)
+
+
+def test_complement():
+    assert complement([[2, 3], [6, 9]], 10).tolist() == [[0, 1], [4, 5]]
+    assert complement([], 5).tolist() == [[0, 4]]
+    assert complement([[0, 4]], 5).shape == (0, 2)
+
+
+def test_rasterize_and_from_mask_round_trip():
+    runs = [[0, 0], [3, 5], [9, 9]]
+    mask = rasterize(runs, 10)
+    assert mask.tolist() == [1, 0, 0, 1, 1, 1, 0, 0, 0, 1]
+    assert from_mask(mask).tolist() == runs
+    assert from_mask([]).shape == (0, 2)
+
+
+def test_rasterize_matches_python_loop():
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 1000, 50)
+    runs = np.column_stack([starts, starts + rng.integers(0, 30, 50)])
+    expected = np.zeros(1000, dtype=np.uint8)
+    for start, stop in runs:
+        expected[start:stop + 1] = 1
+    assert np.array_equal(rasterize(runs, 1000), expected)
+    assert np.array_equal(rasterize(from_mask(expected), 1000), expected)
+
+
+def test_intersection_and_difference():
+    a = [[0, 10], [20, 30]]
+    b = [[5, 25]]
+    assert intersection(a, b).tolist() == [[5, 10], [20, 25]]
+    assert difference(a, b).tolist() == [[0, 4], [26, 30]]
+
+
+def test_frame_iou():
+    assert frame_iou([[0, 9]], [[5, 14]]) == pytest.approx(5 / 15)
+    assert frame_iou([], []) == 1.0
+
+
+def test_segment_iou():
+    iou = segment_iou([[0, 9], [20, 29]], [[5, 14], [20, 29], [100, 110]])
+    assert iou.shape == (2, 3)
+    assert iou[0, 0] == pytest.approx(5 / 15)
+    assert iou[1, 1] == pytest.approx(1.0)
+    assert iou[0, 2] == 0
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import core.media_probe as media_probe
+from core.media_probe import MediaProbe, is_header_only
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def test_header_is_cached_and_completed_by_get(video_path, engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(media_probe, "read_container",
+                        lambda path: calls.append(path) or {"duration": 0.8, "video_codec": "mjpeg",
+                                                            "audio_codec": ""})
+    probe = MediaProbe(session_factory=sessionmaker(engine), engine=engine)
+    info = probe.header(video_path)
+    assert info["duration"] == 0.8 and is_header_only(info)
+    # 部分记录不作为完整的探测结果
+    assert probe.lookup(video_path) is None
+
+    # 新的探测对象从数据库读取, 不再调用 ffmpeg
+    other = MediaProbe(session_factory=sessionmaker(engine), engine=engine)
+    assert other.header(video_path)["audio_codec"] == ""
+    assert len(calls) == 1
+
+    full = other.get(video_path)
+    assert full["frame_count"] == 20
+    assert not is_header_only(other.lookup(video_path))
+    third = MediaProbe(session_factory=sessionmaker(engine), engine=engine)
+    assert third.lookup(video_path)["frame_count"] == 20
+    assert third.header(video_path)["frame_count"] == 20
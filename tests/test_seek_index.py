@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from core.seek_index import SeekIndex
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "seek_index.npz")
+    SeekIndex(np.array([0, 12, 24]), np.arange(30) / 25.0).save(path)
+    index = SeekIndex.load(path)
+    assert index.has_keyframes
+    assert index.frame_count == 30
+    assert index.keyframes.tolist() == [0, 12, 24]
+    assert index.keyframe_before(20) == 12
+
+
+def test_all_intra_index_keeps_keyframes(tmp_path):
+    # 全部为关键帧的视频(MJPEG 等)不能被当作没有关键帧信息
+    path = str(tmp_path / "seek_index.npz")
+    SeekIndex(np.arange(10), np.arange(10) / 25.0).save(path)
+    index = SeekIndex.load(path)
+    assert index.has_keyframes
+    assert index.keyframe_before(7) == 7
+    assert len(index.keyframes) == 10
+
+
+def test_unknown_keyframes(tmp_path):
+    path = str(tmp_path / "seek_index.npz")
+    SeekIndex(np.zeros(0, dtype=np.int64), np.arange(10) / 25.0, has_keyframes=False).save(path)
+    index = SeekIndex.load(path)
+    assert not index.has_keyframes
+    assert index.keyframe_before(7) == 7
+
+
+def test_index_without_has_keyframes_is_rebuilt(tmp_path):
+    path = str(tmp_path / "seek_index.npz")
+    with open(path, "wb") as f:
+        np.savez(f, keyframes=np.arange(10), timestamps=np.arange(10) / 25.0)
+    assert SeekIndex.load(path) is None
+    assert SeekIndex.load(str(tmp_path / "missing.npz")) is None
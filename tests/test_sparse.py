@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from core.seek_index import SeekIndex
+from core.sparse import SparseFrameMap, plan_frames, sparse_tag
+
+
+def test_frame_map_lookups():
+    frame_map = SparseFrameMap(np.array([0, 10, 20, 30]))
+    assert len(frame_map) == 4
+    assert frame_map.to_frame(2) == 20
+    # 超出范围的缓存序号截断到两端
+    assert frame_map.to_frame(-1) == 0
+    assert frame_map.to_frame(10) == 30
+    assert frame_map.to_cache(0) == 0
+    assert frame_map.to_cache(19) == 1
+    assert frame_map.to_cache(20) == 2
+    assert frame_map.to_cache(99) == 3
+    assert frame_map.index_of(10) == 1
+    assert frame_map.index_of(11) == -1
+    assert frame_map.index_of(99) == -1
+
+
+def test_frame_map_save_and_load(tmp_path):
+    folder = str(tmp_path / "sparse_stride_10")
+    assert SparseFrameMap.load(folder) is None
+    SparseFrameMap(np.arange(0, 100, 10), complete=True).save(folder)
+    loaded = SparseFrameMap.load(folder)
+    assert loaded.frames.tolist() == list(range(0, 100, 10))
+    assert loaded.complete is True
+
+
+def test_plan_frames():
+    seek_index = SeekIndex(np.array([0, 12, 24]), np.arange(30) / 25.0)
+    assert plan_frames("stride", seek_index, 25.0, stride=10).tolist() == [0, 10, 20]
+    assert plan_frames("window", seek_index, 25.0, window=(5, 8)).tolist() == [5, 6, 7]
+    assert plan_frames("window", seek_index, 25.0, window=(1, None), unit="second").tolist() == list(range(25, 30))
+    assert plan_frames("keyframe", seek_index, 25.0).tolist() == [0, 12, 24]
+    assert sparse_tag("window", window=(1, None), unit="second") == "sparse_window_1_ends"
+
+
+def test_plan_keyframes_without_keyframe_info():
+    seek_index = SeekIndex(np.arange(30), np.arange(30) / 25.0, has_keyframes=False)
+    with pytest.raises(ValueError):
+        plan_frames("keyframe", seek_index, 25.0)
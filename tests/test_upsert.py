@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.config import Config
+from core.importer import import_rows, iter_csv
+from core.models import BaseDBOperateModel, VideoInfo
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    VideoInfo.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def read_all(session_factory) -> dict:
+    session = session_factory()
+    try:
+        return {row.video_name: row for row in session.query(VideoInfo).all()}
+    finally:
+        session.close()
+
+
+def test_upsert_inserts_and_updates(session_factory):
+    session = session_factory()
+    BaseDBOperateModel.upsert_all(session, VideoInfo, [
+        {"video_name": "a.mp4", "category": "cat", "status": 0},
+        {"video_name": "b.mp4", "category": "dog", "status": 1},
+    ])
+    session.commit()
+    # 只更新给出的字段, 没有给出的字段保持不变
+    BaseDBOperateModel.upsert_all(session, VideoInfo, [
+        {"video_name": "a.mp4", "status": 1},
+        {"video_name": "c.mp4", "section_frames": "1-5"},
+    ])
+    session.commit()
+    session.close()
+    rows = read_all(session_factory)
+    assert sorted(rows) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert (rows["a.mp4"].category, rows["a.mp4"].status) == ("cat", 1)
+    assert rows["b.mp4"].status == 1
+    assert rows["c.mp4"].section_frames == "1-5"
+
+
+def test_upsert_key_only_rows(session_factory):
+    session = session_factory()
+    BaseDBOperateModel.upsert_all(session, VideoInfo, [{"video_name": "a.mp4", "notes": "x"}])
+    BaseDBOperateModel.upsert_all(session, VideoInfo, [{"video_name": "a.mp4"}, {"video_name": "b.mp4"}])
+    session.commit()
+    session.close()
+    rows = read_all(session_factory)
+    assert sorted(rows) == ["a.mp4", "b.mp4"]
+    assert rows["a.mp4"].notes == "x"
+
+
+def test_upsert_in_batches(session_factory):
+    session = session_factory()
+    data = [{"video_name": f"{i:05d}.mp4", "status": i % 2} for i in range(1234)]
+    assert BaseDBOperateModel.upsert_all(session, VideoInfo, data, batch_size=100) == 1234
+    session.commit()
+    session.close()
+    assert len(read_all(session_factory)) == 1234
+
+
+def test_import_csv(session_factory, tmp_path):
+    path = tmp_path / "export.csv"
+    # 第二行缺少最后两列, DictReader 填充为 None
+    path.write_text("id,video_name,category,status,notes\n"
+                    "1,a.mp4,cat,1.0,ok\n"
+                    "2,b.mp4,dog\n"
+                    "3,,empty,0,\n", encoding="utf-8")
+    rows = list(iter_csv(str(path)))
+    assert rows == [{"video_name": "a.mp4", "category": "cat", "status": 1, "notes": "ok"},
+                    {"video_name": "b.mp4", "category": "dog", "status": None, "notes": None}]
+    assert import_rows(session_factory, rows) == 2
+    stored = read_all(session_factory)
+    assert stored["a.mp4"].status == 1
+    assert stored["b.mp4"].notes is None
+
+
+def test_count_cache_is_bounded(session_factory, monkeypatch):
+    monkeypatch.setattr(Config, "COUNT_CACHE_SIZE", 3)
+    monkeypatch.setattr(BaseDBOperateModel, "_count_cache", OrderedDict())
+    session = session_factory()
+    BaseDBOperateModel.upsert_all(session, VideoInfo, [{"video_name": f"{i}.mp4", "status": i} for i in range(10)])
+    session.commit()
+    query = session.query(VideoInfo)
+    for i in range(10):
+        assert BaseDBOperateModel.count(query, {VideoInfo.status >= i}, mode="cached") == 10 - i
+    assert len(BaseDBOperateModel._count_cache) == 3
+    # 写入后缓存失效
+    BaseDBOperateModel.upsert_all(session, VideoInfo, [{"video_name": "new.mp4", "status": 9}])
+    session.commit()
+    assert BaseDBOperateModel.count(query, {VideoInfo.status >= 9}, mode="cached") == 2
+    session.close()
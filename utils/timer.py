@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+""" 耗时统计工具;
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+
+class LatencyStats(object):
+    """ 记录一组耗时(毫秒)并输出汇总信息;
+    """
+
+    def __init__(self, name: str, max_samples: int = 10000):
+        """
+        Args:
+            name: str;统计项的名称
+            max_samples: int;最多保留的样本数, 超出后丢弃最早的样本
+        """
+        self.name = name
+        self.max_samples = max_samples
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def add(self, ms: float) -> None:
+        """记录一次耗时
+
+        Args:
+            ms: float;耗时(毫秒)
+        """
+        with self._lock:
+            self._samples.append(ms)
+            if len(self._samples) > self.max_samples:
+                del self._samples[0:len(self._samples) - self.max_samples]
+
+    @property
+    def last(self) -> float:
+        """最近一次的耗时"""
+        return self._samples[-1] if self._samples else 0.0
+
+    def summary(self) -> dict:
+        """汇总统计
+
+        Returns:
+            dict;count/mean/p50/p95/max, 单位毫秒
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"name": self.name, "count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        count = len(samples)
+        return {
+            "name": self.name,
+            "count": count,
+            "mean": sum(samples) / count,
+            "p50": samples[int(0.5 * (count - 1))],
+            "p95": samples[int(0.95 * (count - 1))],
+            "max": samples[-1],
+        }
+
+    def histogram(self, bounds: tuple = (1, 2, 5, 10, 20, 50, 100, 200)) -> list:
+        """耗时分布直方图
+
+        Args:
+            bounds: tuple;升序排列的区间上界(毫秒)
+
+        Returns:
+            list;[(区间描述, 样本数), ...], 最后一个区间为大于最大上界的样本
+        """
+        with self._lock:
+            samples = list(self._samples)
+        counts = [0] * (len(bounds) + 1)
+        for ms in samples:
+            for i, bound in enumerate(bounds):
+                if ms <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<={bound}ms" for bound in bounds] + [f">{bounds[-1]}ms"]
+        return list(zip(labels, counts))
+
+    def reset(self) -> None:
+        """清空样本"""
+        with self._lock:
+            self._samples = []
+
+    def __str__(self):
+        s = self.summary()
+        return (f"{s['name']}: count={s['count']} mean={s['mean']:.2f}ms "
+                f"p50={s['p50']:.2f}ms p95={s['p95']:.2f}ms max={s['max']:.2f}ms")
+
+
+class StageTimer(object):
+    """ 分阶段计时, 每个阶段一个 LatencyStats;
+    """
+
+    def __init__(self, stages: tuple):
+        """
+        Args:
+            stages: tuple;阶段名称, 输出时按该顺序排列
+        """
+        self.stats = {name: LatencyStats(name) for name in stages}
+
+    @contextmanager
+    def stage(self, name: str):
+        """记录 with 语句块的耗时
+
+        Args:
+            name: str;阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats[name].add((time.perf_counter() - start) * 1000)
+
+    def report(self) -> str:
+        """各阶段的汇总信息"""
+        return "\n".join(str(s) for s in self.stats.values() if s.summary()["count"])
+
+    def reset(self) -> None:
+        """清空所有阶段的样本"""
+        for s in self.stats.values():
+            s.reset()
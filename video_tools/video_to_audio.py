@@ -1,14 +1,27 @@
 # -*- coding: utf-8 -*-
 """ 视频拆分成为音频文件;
 """
+import os
+import sys
 
 # python 3.8
 # import moviepy.editor as mp
 
 import moviepy as mp
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.media_probe import MediaProbe
 
-def extract_audio(videos_file_path, target_name):
+# 多次调用共用一个探测对象, 进程内缓存的元数据不会丢失
+media_probe = MediaProbe()
+
+
+def extract_audio(videos_file_path, target_name, probe=None):
+    # 元数据缓存或者容器头中记录了没有音频流的视频, 不再打开视频
+    info = (probe or media_probe).header(videos_file_path)
+    if info.get("audio_codec") == "":
+        print(f"视频没有音频: {videos_file_path}")
+        return
     my_clip = mp.VideoFileClip(videos_file_path)
     my_clip.audio.write_audiofile(f'{target_name}.mp3')
 
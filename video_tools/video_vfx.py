@@ -3,6 +3,7 @@
 使用前 pip install moviepy,
 """
 import os
+import sys
 import random
 import tkinter as tk
 from tkinter import filedialog, messagebox
@@ -13,6 +14,9 @@ from tkinter import filedialog, messagebox
 # python 3.10
 from moviepy import VideoFileClip, vfx
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.media_probe import MediaProbe
+
 
 class DirectoryAndFileSelector:
     """ 视频处理;
@@ -28,6 +32,8 @@ class DirectoryAndFileSelector:
         self.result_folder = None
         self.duration = None
         self.exist_timer = 0
+        # 视频时长从元数据缓存中读取, 不再为了时长打开整个视频
+        self.media_probe = MediaProbe()
 
         # 创建结果选择目录的标签
         self.result_label = tk.Label(master, text="视频目录:")
@@ -82,9 +88,12 @@ class DirectoryAndFileSelector:
             if not os.path.isdir(target_folder):
                 os.mkdir(target_folder)
             # 进行视频的剪辑;
-            with VideoFileClip(video_path) as dur:
-                total_time = dur.duration
-                self.duration = total_time
+            # 只读取缓存或者容器头中的时长, ffmpeg 不可用时再打开视频
+            total_time = self.media_probe.header(video_path).get("duration")
+            if total_time is None:
+                with VideoFileClip(video_path) as dur:
+                    total_time = dur.duration
+            self.duration = total_time
             for i in range(int(total_time)):
                 target_path = os.path.join(target_folder, f"{video.rsplit('.')[0]}_scene_{str(i).zfill(5)}.mp4")
                 self.logic_video(video_path, target_path)